@@ -0,0 +1,124 @@
+# imports
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from os.path import abspath, dirname, exists, join
+from typing import Any, Dict, List
+
+import numpy as np
+
+# make movie recommendations modules importable when run as script
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# import movie recommendations modules
+from movie_recommendations.CoPurchaseCounts import CoPurchaseCounts
+from movie_recommendations.DataGenerator import DataGenerator
+from movie_recommendations.DataLoader import DataLoader
+from movie_recommendations.Snapshot import Snapshot
+
+
+def run_co_purchase_benchmark(
+    user_path: str, shard_counts: List[int], n_workers: int
+) -> Dict[str, Dict[str, float]]:
+    """Compares counting co-purchases in one process with counting shards and merging them.
+
+    Every shard is timed on its own, so that the wall time of a build with one machine or core per shard is estimated as the slowest shard plus the merge, also where fewer cores are available.
+
+    Args:
+        user_path (str): path of Users.txt
+        shard_counts (List[int]): numbers of shards to measure
+        n_workers (int): number of worker processes of the measured pool build
+
+    Raises:
+        AssertionError: if merged counts differ from counts of one process
+
+    Returns:
+        Dict[str, Dict[str, float]]: seconds per measurement
+    """
+    results: Dict[str, Dict[str, float]] = {}
+    start = time.perf_counter()
+    reference = CoPurchaseCounts.from_user_data(DataLoader.read_user_data(user_path))
+    results["single_process"] = {"seconds": time.perf_counter() - start}
+    # Users.txt is described once like by build_sharded, so that shards are timed without hashing it
+    source = Snapshot.describe_source(user_path)
+    for n_shards in shard_counts:
+        with tempfile.TemporaryDirectory() as shard_directory:
+            shard_seconds = []
+            for shard in range(n_shards):
+                start = time.perf_counter()
+                CoPurchaseCounts.count_shard(
+                    user_path, shard, n_shards, shard_directory, source
+                )
+                shard_seconds.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            merged = CoPurchaseCounts.merge(
+                [
+                    CoPurchaseCounts.get_shard_path(shard_directory, shard, n_shards)
+                    for shard in range(n_shards)
+                ]
+            )
+            merge_seconds = time.perf_counter() - start
+        assert np.array_equal(merged.movie_ids, reference.movie_ids)
+        assert (merged.co_counts != reference.co_counts).nnz == 0
+        critical_path = max(shard_seconds) + merge_seconds
+        results[f"shards_{n_shards}"] = {
+            "sum_of_shards_seconds": sum(shard_seconds),
+            "max_shard_seconds": max(shard_seconds),
+            "merge_seconds": merge_seconds,
+            "critical_path_seconds": critical_path,
+            "estimated_speedup": results["single_process"]["seconds"] / critical_path,
+        }
+        start = time.perf_counter()
+        CoPurchaseCounts.build_sharded(user_path, n_shards, n_workers)
+        results[f"shards_{n_shards}"]["pool_seconds"] = time.perf_counter() - start
+    return results
+
+
+if __name__ == "__main__":
+    # parse command line arguments
+    parser = argparse.ArgumentParser(
+        description="Compares counting co-purchases in one process with sharded counting and merging."
+    )
+    parser.add_argument("--users", type=int, default=300000)
+    parser.add_argument("--movies", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--data-directory",
+        help="directory of generated data, reused if it exists, defaults to a temporary directory",
+    )
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of worker processes of the pool build",
+    )
+    parser.add_argument("--output", help="path of JSON report")
+    args = parser.parse_args()
+
+    data_directory = args.data_directory or tempfile.mkdtemp(prefix="movie_data_")
+    if not exists(join(data_directory, "Users.txt")):
+        DataGenerator(args.users, args.movies, n_sessions=1, seed=args.seed).generate(
+            data_directory
+        )
+    report: Dict[str, Any] = {
+        "parameters": vars(args),
+        "cpu_count": os.cpu_count(),
+        "measurements": run_co_purchase_benchmark(
+            DataLoader.get_source_paths(data_directory)["user_data"],
+            args.shards,
+            args.workers,
+        ),
+    }
+    for name, result in report["measurements"].items():
+        print(
+            f"{name:<16}"
+            + "".join(f" {key}={value:.3f}" for key, value in result.items())
+        )
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,247 @@
+# imports
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from os.path import abspath, dirname, exists, join
+from typing import Any, Dict, List
+
+import numpy as np
+
+# make movie recommendations modules importable when run as script
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# import movie recommendations modules
+from movie_recommendations.DataGenerator import DataGenerator
+from movie_recommendations.DataLoader import DataLoader
+from movie_recommendations.DataManager import DataManager
+from movie_recommendations.PopularMovieRecommender import PopularMovieRecommender
+from movie_recommendations.RecommendationEvaluator import RecommendationEvaluator
+from movie_recommendations.SimilarMovieRecommender import SimilarMovieRecommender
+
+
+def create_train_data_manager(evaluator: RecommendationEvaluator) -> DataManager:
+    """Creates a DataManager whose users only purchased the movies that are not held out.
+
+    Args:
+        evaluator (RecommendationEvaluator): evaluator holding out purchases
+
+    Returns:
+        DataManager: data of the recommenders a configuration is evaluated with
+    """
+    data_manager = evaluator.data_manager
+    train_matrix = evaluator.train_purchases.matrix.tocsr()
+    movie_ids = evaluator.train_purchases.movie_ids
+    purchased = {
+        int(user_id): ";".join(
+            str(movie_id)
+            for movie_id in movie_ids[
+                train_matrix.indices[
+                    train_matrix.indptr[row] : train_matrix.indptr[row + 1]
+                ]
+            ]
+        )
+        for row, user_id in enumerate(evaluator.train_purchases.row_ids.tolist())
+    }
+    user_data = data_manager.user_data.copy()
+    user_data["purchased"] = [
+        purchased.get(int(user_id), "") for user_id in user_data["user_id"]
+    ]
+    return DataManager(user_data, data_manager.movie_data, data_manager.session_data)
+
+
+def evaluate_configuration(
+    evaluator: RecommendationEvaluator,
+    train_data_manager: DataManager,
+    weight_rating: float,
+    correlation_threshold: float,
+) -> Dict[str, float]:
+    """Evaluates one configuration by recommending to every evaluated user with the recommenders of the pipeline.
+
+    Popular movies are scored from all purchases of train_data_manager, like the demo of main.py without purchase events.
+
+    Args:
+        evaluator (RecommendationEvaluator): evaluator holding out purchases
+        train_data_manager (DataManager): data without held out purchases
+        weight_rating (float): weighting with which the rating is included in the total score
+        correlation_threshold (float): correlations with a smaller value are not considered for similar movies
+
+    Returns:
+        Dict[str, float]: metrics of the configuration, see RecommendationEvaluator.evaluate
+    """
+    n = evaluator.n_recommendations
+    popular_movie_ids = {
+        int(movie.identifier)
+        for movie in PopularMovieRecommender(train_data_manager).get_popular_movies(
+            n, weight_rating
+        )
+    }
+    similar_movie_recommender = SimilarMovieRecommender(
+        train_data_manager, correlation_threshold, cache_size=1 << 20
+    )
+    held_out: List[set] = [set() for _ in evaluator.user_ids]
+    for user, movie_id in zip(
+        evaluator.holdout_users.tolist(), evaluator.holdout_movie_ids.tolist()
+    ):
+        held_out[user].add(movie_id)
+    counts = dict.fromkeys(
+        ["hit_users", "hits", "popular_users", "popular_hits", "similar_users"], 0
+    )
+    counts.update(similar_hits=0, similar_slots=0)
+    for user, seed_movie_id in enumerate(evaluator.seed_movie_ids.tolist()):
+        movie = train_data_manager.get_movie_by_movie_id(seed_movie_id)
+        similar_movie_ids = set()
+        for based_on in evaluator.based_on:
+            movies = similar_movie_recommender.get_similar_movies(movie, n, based_on)
+            counts["similar_slots"] += len(movies)
+            similar_movie_ids.update(int(movie.identifier) for movie in movies)
+        popular_hits = popular_movie_ids & held_out[user]
+        similar_hits = similar_movie_ids & held_out[user]
+        counts["hits"] += len(popular_hits | similar_hits)
+        counts["hit_users"] += bool(popular_hits | similar_hits)
+        counts["popular_hits"] += len(popular_hits)
+        counts["popular_users"] += bool(popular_hits)
+        counts["similar_hits"] += len(similar_hits)
+        counts["similar_users"] += bool(similar_hits)
+    n_users = len(evaluator.user_ids)
+    popular_slots = len(popular_movie_ids) * n_users
+    slots = popular_slots + counts["similar_slots"]
+    return {
+        "hit_rate": counts["hit_users"] / n_users,
+        "precision": counts["hits"] / slots if slots else 0.0,
+        "popular_hit_rate": counts["popular_users"] / n_users,
+        "popular_precision": (
+            counts["popular_hits"] / popular_slots if popular_slots else 0.0
+        ),
+        "similar_hit_rate": counts["similar_users"] / n_users,
+        "similar_precision": (
+            counts["similar_hits"] / counts["similar_slots"]
+            if counts["similar_slots"]
+            else 0.0
+        ),
+    }
+
+
+def run_evaluation_benchmark(
+    data_manager: DataManager,
+    weight_ratings: np.ndarray,
+    correlation_thresholds: np.ndarray,
+    n_workers: int,
+    n_checked_points: int,
+) -> Dict[str, Any]:
+    """Compares the vectorized sweep of a grid with evaluating configurations one by one.
+
+    Args:
+        data_manager (DataManager): manages the evaluated data
+        weight_ratings (np.ndarray): weight_rating values of the grid
+        correlation_thresholds (np.ndarray): correlation thresholds of the grid
+        n_workers (int): number of worker processes of the sweep
+        n_checked_points (int): number of random grid points evaluated one by one
+
+    Raises:
+        AssertionError: if popular movies of a weight_rating value differ from PopularMovieRecommender or metrics of a grid point differ from evaluating it one by one
+
+    Returns:
+        Dict[str, Any]: durations and best grid points
+    """
+    start = time.perf_counter()
+    evaluator = RecommendationEvaluator(data_manager)
+    split_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    results = evaluator.evaluate(weight_ratings, correlation_thresholds, n_workers)
+    sweep_seconds = time.perf_counter() - start
+    train_data_manager = create_train_data_manager(evaluator)
+    popular_movie_recommender = PopularMovieRecommender(train_data_manager)
+    for weight_rating, popular_movie_ids in zip(
+        weight_ratings, evaluator.get_popular_movie_ids(weight_ratings)
+    ):
+        expected = [
+            int(movie.identifier)
+            for movie in popular_movie_recommender.get_popular_movies(
+                evaluator.n_recommendations, weight_rating
+            )
+        ]
+        assert popular_movie_ids.tolist() == expected, (weight_rating, expected)
+    configuration_seconds = []
+    rng = np.random.default_rng(0)
+    for index in rng.choice(len(results), min(n_checked_points, len(results)), False):
+        row = results.iloc[index]
+        start = time.perf_counter()
+        metrics = evaluate_configuration(
+            evaluator,
+            train_data_manager,
+            row["weight_rating"],
+            row["correlation_threshold"],
+        )
+        configuration_seconds.append(time.perf_counter() - start)
+        for name, value in metrics.items():
+            assert value == row[name], (name, value, row.to_dict())
+    best = results.sort_values(
+        by=["hit_rate", "precision"], ascending=False, kind="stable"
+    ).iloc[0]
+    return {
+        "evaluated_users": len(evaluator.user_ids),
+        "held_out_purchases": len(evaluator.holdout_movie_ids),
+        "grid_points": len(results),
+        "split_seconds": split_seconds,
+        "sweep_seconds": sweep_seconds,
+        "seconds_per_configuration": float(np.mean(configuration_seconds)),
+        "estimated_seconds_one_by_one": float(np.mean(configuration_seconds))
+        * len(results),
+        "checked_grid_points": len(configuration_seconds),
+        "best": {key: float(value) for key, value in best.items()},
+    }
+
+
+if __name__ == "__main__":
+    # parse command line arguments
+    parser = argparse.ArgumentParser(
+        description="Compares a vectorized sweep of weight_rating and correlation_threshold with evaluating every configuration by the pipeline."
+    )
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--movies", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--data-directory",
+        help="directory of generated data, reused if it exists, defaults to a temporary directory",
+    )
+    parser.add_argument("--weights", type=int, default=21)
+    parser.add_argument("--thresholds", type=int, default=19)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of worker processes of the sweep",
+    )
+    parser.add_argument(
+        "--checked-points",
+        type=int,
+        default=3,
+        help="number of random grid points evaluated one by one and compared",
+    )
+    parser.add_argument("--output", help="path of JSON report")
+    args = parser.parse_args()
+
+    data_directory = args.data_directory or tempfile.mkdtemp(prefix="movie_data_")
+    if not exists(join(data_directory, "Users.txt")):
+        DataGenerator(args.users, args.movies, n_sessions=1, seed=args.seed).generate(
+            data_directory
+        )
+    report: Dict[str, Any] = {
+        "parameters": vars(args),
+        "cpu_count": os.cpu_count(),
+        "measurements": run_evaluation_benchmark(
+            DataLoader.load_data_manager(data_directory),
+            np.linspace(0, 1, args.weights),
+            np.linspace(0, 0.9, args.thresholds),
+            args.workers,
+            args.checked_points,
+        ),
+    }
+    print(json.dumps(report["measurements"], indent=2))
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"Results written to {args.output}")
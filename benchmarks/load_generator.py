@@ -0,0 +1,255 @@
+# imports
+import argparse
+import asyncio
+import json
+import sys
+import time
+from os.path import abspath, dirname
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# make movie recommendations modules importable when run as script
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# import movie recommendations modules
+from movie_recommendations.DataLoader import DataLoader
+
+
+def create_requests(
+    movie_ids: np.ndarray,
+    n_requests: int,
+    popular_share: float,
+    genres_share: float,
+    n: int,
+    seed: int,
+) -> List[Dict[str, Any]]:
+    """Creates a random mix of popular and similar requests.
+
+    Args:
+        movie_ids (np.ndarray): identifiers of movies similar requests are based on
+        n_requests (int): number of requests
+        popular_share (float): share of popular requests
+        genres_share (float): share of similar requests based on genres, the others are based on purchases
+        n (int): number of recommended movies per request
+        seed (int): seed of random number generator
+
+    Returns:
+        List[Dict[str, Any]]: requests with unique "id"
+    """
+    random = np.random.default_rng(seed)
+    kinds = random.uniform(size=n_requests)
+    query_movie_ids = random.choice(movie_ids, n_requests)
+    requests = []
+    for request_id, (kind, movie_id) in enumerate(zip(kinds, query_movie_ids)):
+        if kind < popular_share:
+            requests.append({"id": request_id, "type": "popular", "n": n})
+        else:
+            requests.append(
+                {
+                    "id": request_id,
+                    "type": "similar",
+                    "movie_id": int(movie_id),
+                    "n": n,
+                    "based_on": (
+                        "genres" if kind < popular_share + genres_share else "purchases"
+                    ),
+                }
+            )
+    return requests
+
+
+async def open_connection(
+    host: str, port: int, unix_path: Optional[str]
+) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Connects to a RecommendationServer.
+
+    Args:
+        host (str): host of TCP socket
+        port (int): port of TCP socket
+        unix_path (Optional[str]): path of Unix socket used instead of TCP
+
+    Returns:
+        Tuple[asyncio.StreamReader, asyncio.StreamWriter]: reader and writer of connection
+    """
+    if unix_path is not None:
+        return await asyncio.open_unix_connection(unix_path)
+    return await asyncio.open_connection(host, port)
+
+
+async def run_client(
+    requests: List[Dict[str, Any]],
+    latencies: Dict[str, List[float]],
+    errors: List[str],
+    host: str,
+    port: int,
+    unix_path: Optional[str],
+) -> None:
+    """Sends requests one after another over one connection and records the latency of every response.
+
+    Args:
+        requests (List[Dict[str, Any]]): requests of this client
+        latencies (Dict[str, List[float]]): seconds per response, grouped by type and basis of similarity
+        errors (List[str]): error messages of responses
+        host (str): host of TCP socket
+        port (int): port of TCP socket
+        unix_path (Optional[str]): path of Unix socket used instead of TCP
+    """
+    reader, writer = await open_connection(host, port, unix_path)
+    try:
+        for request in requests:
+            start = time.perf_counter()
+            writer.write((json.dumps(request) + "\n").encode())
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            kind = request["type"] + (
+                f".{request['based_on']}" if "based_on" in request else ""
+            )
+            latencies.setdefault(kind, []).append(time.perf_counter() - start)
+            if "error" in response:
+                errors.append(response["error"])
+    finally:
+        writer.close()
+
+
+async def request_stats(
+    host: str, port: int, unix_path: Optional[str]
+) -> Dict[str, int]:
+    """Asks server for the number of batches it answered.
+
+    Args:
+        host (str): host of TCP socket
+        port (int): port of TCP socket
+        unix_path (Optional[str]): path of Unix socket used instead of TCP
+
+    Returns:
+        Dict[str, int]: statistics of server
+    """
+    reader, writer = await open_connection(host, port, unix_path)
+    try:
+        writer.write(b'{"type": "stats"}\n')
+        await writer.drain()
+        return json.loads(await reader.readline())["stats"]
+    finally:
+        writer.close()
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    """Summarizes latencies in milliseconds.
+
+    Args:
+        latencies (List[float]): seconds per response
+
+    Returns:
+        Dict[str, float]: number of requests, mean and percentiles of latency
+    """
+    milliseconds = np.array(latencies) * 1000
+    return {
+        "requests": len(milliseconds),
+        "mean_ms": float(milliseconds.mean()),
+        "p50_ms": float(np.percentile(milliseconds, 50)),
+        "p95_ms": float(np.percentile(milliseconds, 95)),
+        "p99_ms": float(np.percentile(milliseconds, 99)),
+        "max_ms": float(milliseconds.max()),
+    }
+
+
+async def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    """Sends all requests over concurrent connections and reports latency and throughput.
+
+    Args:
+        args (argparse.Namespace): parsed command line arguments
+
+    Returns:
+        Dict[str, Any]: report of load test
+    """
+    movie_data = DataLoader.read_movie_data(
+        DataLoader.get_source_paths(args.data_directory)["movie_data"]
+    )
+    requests = create_requests(
+        movie_data["movie_id"].to_numpy(),
+        args.requests,
+        args.popular_share,
+        args.genres_share,
+        args.n,
+        args.seed,
+    )
+    stats_before = await request_stats(args.host, args.port, args.unix_socket)
+    latencies: Dict[str, List[float]] = {}
+    errors: List[str] = []
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            run_client(
+                requests[client :: args.connections],
+                latencies,
+                errors,
+                args.host,
+                args.port,
+                args.unix_socket,
+            )
+            for client in range(args.connections)
+        )
+    )
+    seconds = time.perf_counter() - start
+    stats_after = await request_stats(args.host, args.port, args.unix_socket)
+    n_batches = stats_after["n_batches"] - stats_before["n_batches"]
+    n_batched_requests = (
+        stats_after["n_batched_requests"] - stats_before["n_batched_requests"]
+    )
+    return {
+        "parameters": vars(args),
+        "seconds": seconds,
+        "requests_per_second": len(requests) / seconds,
+        "errors": len(errors),
+        "mean_batch_size": n_batched_requests / n_batches if n_batches else 0.0,
+        "latency": {
+            "all": summarize(sum(latencies.values(), [])),
+            **{kind: summarize(latencies[kind]) for kind in sorted(latencies)},
+        },
+    }
+
+
+if __name__ == "__main__":
+    # parse command line arguments
+    parser = argparse.ArgumentParser(
+        description="Sends concurrent requests to a running recommendation server and reports latency and throughput."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix-socket", help="path of Unix socket used instead of TCP")
+    parser.add_argument(
+        "--data-directory",
+        default="./data",
+        help="directory containing Products.txt, movies of requests are drawn from it",
+    )
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument(
+        "--connections",
+        type=int,
+        default=32,
+        help="number of concurrent clients, each waits for its response before sending the next request",
+    )
+    parser.add_argument("--popular-share", type=float, default=0.1)
+    parser.add_argument("--genres-share", type=float, default=0.3)
+    parser.add_argument("--n", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="path of JSON report")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load(args))
+    print(
+        f"{args.requests} requests in {report['seconds']:.3f} s, "
+        f"{report['requests_per_second']:.1f} requests/s, "
+        f"mean batch size {report['mean_batch_size']:.1f}, {report['errors']} errors"
+    )
+    for kind, latency in report["latency"].items():
+        print(
+            f"{kind:<20} {latency['requests']:8d} requests  "
+            f"p50 {latency['p50_ms']:8.3f} ms  p95 {latency['p95_ms']:8.3f} ms  "
+            f"p99 {latency['p99_ms']:8.3f} ms"
+        )
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,234 @@
+# imports
+import argparse
+import json
+import sys
+import tempfile
+from os.path import abspath, dirname, exists, join
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+# make movie recommendations modules importable when run as script
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# import movie recommendations modules
+from movie_recommendations.DataGenerator import DataGenerator
+from movie_recommendations.DataLoader import DataLoader
+from movie_recommendations.DataManager import DataManager
+from movie_recommendations.SimilarMovieRecommender import SimilarMovieRecommender
+
+# correlations closer than this are considered equal, corrwith and counts differ in the last bits
+TOLERANCE = 1e-9
+
+
+def get_reference_correlations(movie_info: pd.DataFrame, movie_id: int) -> pd.Series:
+    """Correlates a movie with all movies like the original implementation, on a dense DataFrame with corrwith.
+
+    Args:
+        movie_info (pd.DataFrame): dense relation, columns are movie identifiers
+        movie_id (int): identifier of movie
+
+    Returns:
+        pd.Series: correlations indexed by movie identifier, nan where correlation is not defined
+    """
+    return movie_info.corrwith(movie_info[movie_id])
+
+
+def get_reference_movie_ids(
+    correlations: pd.Series, movie_id: int, correlation_threshold: float, n: int
+) -> List[int]:
+    """Selects similar movies from corrwith correlations like the original implementation: drop nan, sort, remove the movie itself and threshold.
+
+    Args:
+        correlations (pd.Series): correlations of movie_id indexed by movie identifier
+        movie_id (int): identifier of movie
+        correlation_threshold (float): correlations with a smaller value are not selected
+        n (int): number of similar movies
+
+    Returns:
+        List[int]: identifiers of similar movies
+    """
+    correlations = correlations.dropna()
+    correlations = pd.DataFrame(correlations, columns=["correlation"]).reset_index()
+    correlations = correlations.sort_values(by="correlation", ascending=False)
+    correlations = correlations[correlations["movie_id"] != movie_id]
+    correlations = correlations[correlations["correlation"] >= correlation_threshold]
+    return correlations["movie_id"][0:n].tolist()
+
+
+def is_consistent(
+    movie_ids: List[int],
+    correlations: pd.Series,
+    movie_id: int,
+    correlation_threshold: float,
+    n: int,
+) -> bool:
+    """Checks whether a list is a valid top n of the reference correlations, up to TOLERANCE.
+
+    Args:
+        movie_ids (List[int]): identifiers of similar movies
+        correlations (pd.Series): reference correlations of movie_id
+        movie_id (int): identifier of movie
+        correlation_threshold (float): correlations with a smaller value are not selected
+        n (int): number of similar movies
+
+    Returns:
+        bool: True if all movies reach the threshold, are sorted by correlation and no other movie should have been selected instead
+    """
+    values = correlations.reindex(movie_ids).to_numpy()
+    if np.isnan(values).any() or (values < correlation_threshold - TOLERANCE).any():
+        return False
+    if (np.diff(values) > TOLERANCE).any():
+        return False
+    others = correlations.drop(movie_ids + [movie_id]).dropna()
+    if len(movie_ids) == n and n > 0:
+        return not (others > values[-1] + TOLERANCE).any()
+    return not (others >= correlation_threshold + TOLERANCE).any()
+
+
+def classify(
+    index_movie_ids: List[int],
+    reference_movie_ids: List[int],
+    correlations: pd.Series,
+    movie_id: int,
+    correlation_threshold: float,
+    n: int,
+) -> str:
+    """Classifies the difference between the index lookup and the reference.
+
+    Args:
+        index_movie_ids (List[int]): similar movies read from the neighbor index
+        reference_movie_ids (List[int]): similar movies of the corrwith path
+        correlations (pd.Series): reference correlations of movie_id
+        movie_id (int): identifier of movie
+        correlation_threshold (float): correlations with a smaller value are not selected
+        n (int): number of similar movies
+
+    Returns:
+        str: "equal", "threshold" if only movies with a correlation within TOLERANCE of the threshold differ, "tie_order" if only movies of equal correlation are ordered or chosen differently, "mismatch" otherwise
+    """
+    if index_movie_ids == reference_movie_ids:
+        return "equal"
+    if not is_consistent(
+        index_movie_ids, correlations, movie_id, correlation_threshold, n
+    ):
+        return "mismatch"
+    different = set(index_movie_ids) ^ set(reference_movie_ids)
+    if different and all(
+        abs(correlations[other] - correlation_threshold) <= TOLERANCE
+        for other in different
+    ):
+        return "threshold"
+    return "tie_order"
+
+
+def run_neighbor_parity(
+    data_manager: DataManager,
+    thresholds: Sequence[float],
+    ns: Sequence[int],
+) -> Dict[str, Dict[str, int]]:
+    """Compares neighbor index lookups with the corrwith path for every movie, threshold and n.
+
+    Args:
+        data_manager (DataManager): manages the compared data
+        thresholds (Sequence[float]): correlation thresholds
+        ns (Sequence[int]): numbers of similar movies
+
+    Returns:
+        Dict[str, Dict[str, int]]: number of comparisons per basis and outcome, see classify
+    """
+    movie_infos = {
+        "purchases": data_manager.purchases_of_movies,
+        "genres": data_manager.genres_of_movies,
+    }
+    results: Dict[str, Dict[str, int]] = {}
+    for based_on, movie_matrix in movie_infos.items():
+        movie_info = pd.DataFrame(
+            movie_matrix.matrix.toarray(),
+            index=movie_matrix.row_ids,
+            columns=pd.Index(movie_matrix.movie_ids, name="movie_id"),
+        )
+        reference_correlations = {
+            movie_id: get_reference_correlations(movie_info, movie_id)
+            for movie_id in movie_matrix.movie_ids.tolist()
+        }
+        outcomes = dict.fromkeys(["equal", "tie_order", "threshold", "mismatch"], 0)
+        for correlation_threshold in thresholds:
+            similar_movie_recommender = SimilarMovieRecommender(
+                data_manager, correlation_threshold
+            )
+            similar_movie_recommender.build_neighbor_indexes(n_neighbors=max(ns))
+            for movie_id, correlations in reference_correlations.items():
+                movie = data_manager.get_movie_by_movie_id(movie_id)
+                for n in ns:
+                    index_movie_ids = [
+                        int(similar_movie.identifier)
+                        for similar_movie in similar_movie_recommender.get_similar_movies(
+                            movie, n, based_on
+                        )
+                    ]
+                    reference_movie_ids = get_reference_movie_ids(
+                        correlations, movie_id, correlation_threshold, n
+                    )
+                    outcome = classify(
+                        index_movie_ids,
+                        reference_movie_ids,
+                        correlations,
+                        movie_id,
+                        correlation_threshold,
+                        n,
+                    )
+                    outcomes[outcome] += 1
+                    assert outcome != "mismatch", (
+                        based_on,
+                        movie_id,
+                        correlation_threshold,
+                        n,
+                        index_movie_ids,
+                        reference_movie_ids,
+                    )
+        results[based_on] = outcomes
+    return results
+
+
+if __name__ == "__main__":
+    # parse command line arguments
+    parser = argparse.ArgumentParser(
+        description="Compares neighbor index lookups of SimilarMovieRecommender with the original corrwith path for every movie."
+    )
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--movies", type=int, default=300)
+    parser.add_argument("--mean-purchases", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--data-directory",
+        help="directory of data, generated if it does not exist, defaults to a temporary directory",
+    )
+    parser.add_argument(
+        "--thresholds", type=float, nargs="+", default=[0.0, 0.2, 0.4, 0.6]
+    )
+    parser.add_argument("--n", type=int, nargs="+", default=[1, 3, 10])
+    parser.add_argument("--output", help="path of JSON report")
+    args = parser.parse_args()
+
+    data_directory = args.data_directory or tempfile.mkdtemp(prefix="movie_data_")
+    if not exists(join(data_directory, "Users.txt")):
+        DataGenerator(
+            args.users,
+            args.movies,
+            n_sessions=1,
+            mean_purchases=args.mean_purchases,
+            seed=args.seed,
+        ).generate(data_directory)
+    report: Dict[str, Any] = {
+        "parameters": vars(args),
+        "outcomes": run_neighbor_parity(
+            DataLoader.load_data_manager(data_directory), args.thresholds, args.n
+        ),
+    }
+    print(json.dumps(report["outcomes"], indent=2))
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,137 @@
+# imports
+import argparse
+import json
+import sys
+import tempfile
+import time
+from os.path import abspath, dirname, exists, join
+from typing import Any, Callable, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+# make movie recommendations modules importable when run as script
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# import movie recommendations modules
+from movie_recommendations.DataGenerator import DataGenerator
+from movie_recommendations.DataLoader import DataLoader
+from movie_recommendations.UserTable import UserTable
+
+
+def parse_with_explode(
+    user_data: pd.DataFrame, column: str
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Parses a movie list column like DataManager did before the user table parsed it, by splitting and exploding.
+
+    Args:
+        user_data (pd.DataFrame): user data
+        column (str): "viewed" or "purchased"
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: user id and movie id of every entry
+    """
+    pairs = pd.DataFrame(
+        {"user_id": user_data["user_id"], "movie_id": user_data[column].str.split(";")}
+    ).explode("movie_id")
+    return pairs["user_id"].to_numpy(), pairs["movie_id"].astype(int).to_numpy()
+
+
+def measure_throughput(
+    function: Callable[[], Any], n_bytes: int, repetitions: int
+) -> Tuple[Any, Dict[str, float]]:
+    """Measures best wall time of repeated calls and the resulting throughput.
+
+    Args:
+        function (Callable[[], Any]): parses the column
+        n_bytes (int): size of parsed text
+        repetitions (int): number of calls
+
+    Returns:
+        Tuple[Any, Dict[str, float]]: result of last call and "seconds" and "mb_per_second"
+    """
+    best_seconds = float("inf")
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        result = function()
+        best_seconds = min(best_seconds, time.perf_counter() - start)
+    return result, {
+        "seconds": best_seconds,
+        "mb_per_second": n_bytes / 1e6 / best_seconds,
+    }
+
+
+def run_parse_benchmark(
+    user_data: pd.DataFrame, chunk_size: int, repetitions: int
+) -> Dict[str, Dict[str, float]]:
+    """Compares throughput of the explode path with UserTable.parse_movie_lists on both movie list columns.
+
+    Args:
+        user_data (pd.DataFrame): user data
+        chunk_size (int): number of entries parsed at once by UserTable.parse_movie_lists
+        repetitions (int): number of calls per measurement, the fastest is reported
+
+    Raises:
+        AssertionError: if both parsers do not find the same movies
+
+    Returns:
+        Dict[str, Dict[str, float]]: "seconds" and "mb_per_second" per measurement
+    """
+    results: Dict[str, Dict[str, float]] = {}
+    for column in ["viewed", "purchased"]:
+        entries = user_data[column].tolist()
+        n_bytes = sum(map(len, entries))
+        (user_ids, movie_ids), results[f"{column}.explode"] = measure_throughput(
+            lambda: parse_with_explode(user_data, column), n_bytes, repetitions
+        )
+        (offsets, parsed_movie_ids), results[f"{column}.csr"] = measure_throughput(
+            lambda: UserTable.parse_movie_lists(entries, chunk_size),
+            n_bytes,
+            repetitions,
+        )
+        assert np.array_equal(
+            user_ids, np.repeat(user_data["user_id"].to_numpy(), np.diff(offsets))
+        ) and np.array_equal(movie_ids, parsed_movie_ids)
+    return results
+
+
+if __name__ == "__main__":
+    # parse command line arguments
+    parser = argparse.ArgumentParser(
+        description="Compares throughput of parsing viewed and purchased movie lists by explode and into compressed sparse row arrays."
+    )
+    parser.add_argument("--users", type=int, default=300000)
+    parser.add_argument("--movies", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--data-directory",
+        help="directory of generated data, reused if it exists, defaults to a temporary directory",
+    )
+    parser.add_argument("--chunk-size", type=int, default=262144)
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--output", help="path of JSON report")
+    args = parser.parse_args()
+
+    data_directory = args.data_directory or tempfile.mkdtemp(prefix="movie_data_")
+    if not exists(join(data_directory, "Users.txt")):
+        DataGenerator(args.users, args.movies, n_sessions=1, seed=args.seed).generate(
+            data_directory
+        )
+    user_data = DataLoader.read_user_data(
+        DataLoader.get_source_paths(data_directory)["user_data"]
+    )
+    report: Dict[str, Any] = {
+        "parameters": vars(args),
+        "measurements": run_parse_benchmark(
+            user_data, args.chunk_size, args.repetitions
+        ),
+    }
+    for name, result in report["measurements"].items():
+        print(
+            f"{name:<20} {result['seconds'] * 1000:10.1f} ms "
+            f"{result['mb_per_second']:8.1f} MB/s"
+        )
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,206 @@
+# imports
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from os.path import abspath, dirname, exists, join
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+# make movie recommendations modules importable when run as script
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# import movie recommendations modules
+from movie_recommendations.DataGenerator import DataGenerator
+from movie_recommendations.DataLoader import DataLoader
+from movie_recommendations.DataManager import DataManager
+from movie_recommendations.DataReloader import DataReloader
+from movie_recommendations.PopularMovieRecommender import PopularMovieRecommender
+from movie_recommendations.SimilarMovieRecommender import SimilarMovieRecommender
+
+
+def create_state(
+    data_manager: DataManager,
+) -> Tuple[DataManager, PopularMovieRecommender, SimilarMovieRecommender]:
+    """Creates recommenders of a version and builds their data, like the server does.
+
+    Args:
+        data_manager (DataManager): manages the data of the version
+
+    Returns:
+        Tuple[DataManager, PopularMovieRecommender, SimilarMovieRecommender]: data manager and recommenders
+    """
+    data_manager.movie_table
+    data_manager.purchases_of_movies.matrix
+    data_manager.genres_of_movies.matrix
+    return (
+        data_manager,
+        PopularMovieRecommender(data_manager),
+        SimilarMovieRecommender(data_manager, correlation_threshold=0.4),
+    )
+
+
+def query(
+    state: Tuple[DataManager, PopularMovieRecommender, SimilarMovieRecommender],
+    movie_id: int,
+) -> Tuple[List[int], List[int]]:
+    """Answers a popular and a similar query with one version.
+
+    Args:
+        state (Tuple[DataManager, PopularMovieRecommender, SimilarMovieRecommender]): version answering the queries
+        movie_id (int): identifier of queried movie
+
+    Returns:
+        Tuple[List[int], List[int]]: identifiers of popular and of similar movies
+    """
+    data_manager, popular_movie_recommender, similar_movie_recommender = state
+    popular_movie_ids = [
+        int(movie.identifier)
+        for movie in popular_movie_recommender.get_popular_movies(10)
+    ]
+    similar_movie_ids = [
+        int(movie.identifier)
+        for movie in similar_movie_recommender.get_similar_movies(
+            data_manager.get_movie_by_movie_id(movie_id), 10, "purchases"
+        )
+    ]
+    return popular_movie_ids, similar_movie_ids
+
+
+def get_percentiles(latencies: List[float]) -> Dict[str, float]:
+    """Summarizes latencies in milliseconds.
+
+    Args:
+        latencies (List[float]): seconds per query
+
+    Returns:
+        Dict[str, float]: number of queries and latency percentiles in milliseconds
+    """
+    if not latencies:
+        return {"queries": 0}
+    milliseconds = np.array(latencies) * 1000
+    return {
+        "queries": len(latencies),
+        "p50_ms": float(np.percentile(milliseconds, 50)),
+        "p99_ms": float(np.percentile(milliseconds, 99)),
+        "max_ms": float(milliseconds.max()),
+    }
+
+
+def run_reload_benchmark(
+    data_directory: str,
+    new_data_directory: str,
+    snapshot_directory: str,
+    n_idle_queries: int,
+) -> Dict[str, Any]:
+    """Replaces the data files while queries are answered and reloads them in a background thread.
+
+    Args:
+        data_directory (str): directory of the served data files, which are replaced
+        new_data_directory (str): directory of the data files swapped in
+        snapshot_directory (str): directory of snapshot, empty string disables snapshots
+        n_idle_queries (int): number of queries measured before the reload
+
+    Raises:
+        AssertionError: if a query was not answered by exactly one version or the new version answers differently than freshly loaded data
+
+    Returns:
+        Dict[str, Any]: measurements of the reload and query latencies before and during the reload
+    """
+    start = time.perf_counter()
+    data_reloader = DataReloader(
+        data_directory, create_state, snapshot_directory or None
+    )
+    initial_seconds = time.perf_counter() - start
+    movie_ids = data_reloader.state[0].movie_data["movie_id"].to_numpy()
+    queried_movie_ids = iter(np.random.default_rng(0).choice(movie_ids, 1000000))
+    idle_latencies = []
+    for _ in range(n_idle_queries):
+        start = time.perf_counter()
+        query(data_reloader.state, int(next(queried_movie_ids)))
+        idle_latencies.append(time.perf_counter() - start)
+    # replace data files by renaming, so that no partially written file is read
+    for name in ["Users.txt", "Products.txt", "CurrentUserSession.txt"]:
+        shutil.copy(join(new_data_directory, name), join(data_directory, f"{name}.new"))
+        os.replace(join(data_directory, f"{name}.new"), join(data_directory, name))
+    reload_thread = threading.Thread(target=data_reloader.reload)
+    reload_thread.start()
+    reload_latencies = []
+    answered_versions = []
+    while reload_thread.is_alive():
+        # read the current version once, the query finishes on it even if a swap happens meanwhile
+        version, state = data_reloader.version, data_reloader.state
+        start = time.perf_counter()
+        query(state, int(next(queried_movie_ids)))
+        reload_latencies.append(time.perf_counter() - start)
+        answered_versions.append(version)
+    reload_thread.join()
+    assert data_reloader.version == 1 and set(answered_versions) <= {0, 1}
+    # new version answers like data loaded from scratch
+    fresh_state = create_state(DataLoader.load_data_manager(new_data_directory))
+    for movie_id in np.random.default_rng(1).choice(
+        fresh_state[0].movie_data["movie_id"].to_numpy(), 50
+    ):
+        assert query(data_reloader.state, int(movie_id)) == query(
+            fresh_state, int(movie_id)
+        )
+    return {
+        "initial_load_seconds": initial_seconds,
+        "reload": data_reloader.reloads[-1],
+        "queries_before_reload": get_percentiles(idle_latencies),
+        "queries_during_reload": get_percentiles(reload_latencies),
+        "queries_answered_by_previous_version": answered_versions.count(0),
+    }
+
+
+if __name__ == "__main__":
+    # parse command line arguments
+    parser = argparse.ArgumentParser(
+        description="Measures duration and memory of reloading changed data files while queries are answered."
+    )
+    parser.add_argument("--users", type=int, default=300000)
+    parser.add_argument("--movies", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--data-directory",
+        help="directory of generated data, copies are served and replaced, defaults to a temporary directory",
+    )
+    parser.add_argument(
+        "--snapshot",
+        action="store_true",
+        help="store a snapshot of every version, like main.py does",
+    )
+    parser.add_argument("--idle-queries", type=int, default=200)
+    parser.add_argument("--output", help="path of JSON report")
+    args = parser.parse_args()
+
+    data_directory = args.data_directory or tempfile.mkdtemp(prefix="movie_data_")
+    # two versions of the data generated with different seeds
+    version_directories = [join(data_directory, f"version_{i}") for i in range(2)]
+    for version, version_directory in enumerate(version_directories):
+        if not exists(join(version_directory, "Users.txt")):
+            DataGenerator(
+                args.users, args.movies, n_sessions=1, seed=args.seed + version
+            ).generate(version_directory)
+    with tempfile.TemporaryDirectory() as served_directory:
+        for name in ["Users.txt", "Products.txt", "CurrentUserSession.txt"]:
+            shutil.copy(join(version_directories[0], name), served_directory)
+        report: Dict[str, Any] = {
+            "parameters": vars(args),
+            "measurements": run_reload_benchmark(
+                served_directory,
+                version_directories[1],
+                join(served_directory, "snapshot") if args.snapshot else "",
+                args.idle_queries,
+            ),
+        }
+    print(json.dumps(report["measurements"], indent=2))
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"Results written to {args.output}")
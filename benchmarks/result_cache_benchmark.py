@@ -0,0 +1,180 @@
+# imports
+import argparse
+import json
+import sys
+import tempfile
+import time
+from os.path import abspath, dirname, exists, join
+from typing import Any, Dict, List
+
+import numpy as np
+
+# make movie recommendations modules importable when run as script
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# import movie recommendations modules
+from movie_recommendations.DataGenerator import DataGenerator
+from movie_recommendations.DataLoader import DataLoader
+from movie_recommendations.DataManager import DataManager
+from movie_recommendations.MovieBase import MovieBase
+from movie_recommendations.PopularMovieRecommender import PopularMovieRecommender
+from movie_recommendations.SimilarMovieRecommender import SimilarMovieRecommender
+
+
+def create_skewed_queries(
+    movies: List[MovieBase], n_queries: int, exponent: float, seed: int
+) -> List[MovieBase]:
+    """Draws queried movies with Zipf-like skew, so that few hot movies are queried most often.
+
+    Args:
+        movies (List[MovieBase]): movies that can be queried
+        n_queries (int): number of queries
+        exponent (float): skew of queries, 0 queries all movies equally often
+        seed (int): seed of random number generator
+
+    Returns:
+        List[MovieBase]: queried movie of every query
+    """
+    rng = np.random.default_rng(seed)
+    probabilities = 1 / np.arange(1, len(movies) + 1) ** exponent
+    # hot movies are spread over the catalog instead of being the lowest identifiers
+    probabilities = probabilities[rng.permutation(len(movies))]
+    positions = rng.choice(
+        len(movies), n_queries, p=probabilities / probabilities.sum()
+    )
+    return [movies[position] for position in positions]
+
+
+def run_result_cache_benchmark(
+    data_manager: DataManager,
+    n_queries: int,
+    exponent: float,
+    cache_size: int,
+    correlation_threshold: float,
+    seed: int,
+) -> Dict[str, Dict[str, float]]:
+    """Compares latency of similar and popular queries with and without result cache.
+
+    Args:
+        data_manager (DataManager): manages the queried data
+        n_queries (int): number of queries per measurement
+        exponent (float): skew of queried movies
+        cache_size (int): number of results kept by the cached recommenders
+        correlation_threshold (float): threshold of SimilarMovieRecommender
+        seed (int): seed of random number generator
+
+    Raises:
+        AssertionError: if cached and uncached recommendations differ
+
+    Returns:
+        Dict[str, Dict[str, float]]: latency per query in microseconds and counters of the cache per measurement, "_replay" measurements repeat the queries with the filled cache
+    """
+    movies = [
+        data_manager.get_movie_by_movie_id(movie_id)
+        for movie_id in data_manager.movie_data["movie_id"].to_numpy()
+    ]
+    queries = create_skewed_queries(movies, n_queries, exponent, seed)
+    results: Dict[str, Dict[str, float]] = {}
+    for based_on in ["purchases", "genres"]:
+        recommendations = {}
+        for name, size in [("uncached", None), ("cached", cache_size)]:
+            similar_movie_recommender = SimilarMovieRecommender(
+                data_manager, correlation_threshold, cache_size=size
+            )
+            start = time.perf_counter()
+            recommendations[name] = [
+                [
+                    movie.identifier
+                    for movie in similar_movie_recommender.get_similar_movies(
+                        query, 10, based_on
+                    )
+                ]
+                for query in queries
+            ]
+            results[f"similar.{based_on}.{name}"] = {
+                "us_per_query": (time.perf_counter() - start) / n_queries * 1e6
+            }
+            result_cache = similar_movie_recommender.result_cache
+            if result_cache is not None:
+                results[f"similar.{based_on}.{name}"].update(
+                    hit_rate=result_cache.hits / n_queries,
+                    evictions=result_cache.evictions,
+                )
+                # replaying the queries measures hits of the hot path if all results fit into the cache
+                start = time.perf_counter()
+                for query in queries:
+                    similar_movie_recommender.get_similar_movies(query, 10, based_on)
+                results[f"similar.{based_on}.{name}_replay"] = {
+                    "us_per_query": (time.perf_counter() - start) / n_queries * 1e6
+                }
+        assert recommendations["uncached"] == recommendations["cached"]
+    for name, size in [("uncached", None), ("cached", cache_size)]:
+        popular_movie_recommender = PopularMovieRecommender(
+            data_manager, cache_size=size
+        )
+        start = time.perf_counter()
+        for _ in range(n_queries):
+            popular_movie_recommender.get_popular_movies(10)
+        results[f"popular.{name}"] = {
+            "us_per_query": (time.perf_counter() - start) / n_queries * 1e6
+        }
+    return results
+
+
+if __name__ == "__main__":
+    # parse command line arguments
+    parser = argparse.ArgumentParser(
+        description="Compares latency of recommendations with and without result cache on skewed queries."
+    )
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--movies", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--data-directory",
+        help="directory of generated data, reused if it exists, defaults to a temporary directory",
+    )
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument(
+        "--query-exponent",
+        type=float,
+        default=1.0,
+        help="skew of queried movies, 0 queries all movies equally often",
+    )
+    parser.add_argument("--cache-size", type=int, default=1024)
+    parser.add_argument("--correlation-threshold", type=float, default=0.4)
+    parser.add_argument("--output", help="path of JSON report")
+    args = parser.parse_args()
+
+    data_directory = args.data_directory or tempfile.mkdtemp(prefix="movie_data_")
+    if not exists(join(data_directory, "Users.txt")):
+        DataGenerator(args.users, args.movies, n_sessions=1, seed=args.seed).generate(
+            data_directory
+        )
+    paths = DataLoader.get_source_paths(data_directory)
+    data_manager = DataManager(
+        DataLoader.read_user_data(paths["user_data"]),
+        DataLoader.read_movie_data(paths["movie_data"]),
+        DataLoader.read_session_data(paths["session_data"]),
+    )
+    report: Dict[str, Any] = {
+        "parameters": vars(args),
+        "measurements": run_result_cache_benchmark(
+            data_manager,
+            args.queries,
+            args.query_exponent,
+            args.cache_size,
+            args.correlation_threshold,
+            args.seed,
+        ),
+    }
+    for name, result in report["measurements"].items():
+        counters = "".join(
+            f" {key}={value:.3f}" if isinstance(value, float) else f" {key}={value}"
+            for key, value in result.items()
+            if key != "us_per_query"
+        )
+        print(f"{name:<28} {result['us_per_query']:12.1f} us/query{counters}")
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"Results written to {args.output}")
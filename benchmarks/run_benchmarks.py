@@ -0,0 +1,369 @@
+# imports
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from os.path import abspath, dirname, exists, join
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# make movie recommendations modules importable when run as script
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# import movie recommendations modules
+from movie_recommendations.DataGenerator import DataGenerator
+from movie_recommendations.DataLoader import DataLoader
+from movie_recommendations.DataManager import DataManager
+from movie_recommendations.DecayedPurchaseCounter import DecayedPurchaseCounter
+from movie_recommendations.InvertedIndex import InvertedIndex
+from movie_recommendations.MovieBase import MovieBase
+from movie_recommendations.MovieMatrix import MovieMatrix
+from movie_recommendations.PopularMovieRecommender import PopularMovieRecommender
+from movie_recommendations.SimilarMovieRecommender import SimilarMovieRecommender
+
+
+class BenchmarkRecorder:
+    """Measures wall time and peak memory of benchmark stages.
+
+    Every stage is run once without tracing for its wall time and, if memory is measured, once more with tracemalloc for its peak of allocated bytes.
+
+    Attributes:
+        measure_memory (bool): if True, stages are run a second time to measure peak memory
+        results (Dict[str, Dict[str, Any]]): measurements per stage
+    """
+
+    def __init__(self, measure_memory=True) -> None:
+        self.measure_memory = measure_memory
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def measure(self, stage: str, function: Callable[[], Any], n_calls=1) -> Any:
+        """Runs function n_calls times and records seconds per call and peak memory.
+
+        Args:
+            stage (str): name of stage
+            function (Callable[[], Any]): stage to be measured
+            n_calls (int, optional): number of calls, seconds are averaged. Defaults to 1.
+
+        Returns:
+            Any: result of last call
+        """
+        start = time.perf_counter()
+        for _ in range(n_calls):
+            result = function()
+        seconds = (time.perf_counter() - start) / n_calls
+        self.results[stage] = {"seconds": seconds, "calls": n_calls}
+        if self.measure_memory:
+            tracemalloc.start()
+            result = function()
+            self.results[stage]["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        print(f"{stage:<40} {seconds * 1000:12.3f} ms")
+        return result
+
+
+def run_benchmarks(
+    data_directory: str,
+    recorder: BenchmarkRecorder,
+    n_queries: int,
+    correlation_threshold: float,
+    n_hashes: Optional[int] = None,
+    n_bands: Optional[int] = None,
+    minhash_threshold=0.05,
+) -> None:
+    """Times loading, matrix build, popularity and per-query similarity on the data in data_directory.
+
+    The approximate "minhash" engine is timed as well, its recall is the average share of exact top 10 similar movies it finds over the queried movies that have exact similar movies, and its candidates are the average share of movies it correlates a queried movie with. On random purchases high correlations are rare, so the engine is compared at its own threshold, at which most movies have similar movies.
+
+    Args:
+        data_directory (str): directory containing Users.txt, Products.txt and CurrentUserSession.txt
+        recorder (BenchmarkRecorder): records measurements
+        n_queries (int): number of movies similarity queries are averaged over
+        correlation_threshold (float): threshold of SimilarMovieRecommender
+        n_hashes (Optional[int], optional): length of MinHash signatures. Defaults to None, which uses SimilarMovieRecommender.MINHASH_PARAMETERS.
+        n_bands (Optional[int], optional): number of LSH bands. Defaults to None, which uses SimilarMovieRecommender.MINHASH_PARAMETERS.
+        minhash_threshold (float, optional): threshold of the approximate engine and of the exact similar movies its recall is based on. Defaults to 0.05.
+    """
+    paths = DataLoader.get_source_paths(data_directory)
+    user_data = recorder.measure(
+        "load.user_data", lambda: DataLoader.read_user_data(paths["user_data"])
+    )
+    movie_data = recorder.measure(
+        "load.movie_data", lambda: DataLoader.read_movie_data(paths["movie_data"])
+    )
+    session_data = recorder.measure(
+        "load.session_data",
+        lambda: DataLoader.read_session_data(paths["session_data"]),
+    )
+    data_manager = recorder.measure(
+        "build.data_manager",
+        lambda: DataManager(user_data, movie_data, session_data),
+    )
+    # matrices are built on first access, every run of a stage accesses them on a new DataManager,
+    # as the memory run would otherwise only read the matrix built by the timed run
+    purchases_of_movies = recorder.measure(
+        "build.purchases_of_movies",
+        lambda: DataManager(user_data, movie_data, session_data).purchases_of_movies,
+    )
+    genres_of_movies = recorder.measure(
+        "build.genres_of_movies",
+        lambda: DataManager(user_data, movie_data, session_data).genres_of_movies,
+    )
+    data_manager = DataManager(
+        user_data,
+        movie_data,
+        session_data,
+        purchases_of_movies=purchases_of_movies,
+        genres_of_movies=genres_of_movies,
+    )
+    popular_movie_recommender = PopularMovieRecommender(data_manager)
+    recorder.measure(
+        "popular.first_call",
+        lambda: PopularMovieRecommender(data_manager).get_popular_movies(10),
+    )
+    recorder.measure(
+        "popular.cached_call",
+        lambda: popular_movie_recommender.get_popular_movies(10),
+        n_calls=10,
+    )
+    # purchases with random times within one year, recent purchases count more
+    _, purchased_movie_ids = data_manager.user_table.get_purchases()
+    purchase_events = pd.DataFrame(
+        {
+            "movie_id": purchased_movie_ids,
+            "timestamp": np.random.default_rng(0).uniform(
+                0, 365 * 86400, len(purchased_movie_ids)
+            ),
+        }
+    )
+    purchase_counter = recorder.measure(
+        "popular.recent.build_counter",
+        lambda: DecayedPurchaseCounter.from_purchase_events(
+            movie_data["movie_id"].to_numpy(), purchase_events, half_life=30 * 86400
+        ),
+    )
+    recent_movie_recommender = PopularMovieRecommender(data_manager, purchase_counter)
+    recent_movie_recommender.get_popular_movies(10)
+    events = iter(np.resize(purchased_movie_ids, 2048))
+    recorder.measure(
+        "popular.recent.add_purchase",
+        lambda: purchase_counter.add_purchase(next(events), 365 * 86400),
+        n_calls=1000,
+    )
+
+    def get_recent_popular_movies_after_event() -> List[MovieBase]:
+        purchase_counter.add_purchase(next(events), 365 * 86400)
+        return recent_movie_recommender.get_popular_movies(10)
+
+    recorder.measure(
+        "popular.recent.call_after_event",
+        get_recent_popular_movies_after_event,
+        n_calls=10,
+    )
+    similar_movie_recommender = SimilarMovieRecommender(
+        data_manager, correlation_threshold
+    )
+    # query movies in order of a fixed random sample
+    movie_ids = np.random.default_rng(0).choice(
+        movie_data["movie_id"].to_numpy(),
+        min(n_queries, len(movie_data)),
+        replace=False,
+    )
+    movies = [data_manager.get_movie_by_movie_id(movie_id) for movie_id in movie_ids]
+    for based_on in ["purchases", "genres"]:
+        queries = iter(movies * 2)
+        recorder.measure(
+            f"similar.{based_on}.per_query",
+            lambda: similar_movie_recommender.get_similar_movies(
+                next(queries), 10, based_on
+            ),
+            n_calls=len(movies),
+        )
+        recorder.measure(
+            f"similar.{based_on}.batch_per_query",
+            lambda: similar_movie_recommender.get_similar_movie_ids_batch(
+                movie_ids, 10, based_on
+            ),
+        )
+        recorder.results[f"similar.{based_on}.batch_per_query"]["seconds"] /= len(
+            movie_ids
+        )
+    # candidates of movies frequently bought together, built on first purchase query,
+    # on a new matrix of the same entries, as the index reads movies of buyers from a copy the matrix keeps
+    recorder.measure(
+        "similar.purchases.build_inverted_index",
+        lambda: InvertedIndex(
+            MovieMatrix(
+                purchases_of_movies.matrix,
+                purchases_of_movies.row_ids,
+                purchases_of_movies.movie_ids,
+            )
+        ),
+    )
+
+    def create_approximate_movie_recommender() -> SimilarMovieRecommender:
+        return SimilarMovieRecommender(
+            data_manager,
+            minhash_threshold,
+            engine="minhash",
+            n_hashes=n_hashes,
+            n_bands=n_bands,
+        )
+
+    approximate_movie_recommender = create_approximate_movie_recommender()
+    exact_movie_recommender = SimilarMovieRecommender(data_manager, minhash_threshold)
+    for based_on in ["purchases", "genres"]:
+        # MinHash index is built on first query of a new recommender
+        recorder.measure(
+            f"minhash.{based_on}.build",
+            lambda: create_approximate_movie_recommender().get_similar_movie_ids_batch(
+                movie_ids[:1], 10, based_on
+            ),
+        )
+        approximate_movie_recommender.get_similar_movie_ids_batch(
+            movie_ids[:1], 10, based_on
+        )
+        approximate = recorder.measure(
+            f"minhash.{based_on}.batch_per_query",
+            lambda: approximate_movie_recommender.get_similar_movie_ids_batch(
+                movie_ids, 10, based_on
+            ),
+        )
+        recorder.results[f"minhash.{based_on}.batch_per_query"]["seconds"] /= len(
+            movie_ids
+        )
+        exact = exact_movie_recommender.get_similar_movie_ids_batch(
+            movie_ids, 10, based_on
+        )
+        recalls = [
+            len(set(approximate_ids) & set(exact_ids)) / len(exact_ids)
+            for approximate_ids, exact_ids in zip(approximate, exact)
+            if exact_ids
+        ]
+        recall = float(np.mean(recalls)) if recalls else float("nan")
+        # share of all movies the engine correlates a queried movie with, 1 would not prune at all
+        movie_matrix = (
+            data_manager.purchases_of_movies
+            if based_on == "purchases"
+            else data_manager.genres_of_movies
+        )
+        minhash_index = approximate_movie_recommender.minhash_indexes[based_on]
+        candidate_share = float(
+            np.mean(
+                [
+                    len(
+                        minhash_index.get_candidates(movie_matrix.movie_index[movie_id])
+                    )
+                    for movie_id in movie_ids
+                    if movie_id in movie_matrix.movie_index
+                ]
+            )
+            / len(movie_matrix.movie_ids)
+        )
+        recorder.results[f"minhash.{based_on}.batch_per_query"]["recall"] = recall
+        recorder.results[f"minhash.{based_on}.batch_per_query"]["recall_movies"] = len(
+            recalls
+        )
+        recorder.results[f"minhash.{based_on}.batch_per_query"][
+            "candidate_share"
+        ] = candidate_share
+        print(
+            f"{f'minhash.{based_on}.recall':<40} {recall:12.3f} over {len(recalls)} movies"
+        )
+        print(
+            f"{f'minhash.{based_on}.candidates':<40} {candidate_share:12.4f} of {len(movie_matrix.movie_ids)} movies"
+        )
+        if not recalls:
+            print(
+                f"Warning: no queried movie has similar movies based on {based_on} at threshold {minhash_threshold}, recall is not defined; lower --minhash-threshold or generate denser data",
+                file=sys.stderr,
+            )
+
+
+if __name__ == "__main__":
+    # parse command line arguments
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the recommendation pipeline on synthetic data."
+    )
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--movies", type=int, default=10000)
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--mean-purchases", type=float, default=5.0)
+    parser.add_argument("--mean-views", type=float, default=10.0)
+    parser.add_argument("--popularity-exponent", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--correlation-threshold", type=float, default=0.4)
+    parser.add_argument(
+        "--minhash-threshold",
+        type=float,
+        default=0.05,
+        help="threshold of the minhash engine and of the exact similar movies its recall is based on",
+    )
+    parser.add_argument(
+        "--minhash-hashes",
+        type=int,
+        help="length of MinHash signatures, defaults to SimilarMovieRecommender.MINHASH_PARAMETERS of every basis",
+    )
+    parser.add_argument(
+        "--minhash-bands",
+        type=int,
+        help="more bands increase recall, candidates and time of the minhash engine, defaults to SimilarMovieRecommender.MINHASH_PARAMETERS of every basis",
+    )
+    parser.add_argument(
+        "--data-directory",
+        help="directory of generated data, reused if it exists, defaults to a temporary directory",
+    )
+    parser.add_argument(
+        "--no-memory", action="store_true", help="skip peak memory measurements"
+    )
+    parser.add_argument(
+        "--output", default="benchmark_results.json", help="path of JSON results"
+    )
+    args = parser.parse_args()
+
+    generator = DataGenerator(
+        n_users=args.users,
+        n_movies=args.movies,
+        n_sessions=args.sessions,
+        mean_purchases=args.mean_purchases,
+        mean_views=args.mean_views,
+        popularity_exponent=args.popularity_exponent,
+        seed=args.seed,
+    )
+    data_directory = args.data_directory or tempfile.mkdtemp(prefix="movie_data_")
+    recorder = BenchmarkRecorder(measure_memory=not args.no_memory)
+    if not exists(join(data_directory, "Users.txt")):
+        recorder.measure("generate", lambda: generator.generate(data_directory))
+    run_benchmarks(
+        data_directory,
+        recorder,
+        args.queries,
+        args.correlation_threshold,
+        args.minhash_hashes,
+        args.minhash_bands,
+        args.minhash_threshold,
+    )
+
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results = {
+        "parameters": vars(args),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "max_rss_bytes": max_rss if sys.platform == "darwin" else max_rss * 1024,
+        "stages": recorder.results,
+    }
+    with open(args.output, "w") as output_file:
+        json.dump(results, output_file, indent=2)
+    print(f"Results written to {args.output}")
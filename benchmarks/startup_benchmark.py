@@ -0,0 +1,147 @@
+# imports
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from os.path import abspath, dirname, join
+from typing import Any, Dict, List
+
+MAIN_PATH = join(dirname(dirname(abspath(__file__))), "main.py")
+
+
+def get_entry_paths(output_directory: str) -> Dict[str, List[str]]:
+    """Collects command line arguments of every entry path of main.py.
+
+    Args:
+        output_directory (str): directory for files written by entry paths
+
+    Returns:
+        Dict[str, List[str]]: maps name of entry path to its arguments
+    """
+    return {
+        "demo": [],
+        "demo.popular_only": ["--popular-only"],
+        "batch": ["--batch-output", join(output_directory, "batch.jsonl")],
+        "serve": [
+            "--serve",
+            "--unix-socket",
+            join(output_directory, "server.sock"),
+        ],
+    }
+
+
+def run_entry_path(arguments: List[str], serve: bool) -> Dict[str, float]:
+    """Runs main.py in a new process and measures its wall time and peak resident memory.
+
+    A server is stopped as soon as it reports that it is ready, so that its startup is measured.
+
+    Args:
+        arguments (List[str]): command line arguments of main.py
+        serve (bool): if True, main.py runs a server which is stopped once it is ready
+
+    Returns:
+        Dict[str, float]: "seconds" until the process ended or the server was ready and "peak_rss_mb" of the process
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, MAIN_PATH, *arguments],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    if serve:
+        for line in process.stdout:
+            if line.startswith("Serving"):
+                break
+        seconds = time.perf_counter() - start
+        process.terminate()
+        process.stdout.read()
+    else:
+        process.stdout.read()
+    # wait4 reports resource usage of this process only, unlike getrusage of all children
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if not serve:
+        seconds = time.perf_counter() - start
+        if process.returncode != 0:
+            raise RuntimeError(f"main.py {' '.join(arguments)} failed.")
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    peak_rss = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return {"seconds": seconds, "peak_rss_mb": peak_rss / 1e6}
+
+
+def run_startup_benchmark(
+    data_directory: str, repetitions: int, cold: bool
+) -> Dict[str, Dict[str, float]]:
+    """Measures every entry path of main.py, the best of all repetitions is reported.
+
+    Args:
+        data_directory (str): directory containing Users.txt, Products.txt and CurrentUserSession.txt
+        repetitions (int): number of runs per entry path
+        cold (bool): if True, every run parses the data files and rebuilds the snapshot (--popular-only only parses them), otherwise an existing snapshot is loaded
+
+    Returns:
+        Dict[str, Dict[str, float]]: "seconds" and "peak_rss_mb" per entry path
+    """
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as output_directory:
+        common_arguments = [
+            "--data-directory",
+            data_directory,
+            "--snapshot-directory",
+            join(output_directory, "snapshot"),
+        ]
+        if cold:
+            common_arguments.append("--rebuild-snapshot")
+        entry_paths = get_entry_paths(output_directory)
+        # create snapshot before measuring, so that every run finds the same state
+        run_entry_path(common_arguments + entry_paths["demo"], False)
+        for name, arguments in entry_paths.items():
+            runs = [
+                run_entry_path(common_arguments + arguments, name == "serve")
+                for _ in range(repetitions)
+            ]
+            results[name] = {
+                "seconds": min(run["seconds"] for run in runs),
+                "peak_rss_mb": min(run["peak_rss_mb"] for run in runs),
+            }
+    return results
+
+
+if __name__ == "__main__":
+    # parse command line arguments
+    parser = argparse.ArgumentParser(
+        description="Measures wall time and peak resident memory of every entry path of main.py."
+    )
+    parser.add_argument(
+        "--data-directory",
+        default="./data",
+        help="directory containing Users.txt, Products.txt and CurrentUserSession.txt",
+    )
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument(
+        "--cold",
+        action="store_true",
+        help="parse data files and rebuild the snapshot in every run",
+    )
+    parser.add_argument("--output", help="path of JSON report")
+    args = parser.parse_args()
+
+    report: Dict[str, Any] = {
+        "parameters": vars(args),
+        "entry_paths": run_startup_benchmark(
+            abspath(args.data_directory), args.repetitions, args.cold
+        ),
+    }
+    for name, result in report["entry_paths"].items():
+        print(
+            f"{name:<30} {result['seconds'] * 1000:10.1f} ms "
+            f"{result['peak_rss_mb']:10.1f} MB peak RSS"
+        )
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"Results written to {args.output}")
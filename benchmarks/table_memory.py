@@ -0,0 +1,183 @@
+# imports
+import argparse
+import gc
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from os.path import abspath, dirname
+from typing import Any, Callable, Dict, List, Tuple
+
+import pandas as pd
+
+# make movie recommendations modules importable when run as script
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+# import movie recommendations modules
+from movie_recommendations.DataGenerator import DataGenerator
+from movie_recommendations.DataLoader import DataLoader
+from movie_recommendations.Movie import Movie
+from movie_recommendations.MovieTable import MovieTable
+from movie_recommendations.User import User
+from movie_recommendations.UserTable import UserTable
+
+
+def measure_retained(function: Callable[[], Any]) -> Tuple[Any, float, int]:
+    """Measures wall time and bytes still allocated by the result of a function.
+
+    The function is called twice, once for wall time and once with tracemalloc, which slows down allocations.
+
+    Args:
+        function (Callable[[], Any]): creates the measured objects
+
+    Returns:
+        Tuple[Any, float, int]: result, seconds and retained bytes
+    """
+    gc.collect()
+    start = time.perf_counter()
+    function()
+    seconds = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    result = function()
+    gc.collect()
+    retained_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, seconds, retained_bytes
+
+
+def create_movie_objects(movie_data: pd.DataFrame) -> List[Movie]:
+    """Creates one Movie instance per movie with the values a DataManager stored before tables existed.
+
+    Args:
+        movie_data (pd.DataFrame): movie data
+
+    Returns:
+        List[Movie]: one instance per movie
+    """
+    columns = {
+        column: movie_data[column].to_numpy()
+        for column in ["movie_id", "movie_name", "year", "rating", "price"]
+    }
+    genre_columns = ["keyword1", "keyword2", "keyword3", "keyword4", "keyword5"]
+    genres = [
+        [genre for genre in movie_genres if not pd.isna(genre)]
+        for movie_genres in movie_data[genre_columns].itertuples(index=False, name=None)
+    ]
+    return [
+        Movie(
+            columns["movie_id"][position],
+            columns["movie_name"][position],
+            columns["year"][position],
+            genres[position],
+            columns["rating"][position],
+            columns["price"][position],
+        )
+        for position in range(len(movie_data))
+    ]
+
+
+def create_user_objects(user_data: pd.DataFrame) -> List[User]:
+    """Creates one User instance per user with the values a DataManager stored before tables existed.
+
+    Args:
+        user_data (pd.DataFrame): user data
+
+    Returns:
+        List[User]: one instance per user
+    """
+    return [
+        User(
+            user_id,
+            user_name,
+            list(map(int, viewed.split(";"))),
+            list(map(int, purchased.split(";"))),
+        )
+        for user_id, user_name, viewed, purchased in zip(
+            user_data["user_id"].to_numpy(),
+            user_data["user_name"].to_numpy(),
+            user_data["viewed"].tolist(),
+            user_data["purchased"].tolist(),
+        )
+    ]
+
+
+def run_table_memory(
+    n_users: int, n_movies: int, seed: int
+) -> Dict[str, Dict[str, float]]:
+    """Compares memory of per-row Movie and User instances with MovieTable and UserTable and their views.
+
+    Args:
+        n_users (int): number of users
+        n_movies (int): number of movies
+        seed (int): seed of random number generator
+
+    Returns:
+        Dict[str, Dict[str, float]]: "seconds", "retained_mb" and "bytes_per_row" per measurement
+    """
+    with tempfile.TemporaryDirectory() as data_directory:
+        DataGenerator(n_users, n_movies, n_sessions=1, seed=seed).generate(
+            data_directory
+        )
+        paths = DataLoader.get_source_paths(data_directory)
+        movie_data = DataLoader.read_movie_data(paths["movie_data"])
+        user_data = DataLoader.read_user_data(paths["user_data"])
+    results: Dict[str, Dict[str, float]] = {}
+
+    def record(name: str, function: Callable[[], Any], n_rows: int) -> Any:
+        result, seconds, retained_bytes = measure_retained(function)
+        results[name] = {
+            "seconds": seconds,
+            "retained_mb": retained_bytes / 1e6,
+            "bytes_per_row": retained_bytes / n_rows,
+        }
+        return result
+
+    movie_ids = movie_data["movie_id"].tolist()
+    user_ids = user_data["user_id"].tolist()
+    record("movie.objects", lambda: create_movie_objects(movie_data), n_movies)
+    movie_table = record(
+        "movie.table", lambda: MovieTable.from_movie_data(movie_data), n_movies
+    )
+    record(
+        "movie.views",
+        lambda: [movie_table.get_movie(movie_id) for movie_id in movie_ids],
+        n_movies,
+    )
+    record("user.objects", lambda: create_user_objects(user_data), n_users)
+    user_table = record(
+        "user.table", lambda: UserTable.from_user_data(user_data), n_users
+    )
+    record(
+        "user.views",
+        lambda: [user_table.get_user(user_id) for user_id in user_ids],
+        n_users,
+    )
+    return results
+
+
+if __name__ == "__main__":
+    # parse command line arguments
+    parser = argparse.ArgumentParser(
+        description="Compares memory of Movie and User instances with array-backed tables."
+    )
+    parser.add_argument("--users", type=int, default=1000000)
+    parser.add_argument("--movies", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="path of JSON report")
+    args = parser.parse_args()
+
+    report: Dict[str, Any] = {
+        "parameters": vars(args),
+        "measurements": run_table_memory(args.users, args.movies, args.seed),
+    }
+    for name, result in report["measurements"].items():
+        print(
+            f"{name:<15} {result['retained_mb']:10.1f} MB "
+            f"{result['bytes_per_row']:8.1f} B/row {result['seconds'] * 1000:10.1f} ms"
+        )
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"Results written to {args.output}")
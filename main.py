@@ -1,52 +1,329 @@
 # imports
-import pandas as pd
-from os.path import abspath
+import argparse
+import atexit
+import sys
 
-# import movie recommendations modules
-from movie_recommendations.DataManager import DataManager
+# import movie recommendations modules, modules only needed by some entry paths are imported there
+from movie_recommendations.DataLoader import DataLoader
+from movie_recommendations.Instrumentation import Instrumentation
 from movie_recommendations.PopularMovieRecommender import PopularMovieRecommender
 from movie_recommendations.Printer import Printer
-from movie_recommendations.SimilarMovieRecommender import SimilarMovieRecommender
 
 if __name__ == "__main__":
-    # read user data, skip spaces after delimiter
-    user_data = pd.read_csv(
-        abspath("./data/Users.txt"),
-        sep=",",
-        header=None,
-        names=["user_id", "user_name", "viewed", "purchased"],
-        skipinitialspace=True,
-    )
-    # read product data, skip spaces after delimiter
-    movie_data = pd.read_csv(
-        abspath("./data/Products.txt"),
-        sep=",",
-        header=None,
-        names=[
-            "movie_id",
-            "movie_name",
-            "year",
-            "keyword1",
-            "keyword2",
-            "keyword3",
-            "keyword4",
-            "keyword5",
-            "rating",
-            "price",
-        ],
-        skipinitialspace=True,
-    )
-    # read session data, skip spaces after delimiter
-    session_data = pd.read_csv(
-        abspath("./data/CurrentUserSession.txt"),
-        sep=",",
-        header=None,
-        names=["user_id", "movie_id"],
-        skipinitialspace=True,
-    )
-
-    # create data_manager storing relevant information about users, movies and session data
-    data_manager = DataManager(user_data, movie_data, session_data)
+    # parse command line arguments
+    parser = argparse.ArgumentParser(description="Recommends movies to a user.")
+    parser.add_argument(
+        "--data-directory",
+        default="./data",
+        help="directory containing Users.txt, Products.txt and CurrentUserSession.txt",
+    )
+    parser.add_argument(
+        "--snapshot-directory",
+        default="./data/snapshot",
+        help="directory of binary snapshot reused while data files are unchanged",
+    )
+    parser.add_argument(
+        "--rebuild-snapshot",
+        action="store_true",
+        help="ignore existing snapshot and create a new one from data files",
+    )
+    parser.add_argument(
+        "--batch-output",
+        help="write recommendations for every session to this JSON Lines file instead of showing one random session",
+    )
+    parser.add_argument(
+        "--session-file",
+        help="session file streamed in batch mode, defaults to CurrentUserSession.txt in data directory",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of worker processes in batch mode, of --build-co-purchases and of --evaluate",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=1024,
+        help="number of sessions per chunk in batch mode",
+    )
+    parser.add_argument(
+        "--neighbors",
+        type=int,
+        help="precompute this many similar movies of every movie before batch mode forks its workers",
+    )
+    parser.add_argument(
+        "--build-user-recommendations",
+        metavar="DIRECTORY",
+        help="precompute recommendations for every user from purchases and views, store them in this directory and exit",
+    )
+    parser.add_argument(
+        "--user-recommendations",
+        metavar="DIRECTORY",
+        help="directory of precomputed user recommendations shown in the demo",
+    )
+    parser.add_argument(
+        "--build-co-purchases",
+        metavar="DIRECTORY",
+        help="count co-purchases of Users.txt in shards by --workers processes, merge them into this directory and exit",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        help="number of user shards of --build-co-purchases, defaults to --workers",
+    )
+    parser.add_argument(
+        "--co-purchase-shard",
+        type=int,
+        metavar="INDEX",
+        help="only count this shard of --build-co-purchases and exit, so that shards can be counted on separate machines before merging",
+    )
+    parser.add_argument(
+        "--co-purchases",
+        metavar="DIRECTORY",
+        help="directory of co-purchases merged by --build-co-purchases, used for movies frequently bought together",
+    )
+    parser.add_argument(
+        "--evaluate",
+        metavar="OUTPUT",
+        help="hold out purchases, write hit rate and precision of every combination of --weight-ratings and --correlation-thresholds to this CSV file and exit",
+    )
+    parser.add_argument(
+        "--weight-ratings",
+        type=float,
+        nargs="+",
+        default=[i / 20 for i in range(21)],
+        help="weight_rating values of popular movies evaluated by --evaluate",
+    )
+    parser.add_argument(
+        "--correlation-thresholds",
+        type=float,
+        nargs="+",
+        default=[i / 20 for i in range(19)],
+        help="correlation thresholds of similar movies evaluated by --evaluate",
+    )
+    parser.add_argument(
+        "--holdout-fraction",
+        type=float,
+        default=0.2,
+        help="share of purchases of every user held out by --evaluate",
+    )
+    parser.add_argument(
+        "--popular-only",
+        action="store_true",
+        help="only show popular movies in the demo, so that no similarity data is built",
+    )
+    parser.add_argument(
+        "--purchase-events",
+        help="file of timestamped purchases (user id, movie id, seconds since the epoch), popular movies are then based on recent purchases",
+    )
+    parser.add_argument(
+        "--half-life-days",
+        type=float,
+        default=30.0,
+        help="days after which a purchase of --purchase-events counts half",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="answer newline-delimited JSON requests on a socket instead of showing one random session",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="host of server")
+    parser.add_argument("--port", type=int, default=8765, help="port of server")
+    parser.add_argument(
+        "--unix-socket", help="path of Unix socket the server listens on instead of TCP"
+    )
+    parser.add_argument(
+        "--batch-window-ms",
+        type=float,
+        default=2.0,
+        help="milliseconds similar requests are collected by the server to be answered together",
+    )
+    parser.add_argument(
+        "--result-cache-size",
+        type=int,
+        default=4096,
+        help="number of recommendation results the server keeps for repeated requests, 0 disables caching",
+    )
+    parser.add_argument(
+        "--reload-interval",
+        type=float,
+        metavar="SECONDS",
+        help='check data files every SECONDS in server mode and swap in changed data without restart, 0 only reloads on {"type": "reload"} requests',
+    )
+    parser.add_argument(
+        "--instrument",
+        action="store_true",
+        help="print wall time and calls of every pipeline stage at exit",
+    )
+    parser.add_argument(
+        "--instrument-memory",
+        action="store_true",
+        help="record allocated bytes of every pipeline stage as well, slows down the program",
+    )
+    parser.add_argument(
+        "--instrument-output",
+        help="write stage report to this file, as JSON if it ends with .json and as text otherwise",
+    )
+    args = parser.parse_args()
+
+    # record pipeline stages and report them when the program ends, also after sys.exit
+    if args.instrument or args.instrument_memory or args.instrument_output:
+        Instrumentation.enable(trace_memory=args.instrument_memory)
+
+        def report_instrumentation() -> None:
+            print(f"\n{Instrumentation.to_text()}", file=sys.stderr)
+            if args.instrument_output is not None:
+                Instrumentation.dump(args.instrument_output)
+
+        atexit.register(report_instrumentation)
+
+    """Offline job: co-purchases counted per shard of users and merged
+    """
+    if args.build_co_purchases is not None:
+        from os.path import join
+
+        from movie_recommendations.CoPurchaseCounts import CoPurchaseCounts
+
+        user_path = DataLoader.get_source_paths(args.data_directory)["user_data"]
+        n_shards = args.shards or args.workers
+        shard_directory = join(args.build_co_purchases, "shards")
+        if args.co_purchase_shard is not None:
+            shard_path = CoPurchaseCounts.count_shard(
+                user_path, args.co_purchase_shard, n_shards, shard_directory
+            )
+            print(
+                f"Wrote co-purchases of shard {args.co_purchase_shard} to {shard_path}"
+            )
+            sys.exit(0)
+        co_purchase_counts = CoPurchaseCounts.build_sharded(
+            user_path, n_shards, args.workers, shard_directory
+        )
+        co_purchase_counts.save(join(args.build_co_purchases, "co_purchases.npz"))
+        print(
+            f"Wrote co-purchases of {len(co_purchase_counts.movie_ids)} movies from {n_shards} shards to {args.build_co_purchases}"
+        )
+        sys.exit(0)
+
+    # create data_manager storing relevant information about users, movies and session data,
+    # popular movies alone do not store a snapshot, which would build the genre matrix
+    data_manager = DataLoader.load_data_manager(
+        args.data_directory,
+        args.snapshot_directory,
+        args.rebuild_snapshot,
+        save_snapshot=not args.popular_only,
+    )
+    session_data = data_manager.session_data
+    # time-decayed purchase counters, so that popular movies are based on recent purchases
+    purchase_counter = None
+    if args.purchase_events is not None:
+        from movie_recommendations.DecayedPurchaseCounter import DecayedPurchaseCounter
+
+        purchase_counter = DecayedPurchaseCounter.from_purchase_events(
+            data_manager.movie_table.movie_ids,
+            DataLoader.read_purchase_events(args.purchase_events),
+            half_life=args.half_life_days * 24 * 60 * 60,
+        )
+    # co-purchases precomputed by --build-co-purchases
+    co_purchase_counts = None
+    if args.co_purchases is not None:
+        from os.path import join
+
+        from movie_recommendations.CoPurchaseCounts import CoPurchaseCounts
+
+        co_purchase_counts = CoPurchaseCounts.load(
+            join(args.co_purchases, "co_purchases.npz")
+        )
+
+    """Batch mode: recommendations for every session
+    """
+    if args.batch_output is not None:
+        from movie_recommendations.BatchSessionScorer import BatchSessionScorer
+
+        session_file = (
+            args.session_file
+            or DataLoader.get_source_paths(args.data_directory)["session_data"]
+        )
+        batch_session_scorer = BatchSessionScorer(
+            data_manager,
+            n_popular_movies=3,
+            n_similar_movies=3,
+            correlation_threshold=0.4,
+            n_workers=args.workers,
+            chunk_size=args.chunk_size,
+            purchase_counter=purchase_counter,
+            co_purchase_counts=co_purchase_counts,
+            n_neighbors=args.neighbors,
+        )
+        n_sessions = batch_session_scorer.score_sessions(
+            DataLoader.iter_session_data(session_file, args.chunk_size),
+            args.batch_output,
+        )
+        print(f"Wrote recommendations for {n_sessions} sessions to {args.batch_output}")
+        sys.exit(0)
+
+    """Offline job: recommendations for every user
+    """
+    if args.build_user_recommendations is not None:
+        from movie_recommendations.PersonalizedIndex import PersonalizedIndex
+
+        personalized_index = PersonalizedIndex.build(data_manager, n_recommendations=10)
+        personalized_index.save(args.build_user_recommendations)
+        print(
+            f"Wrote recommendations for {len(personalized_index.user_ids)} users to {args.build_user_recommendations}"
+        )
+        sys.exit(0)
+
+    """Offline job: evaluation of a grid of parameter values on held out purchases
+    """
+    if args.evaluate is not None:
+        from movie_recommendations.RecommendationEvaluator import (
+            RecommendationEvaluator,
+        )
+
+        recommendation_evaluator = RecommendationEvaluator(
+            data_manager, holdout_fraction=args.holdout_fraction, n_recommendations=3
+        )
+        evaluation = recommendation_evaluator.evaluate(
+            args.weight_ratings, args.correlation_thresholds, n_workers=args.workers
+        )
+        evaluation.to_csv(args.evaluate, index=False)
+        best = evaluation.sort_values(
+            by=["hit_rate", "precision"], ascending=False, kind="stable"
+        ).iloc[0]
+        print(
+            f"Wrote {len(evaluation)} evaluated parameter combinations for {len(recommendation_evaluator.user_ids)} users to {args.evaluate}, "
+            f"best hit rate {best['hit_rate']:.4f} at weight_rating={best['weight_rating']} and correlation_threshold={best['correlation_threshold']}"
+        )
+        sys.exit(0)
+
+    """Server mode: answer requests until interrupted
+    """
+    if args.serve:
+        import asyncio
+
+        from movie_recommendations.RecommendationServer import RecommendationServer
+
+        server = RecommendationServer(
+            data_manager,
+            correlation_threshold=0.4,
+            batch_window=args.batch_window_ms / 1000,
+            purchase_counter=purchase_counter,
+            cache_size=args.result_cache_size,
+            co_purchase_counts=co_purchase_counts,
+            data_directory=(
+                args.data_directory if args.reload_interval is not None else None
+            ),
+            snapshot_directory=args.snapshot_directory,
+            reload_interval=args.reload_interval or None,
+        )
+        address = args.unix_socket or f"{args.host}:{args.port}"
+        print(f"Serving recommendations on {address}")
+        try:
+            asyncio.run(server.serve(args.host, args.port, args.unix_socket))
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
 
     """Welcome User
     """
@@ -69,17 +346,21 @@ if __name__ == "__main__":
     """Taks 1: Recommendation based on movie popularity (high purchase rate and user review).
     """
     # get most popular movies
-    popular_movie_recommender = PopularMovieRecommender(data_manager)
+    popular_movie_recommender = PopularMovieRecommender(data_manager, purchase_counter)
     popular_movies = popular_movie_recommender.get_popular_movies(n_popular_movies=3)
     # print most popular movies
     printer = Printer()
     printer.display_recent_popular_movies(popular_movies)
+    if args.popular_only:
+        sys.exit(0)
 
     """Task 2: Recommendation based on similar genres and 'frequently bought together'.
     """
+    from movie_recommendations.SimilarMovieRecommender import SimilarMovieRecommender
+
     # generate recommender for similar movies
     similar_movie_recommender = SimilarMovieRecommender(
-        data_manager, correlation_threshold=0.4
+        data_manager, correlation_threshold=0.4, co_purchase_counts=co_purchase_counts
     )
     # movies 'frequently bought together'
     movies_purchased_togther = similar_movie_recommender.get_similar_movies(
@@ -93,3 +374,15 @@ if __name__ == "__main__":
         movie, n_similar_movies=3, based_on="genres"
     )
     printer.display_similar_movies(movie, movies_similar_genres, based_on="genres")
+
+    """Task 3: Recommendation based on purchases and views of the user, precomputed offline.
+    """
+    if args.user_recommendations is not None:
+        from movie_recommendations.PersonalizedIndex import PersonalizedIndex
+
+        personalized_index = PersonalizedIndex.load(args.user_recommendations)
+        personal_movies = [
+            data_manager.get_movie_by_movie_id(int(personal_movie_id))
+            for personal_movie_id in personalized_index.get_recommendations(user_id)[:3]
+        ]
+        printer.display_personal_movies(user, personal_movies)
@@ -0,0 +1,169 @@
+# imports
+import json
+import multiprocessing
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+import pandas as pd
+
+# import movie recommendations modules
+from movie_recommendations.CoPurchaseCounts import CoPurchaseCounts
+from movie_recommendations.DataManager import DataManager
+from movie_recommendations.DecayedPurchaseCounter import DecayedPurchaseCounter
+from movie_recommendations.PopularMovieRecommender import PopularMovieRecommender
+from movie_recommendations.SimilarMovieRecommender import SimilarMovieRecommender
+
+# recommender used by worker processes, set before the pool is forked so that workers share its matrices and indexes read-only
+_worker_recommender: Optional[SimilarMovieRecommender] = None
+
+
+def _score_chunk(chunk: Tuple[List[int], List[int], List[int], int]) -> List[str]:
+    """Creates JSON Lines records with similar movies based on purchases and genres for a chunk of sessions.
+
+    Args:
+        chunk (Tuple[List[int], List[int], List[int], int]): user ids and movie ids of sessions, popular movie ids and number of similar movies
+
+    Returns:
+        List[str]: one JSON object per session
+    """
+    user_ids, movie_ids, popular_movies, n_similar_movies = chunk
+    # calculate recommendations of every distinct movie once per chunk
+    unique_movie_ids = sorted(set(movie_ids))
+    recommendations = {
+        based_on: dict(
+            zip(
+                unique_movie_ids,
+                _worker_recommender.get_similar_movie_ids_batch(
+                    unique_movie_ids, n_similar_movies, based_on
+                ),
+            )
+        )
+        for based_on in ["purchases", "genres"]
+    }
+    return [
+        json.dumps(
+            {
+                "user_id": int(user_id),
+                "movie_id": int(movie_id),
+                "popular": popular_movies,
+                "purchases": [int(m) for m in recommendations["purchases"][movie_id]],
+                "genres": [int(m) for m in recommendations["genres"][movie_id]],
+            }
+        )
+        for user_id, movie_id in zip(user_ids, movie_ids)
+    ]
+
+
+class BatchSessionScorer:
+    """Creates recommendations for many user sessions and writes them as JSON Lines.
+
+    Sessions are split into chunks which are scored by a pool of worker processes. Workers are forked after the data is loaded and all indexes are built, so they share the matrices of the DataManager and the indexes of the recommender instead of receiving copies or building their own. Results are written in the order of the sessions, independent of the number of workers.
+
+    Attributes:
+        data_manager (DataManager): manages data associated with users, movies and user sessions
+        n_popular_movies (int): number of popular movies per session
+        n_similar_movies (int): number of similar movies per session and basis of similarity
+        correlation_threshold (float): correlations with a smaller value are not considered for recommendations
+        n_workers (int): number of worker processes, 1 scores sessions in the current process
+        chunk_size (int): number of sessions scored at once by a worker
+        purchase_counter (Optional[DecayedPurchaseCounter]): time-decayed purchase counters of popular movies, None if all purchases count equally
+        co_purchase_counts (Optional[CoPurchaseCounts]): precomputed co-purchases of similar movies based on purchases, None calculates them from the purchase matrix
+        n_neighbors (Optional[int]): number of neighbors of every movie precomputed before scoring, see SimilarMovieRecommender.build_neighbor_indexes, None calculates the neighbors of the movies of every chunk
+    """
+
+    def __init__(
+        self,
+        data_manager: DataManager,
+        n_popular_movies=3,
+        n_similar_movies=3,
+        correlation_threshold=0.4,
+        n_workers=1,
+        chunk_size=1024,
+        purchase_counter: Optional[DecayedPurchaseCounter] = None,
+        co_purchase_counts: Optional[CoPurchaseCounts] = None,
+        n_neighbors: Optional[int] = None,
+    ) -> None:
+        self.data_manager = data_manager
+        self.n_popular_movies = n_popular_movies
+        self.n_similar_movies = n_similar_movies
+        self.correlation_threshold = correlation_threshold
+        self.n_workers = n_workers
+        self.chunk_size = chunk_size
+        self.purchase_counter = purchase_counter
+        self.co_purchase_counts = co_purchase_counts
+        self.n_neighbors = n_neighbors
+
+    def __get_chunks(
+        self, sessions: Iterable[pd.DataFrame]
+    ) -> Iterator[Tuple[List[int], List[int]]]:
+        """Splits sessions into chunks of at most chunk_size sessions.
+
+        Args:
+            sessions (Iterable[pd.DataFrame]): session data with columns "user_id", "movie_id"
+
+        Returns:
+            Iterator[Tuple[List[int], List[int]]]: user ids and movie ids of every chunk
+        """
+        for session_data in sessions:
+            for start in range(0, len(session_data), self.chunk_size):
+                chunk = session_data.iloc[start : start + self.chunk_size]
+                yield chunk["user_id"].tolist(), chunk["movie_id"].tolist()
+
+    def score_sessions(self, sessions: Iterable[pd.DataFrame], output_path: str) -> int:
+        """Writes one JSON object per session with keys "user_id", "movie_id", "popular", "purchases" and "genres".
+
+        Args:
+            sessions (Iterable[pd.DataFrame]): session data with columns "user_id", "movie_id", e.g. chunks of a streamed session file
+            output_path (str): path of JSON Lines file
+
+        Returns:
+            int: number of scored sessions
+        """
+        global _worker_recommender
+        # popular movies do not depend on session
+        popular_movies = [
+            int(movie.identifier)
+            for movie in PopularMovieRecommender(
+                self.data_manager, self.purchase_counter
+            ).get_popular_movies(self.n_popular_movies)
+        ]
+        _worker_recommender = SimilarMovieRecommender(
+            self.data_manager,
+            self.correlation_threshold,
+            co_purchase_counts=self.co_purchase_counts,
+        )
+        # merge added purchases and build all indexes before forking, so that workers do not merge or build their own copies
+        self.data_manager.purchases_of_movies.matrix
+        self.data_manager.genres_of_movies.matrix
+        _worker_recommender.build_indexes()
+        if self.n_neighbors is not None:
+            _worker_recommender.build_neighbor_indexes(self.n_neighbors)
+        pool = None
+        if self.n_workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+            pool = multiprocessing.get_context("fork").Pool(self.n_workers)
+        chunks = (
+            (user_ids, movie_ids, popular_movies, self.n_similar_movies)
+            for user_ids, movie_ids in self.__get_chunks(sessions)
+        )
+        n_sessions = 0
+        try:
+            with open(output_path, "w") as output_file:
+                # submit a bounded number of chunks at once, so that streamed sessions are not read completely
+                window_size = 4 * self.n_workers
+                while True:
+                    window = list(islice(chunks, window_size))
+                    if not window:
+                        break
+                    # imap keeps order of chunks, so output is deterministic
+                    results = (
+                        pool.imap(_score_chunk, window)
+                        if pool is not None
+                        else map(_score_chunk, window)
+                    )
+                    for records in results:
+                        output_file.writelines(record + "\n" for record in records)
+                        n_sessions += len(records)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        return n_sessions
@@ -0,0 +1,362 @@
+# imports
+import json
+import multiprocessing
+import os
+import tempfile
+from os.path import exists, join
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# import movie recommendations modules
+from movie_recommendations.DataLoader import DataLoader
+from movie_recommendations.Instrumentation import Instrumentation
+from movie_recommendations.MovieMatrix import MovieMatrix
+from movie_recommendations.Snapshot import Snapshot
+from movie_recommendations.UserTable import UserTable
+
+
+def _count_shard(task: Tuple[str, int, int, str, Dict]) -> str:
+    """Counts co-purchases of one shard of users in a worker process and stores them.
+
+    Args:
+        task (Tuple[str, int, int, str, Dict]): path of Users.txt, index of shard, number of shards, directory of shard files and description of Users.txt
+
+    Returns:
+        str: path of shard file
+    """
+    user_path, shard, n_shards, shard_directory, source = task
+    return CoPurchaseCounts.count_shard(
+        user_path, shard, n_shards, shard_directory, source
+    )
+
+
+class CoPurchaseCounts:
+    """Stores how many users purchased every pair of movies, from which Pearson correlations of purchases are calculated.
+
+    Counts of disjoint sets of users add up, so that they can be counted per shard of users by independent processes or machines and merged afterwards. Like MovieMatrix, counts provide movie_ids, movie_index, get_correlations and get_correlations_of_columns, so that SimilarMovieRecommender calculates correlations from them instead of the purchase matrix.
+
+    Attributes:
+        movie_ids (np.ndarray): identifiers of purchased movies sorted in ascending order
+        movie_index (Dict[int, int]): maps movie identifier to position in movie_ids
+        co_counts (sparse.csr_matrix): number of users who purchased both movies of shape (number of movies, number of movies) with dtype int32, the diagonal contains the number of users who purchased each movie
+        n_rows (int): number of users with at least one purchase
+    """
+
+    def __init__(
+        self, movie_ids: np.ndarray, co_counts: sparse.csr_matrix, n_rows: int
+    ) -> None:
+        self.movie_ids = movie_ids
+        self.movie_index: Dict[int, int] = {
+            movie_id: position
+            for position, movie_id in enumerate(self.movie_ids.tolist())
+        }
+        self.co_counts = co_counts
+        self.n_rows = n_rows
+
+    @classmethod
+    def from_movie_matrix(cls, movie_matrix: MovieMatrix) -> "CoPurchaseCounts":
+        """Counts co-purchases of all users of a purchase matrix in one process.
+
+        Args:
+            movie_matrix (MovieMatrix): purchases, rows are users and columns are movies
+
+        Returns:
+            CoPurchaseCounts: co-purchases of all rows
+        """
+        matrix = movie_matrix.matrix
+        # cast to avoid uint8 overflow
+        co_counts = (matrix.T.astype(np.int32) @ matrix).tocsr()
+        co_counts.sort_indices()
+        return cls(movie_matrix.movie_ids, co_counts, movie_matrix.n_rows)
+
+    @classmethod
+    def from_user_data(cls, user_data: pd.DataFrame) -> "CoPurchaseCounts":
+        """Counts co-purchases of the users of user data, e.g. of one shard.
+
+        Args:
+            user_data (pd.DataFrame): user data with columns "user_id", "purchased"
+
+        Returns:
+            CoPurchaseCounts: co-purchases of the users of user_data
+        """
+        if len(user_data) == 0:
+            return cls(np.zeros(0, dtype=np.int64), sparse.csr_matrix((0, 0)), 0)
+        offsets, movie_ids = UserTable.parse_movie_lists(
+            user_data["purchased"].tolist()
+        )
+        return cls.from_movie_matrix(
+            MovieMatrix.from_pairs(
+                np.repeat(user_data["user_id"].to_numpy(), np.diff(offsets)),
+                movie_ids.astype(np.int64),
+            )
+        )
+
+    @staticmethod
+    @Instrumentation.instrument("co_purchases.count_shard")
+    def count_shard(
+        user_path: str,
+        shard: int,
+        n_shards: int,
+        shard_directory: str,
+        source: Optional[Dict] = None,
+    ) -> str:
+        """Counts co-purchases of one shard of Users.txt and stores them in shard_directory (map step).
+
+        Every shard only reads its own lines, so that shards can be counted by independent processes or machines. Users must not be split across lines. The shard file stores the description of Users.txt, so that build_sharded only reuses shards of the current content.
+
+        Args:
+            user_path (str): path of Users.txt
+            shard (int): index of shard, from 0 to n_shards - 1
+            n_shards (int): number of shards
+            shard_directory (str): directory of shard files
+            source (Optional[Dict], optional): description of Users.txt by Snapshot.describe_source. Defaults to None, which describes the file before reading it.
+
+        Returns:
+            str: path of shard file
+        """
+        # describe before reading, so that changes while counting are detected by the next build
+        source = source or Snapshot.describe_source(user_path)
+        os.makedirs(shard_directory, exist_ok=True)
+        path = CoPurchaseCounts.get_shard_path(shard_directory, shard, n_shards)
+        CoPurchaseCounts.from_user_data(
+            DataLoader.read_user_data_shard(user_path, shard, n_shards)
+        ).save(path, source)
+        return path
+
+    @staticmethod
+    def is_shard_valid(path: str, user_path: str) -> bool:
+        """Checks whether a shard file exists and was counted from the current content of Users.txt.
+
+        Args:
+            path (str): path of shard file
+            user_path (str): path of Users.txt
+
+        Returns:
+            bool: True if shard can be reused, False if it is missing, stores no description of Users.txt or was counted from other content
+        """
+        if not exists(path):
+            return False
+        with np.load(path) as arrays:
+            if "source" not in arrays:
+                return False
+            source = json.loads(str(arrays["source"]))
+        return Snapshot.is_source_unchanged(source, user_path)
+
+    @staticmethod
+    def get_shard_path(shard_directory: str, shard: int, n_shards: int) -> str:
+        """Returns path of the file of a shard.
+
+        Args:
+            shard_directory (str): directory of shard files
+            shard (int): index of shard
+            n_shards (int): number of shards
+
+        Returns:
+            str: path of shard file
+        """
+        return join(shard_directory, f"co_purchases_{shard:05d}_of_{n_shards:05d}.npz")
+
+    @classmethod
+    @Instrumentation.instrument("co_purchases.merge")
+    def merge(cls, paths: Sequence[str]) -> "CoPurchaseCounts":
+        """Adds up co-purchases of disjoint shards stored by save (reduce step).
+
+        Movie identifiers of all shards are read first, then one shard at a time is loaded and added, so that at most one shard besides the result is in memory.
+
+        Args:
+            paths (Sequence[str]): paths of shard files
+
+        Returns:
+            CoPurchaseCounts: co-purchases of all users of all shards
+        """
+        movie_ids_of_shards = []
+        for path in paths:
+            with np.load(path) as arrays:
+                movie_ids_of_shards.append(arrays["movie_ids"])
+        movie_ids = np.unique(
+            np.concatenate([np.zeros(0, dtype=np.int64), *movie_ids_of_shards])
+        )
+        co_counts = sparse.csr_matrix((len(movie_ids), len(movie_ids)), dtype=np.int32)
+        n_rows = 0
+        for path in paths:
+            shard_counts = cls.load(path)
+            # move counts of shard to positions of merged movies
+            positions = np.searchsorted(movie_ids, shard_counts.movie_ids)
+            shard_co_counts = shard_counts.co_counts.tocoo()
+            co_counts = co_counts + sparse.csr_matrix(
+                (
+                    shard_co_counts.data,
+                    (positions[shard_co_counts.row], positions[shard_co_counts.col]),
+                ),
+                shape=co_counts.shape,
+            )
+            n_rows += shard_counts.n_rows
+        co_counts.sort_indices()
+        return cls(movie_ids, co_counts, n_rows)
+
+    @classmethod
+    @Instrumentation.instrument("co_purchases.build_sharded")
+    def build_sharded(
+        cls,
+        user_path: str,
+        n_shards: int,
+        n_workers=1,
+        shard_directory: Optional[str] = None,
+    ) -> "CoPurchaseCounts":
+        """Counts co-purchases of Users.txt in n_shards shards by a pool of n_workers worker processes and merges them.
+
+        Shard files in shard_directory that were counted from the current content of Users.txt are reused, so that shards counted before, e.g. by other machines with count_shard, are only merged. Shard files counted from other content are counted again.
+
+        Args:
+            user_path (str): path of Users.txt
+            n_shards (int): number of shards
+            n_workers (int, optional): number of worker processes, 1 counts shards in the current process. Defaults to 1.
+            shard_directory (Optional[str], optional): directory of shard files. Defaults to None, which uses a temporary directory.
+
+        Returns:
+            CoPurchaseCounts: co-purchases of all users of Users.txt
+        """
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            shard_directory = shard_directory or temporary_directory
+            shard_paths = [
+                CoPurchaseCounts.get_shard_path(shard_directory, shard, n_shards)
+                for shard in range(n_shards)
+            ]
+            shards = [
+                shard
+                for shard, path in enumerate(shard_paths)
+                if not CoPurchaseCounts.is_shard_valid(path, user_path)
+            ]
+            # Users.txt is hashed once instead of by every worker
+            source = Snapshot.describe_source(user_path) if shards else None
+            tasks = [
+                (user_path, shard, n_shards, shard_directory, source)
+                for shard in shards
+            ]
+            if n_workers > 1 and len(tasks) > 1:
+                with multiprocessing.Pool(min(n_workers, len(tasks))) as pool:
+                    pool.map(_count_shard, tasks, chunksize=1)
+            else:
+                for task in tasks:
+                    _count_shard(task)
+            return cls.merge(shard_paths)
+
+    @classmethod
+    def load(cls, path: str) -> "CoPurchaseCounts":
+        """Loads counts stored by save.
+
+        Args:
+            path (str): path of .npz file
+
+        Returns:
+            CoPurchaseCounts: loaded counts
+        """
+        with np.load(path) as arrays:
+            n_movies = len(arrays["movie_ids"])
+            return cls(
+                movie_ids=arrays["movie_ids"],
+                co_counts=sparse.csr_matrix(
+                    (arrays["data"], arrays["indices"], arrays["indptr"]),
+                    shape=(n_movies, n_movies),
+                ),
+                n_rows=int(arrays["n_rows"]),
+            )
+
+    def save(self, path: str, source: Optional[Dict] = None) -> None:
+        """Stores counts as .npz file.
+
+        Args:
+            path (str): path of .npz file
+            source (Optional[Dict], optional): description of the data file counts were counted from, see Snapshot.describe_source. Defaults to None, which stores no description.
+        """
+        arrays = {
+            "movie_ids": self.movie_ids,
+            "data": self.co_counts.data,
+            "indices": self.co_counts.indices,
+            "indptr": self.co_counts.indptr,
+            "n_rows": self.n_rows,
+        }
+        if source is not None:
+            arrays["source"] = np.array(json.dumps(source))
+        # write to a temporary file first, so that an interrupted worker leaves no incomplete shard
+        temporary_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(temporary_path, **arrays)
+        os.replace(temporary_path, path)
+
+    def get_movie_counts(self) -> np.ndarray:
+        """Counts the users who purchased every movie.
+
+        Returns:
+            np.ndarray: number of users per movie, ordered like movie_ids
+        """
+        return self.co_counts.diagonal().astype(np.int64)
+
+    def get_correlations(self, movie_id: int) -> np.ndarray:
+        """Calculates the Pearson correlation of a movie with every movie.
+
+        Args:
+            movie_id (int): identifier of movie
+
+        Raises:
+            KeyError: if movie_id was not purchased
+
+        Returns:
+            np.ndarray: correlations ordered like movie_ids, nan where correlation is not defined
+        """
+        return self.get_correlations_of_columns(np.array([self.movie_index[movie_id]]))[
+            0
+        ]
+
+    def get_correlations_of_candidates(
+        self, movie_id: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Calculates the Pearson correlation of a movie with every movie purchased together with it, like InvertedIndex.get_correlations_of_candidates.
+
+        Args:
+            movie_id (int): identifier of movie
+
+        Raises:
+            KeyError: if movie_id was not purchased
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: identifiers of candidates in ascending order, including movie_id itself, and their correlations, nan where correlation is not defined
+        """
+        column = self.movie_index[movie_id]
+        # stored counts only contain movies purchased together
+        row = self.co_counts[column]
+        counts = self.get_movie_counts()
+        correlations = MovieMatrix.get_correlations_of_counts(
+            self.n_rows,
+            row.data[None, :].astype(np.float64),
+            counts[[column]],
+            counts[row.indices],
+        )[0]
+        return self.movie_ids[row.indices], correlations
+
+    @Instrumentation.instrument("co_purchases.correlations")
+    def get_correlations_of_columns(
+        self, columns: np.ndarray, other_columns: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Calculates the Pearson correlation of several movies with every movie at once, like MovieMatrix.get_correlations_of_columns but by reading stored counts instead of multiplying the purchase matrix.
+
+        Args:
+            columns (np.ndarray): positions of movies in movie_ids
+            other_columns (Optional[np.ndarray], optional): positions of movies the correlations are calculated with. Defaults to None, which uses all movies.
+
+        Returns:
+            np.ndarray: correlations of shape (len(columns), number of other movies), nan where correlation is not defined
+        """
+        counts = self.get_movie_counts()
+        co_counts = self.co_counts[columns]
+        other_counts = counts
+        if other_columns is not None:
+            co_counts = co_counts[:, other_columns]
+            other_counts = counts[other_columns]
+        return MovieMatrix.get_correlations_of_counts(
+            self.n_rows,
+            co_counts.toarray().astype(np.float64),
+            counts[columns],
+            other_counts,
+        )
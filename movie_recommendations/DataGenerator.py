@@ -0,0 +1,163 @@
+# imports
+import os
+from os.path import join
+from typing import List
+import numpy as np
+
+GENRES = [
+    "Action",
+    "Adventure",
+    "Animation",
+    "Children",
+    "Comedy",
+    "Crime",
+    "Drama",
+    "Fantasy",
+    "Film-Noir",
+    "Horror",
+    "IMAX",
+    "Musical",
+    "Mystery",
+    "Romance",
+    "Sci-Fi",
+    "Thriller",
+    "War",
+    "Western",
+]
+
+
+class DataGenerator:
+    """Generates synthetic Users.txt, Products.txt and CurrentUserSession.txt files of configurable size.
+
+    Movie popularity follows a Zipf-like distribution, so that few movies are bought by many users, like in real catalogs. Every user purchased at least one movie and viewed all purchased movies.
+
+    Attributes:
+        n_users (int): number of users
+        n_movies (int): number of movies
+        n_sessions (int): number of current user sessions
+        mean_purchases (float): average number of movies purchased per user
+        mean_views (float): average number of movies viewed but not purchased per user
+        popularity_exponent (float): exponent of Zipf-like popularity, 0 makes all movies equally popular
+        seed (int): seed of random number generator
+        chunk_size (int): number of users generated and written at once
+    """
+
+    def __init__(
+        self,
+        n_users: int,
+        n_movies: int,
+        n_sessions: int,
+        mean_purchases=5.0,
+        mean_views=10.0,
+        popularity_exponent=1.0,
+        seed=0,
+        chunk_size=100000,
+    ) -> None:
+        self.n_users = n_users
+        self.n_movies = n_movies
+        self.n_sessions = n_sessions
+        self.mean_purchases = mean_purchases
+        self.mean_views = mean_views
+        self.popularity_exponent = popularity_exponent
+        self.seed = seed
+        self.chunk_size = chunk_size
+
+    def __get_popularity(self) -> np.ndarray:
+        """Calculates probability of every movie to be viewed or purchased.
+
+        Returns:
+            np.ndarray: probabilities ordered by movie id
+        """
+        popularity = 1 / np.arange(1, self.n_movies + 1) ** self.popularity_exponent
+        return popularity / popularity.sum()
+
+    def generate(self, directory: str) -> None:
+        """Writes Users.txt, Products.txt and CurrentUserSession.txt into directory.
+
+        Args:
+            directory (str): output directory, created if it does not exist
+        """
+        os.makedirs(directory, exist_ok=True)
+        random = np.random.default_rng(self.seed)
+        self.__write_movies(join(directory, "Products.txt"), random)
+        self.__write_users(join(directory, "Users.txt"), random)
+        self.__write_sessions(join(directory, "CurrentUserSession.txt"), random)
+
+    def __write_movies(self, path: str, random: np.random.Generator) -> None:
+        """Writes movies with random year, genres, rating and price.
+
+        Args:
+            path (str): path of Products.txt
+            random (np.random.Generator): random number generator
+        """
+        with open(path, "w") as file:
+            for start in range(0, self.n_movies, self.chunk_size):
+                size = min(self.chunk_size, self.n_movies - start)
+                years = random.integers(1930, 2023, size)
+                ratings = np.round(random.uniform(1, 5, size), 1)
+                prices = random.choice([10, 12, 15, 20, 25], size)
+                n_genres = random.integers(1, 6, size)
+                lines: List[str] = []
+                for offset in range(size):
+                    genres = random.choice(GENRES, n_genres[offset], replace=False)
+                    # always write five keyword columns, missing genres stay empty
+                    keywords = ", ".join(list(genres) + [""] * (5 - len(genres)))
+                    lines.append(
+                        f"{start + offset + 1}, Movie {start + offset + 1},{years[offset]}, "
+                        f"{keywords},{ratings[offset]},{prices[offset]}\n"
+                    )
+                file.writelines(lines)
+
+    def __write_users(self, path: str, random: np.random.Generator) -> None:
+        """Writes users with random viewed and purchased movies.
+
+        Args:
+            path (str): path of Users.txt
+            random (np.random.Generator): random number generator
+        """
+        popularity = self.__get_popularity()
+        with open(path, "w") as file:
+            for start in range(0, self.n_users, self.chunk_size):
+                size = min(self.chunk_size, self.n_users - start)
+                n_purchases = np.maximum(1, random.poisson(self.mean_purchases, size))
+                n_views = random.poisson(self.mean_views, size)
+                movie_ids = (
+                    random.choice(
+                        self.n_movies, n_purchases.sum() + n_views.sum(), p=popularity
+                    )
+                    + 1
+                )
+                lines: List[str] = []
+                position = 0
+                for offset in range(size):
+                    purchased = np.unique(
+                        movie_ids[position : position + n_purchases[offset]]
+                    )
+                    position += n_purchases[offset]
+                    viewed = np.union1d(
+                        purchased, movie_ids[position : position + n_views[offset]]
+                    )
+                    position += n_views[offset]
+                    lines.append(
+                        f"{start + offset + 1}, User{start + offset + 1}, "
+                        f"{';'.join(map(str, viewed))}, {';'.join(map(str, purchased))}\n"
+                    )
+                file.writelines(lines)
+
+    def __write_sessions(self, path: str, random: np.random.Generator) -> None:
+        """Writes sessions of random users looking at random movies.
+
+        Args:
+            path (str): path of CurrentUserSession.txt
+            random (np.random.Generator): random number generator
+        """
+        popularity = self.__get_popularity()
+        with open(path, "w") as file:
+            for start in range(0, self.n_sessions, self.chunk_size):
+                size = min(self.chunk_size, self.n_sessions - start)
+                user_ids = random.integers(1, self.n_users + 1, size)
+                movie_ids = random.choice(self.n_movies, size, p=popularity) + 1
+                file.writelines(
+                    f"{user_id}, {movie_id}\n"
+                    for user_id, movie_id in zip(user_ids, movie_ids)
+                )
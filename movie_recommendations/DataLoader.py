@@ -0,0 +1,221 @@
+# imports
+import io
+from os.path import abspath, getsize, join
+from typing import Dict, Iterator, Optional
+import pandas as pd
+
+# import movie recommendations modules
+from movie_recommendations.DataManager import DataManager
+from movie_recommendations.Instrumentation import Instrumentation
+from movie_recommendations.Snapshot import Snapshot
+
+
+class DataLoader:
+    """Helper class to read data files and create a DataManager from them."""
+
+    @staticmethod
+    @Instrumentation.instrument("load.read_user_data")
+    def read_user_data(path: str) -> pd.DataFrame:
+        """Reads user data, skips spaces after delimiter.
+
+        Args:
+            path (str): path of Users.txt
+
+        Returns:
+            pd.DataFrame: user data with columns "user_id", "user_name", "viewed", "purchased"
+        """
+        return pd.read_csv(
+            abspath(path),
+            sep=",",
+            header=None,
+            names=["user_id", "user_name", "viewed", "purchased"],
+            skipinitialspace=True,
+        )
+
+    @staticmethod
+    @Instrumentation.instrument("load.read_user_data_shard")
+    def read_user_data_shard(path: str, shard: int, n_shards: int) -> pd.DataFrame:
+        """Reads one of n_shards disjoint parts of user data, so that shards can be processed by independent processes or machines.
+
+        The file is split into n_shards byte ranges of equal size, a shard contains every line starting in its range. Only the lines of the shard are read.
+
+        Args:
+            path (str): path of Users.txt
+            shard (int): index of shard, from 0 to n_shards - 1
+            n_shards (int): number of shards
+
+        Raises:
+            ValueError: if shard is not between 0 and n_shards - 1
+
+        Returns:
+            pd.DataFrame: user data of shard with columns "user_id", "user_name", "viewed", "purchased"
+        """
+        if not 0 <= shard < n_shards:
+            raise ValueError(
+                f"Input value for shard should be in interval [0, {n_shards - 1}]."
+            )
+        size = getsize(abspath(path))
+        with open(abspath(path), "rb") as user_file:
+
+            def get_line_start(position: int) -> int:
+                # first line starting at or after position
+                if position <= 0 or position >= size:
+                    return min(max(position, 0), size)
+                user_file.seek(position - 1)
+                user_file.readline()
+                return user_file.tell()
+
+            start = get_line_start(size * shard // n_shards)
+            end = get_line_start(size * (shard + 1) // n_shards)
+            user_file.seek(start)
+            data = user_file.read(end - start)
+        return pd.read_csv(
+            io.BytesIO(data),
+            sep=",",
+            header=None,
+            names=["user_id", "user_name", "viewed", "purchased"],
+            skipinitialspace=True,
+        )
+
+    @staticmethod
+    @Instrumentation.instrument("load.read_movie_data")
+    def read_movie_data(path: str) -> pd.DataFrame:
+        """Reads product data, skips spaces after delimiter.
+
+        Args:
+            path (str): path of Products.txt
+
+        Returns:
+            pd.DataFrame: movie data with columns "movie_id", "movie_name", "year", "keyword1", "keyword2", "keyword3", "keyword4", "keyword5", "rating", "price"
+        """
+        return pd.read_csv(
+            abspath(path),
+            sep=",",
+            header=None,
+            names=[
+                "movie_id",
+                "movie_name",
+                "year",
+                "keyword1",
+                "keyword2",
+                "keyword3",
+                "keyword4",
+                "keyword5",
+                "rating",
+                "price",
+            ],
+            skipinitialspace=True,
+        )
+
+    @staticmethod
+    @Instrumentation.instrument("load.read_session_data")
+    def read_session_data(path: str) -> pd.DataFrame:
+        """Reads session data, skips spaces after delimiter.
+
+        Args:
+            path (str): path of CurrentUserSession.txt
+
+        Returns:
+            pd.DataFrame: session data with columns "user_id", "movie_id"
+        """
+        return pd.read_csv(
+            abspath(path),
+            sep=",",
+            header=None,
+            names=["user_id", "movie_id"],
+            skipinitialspace=True,
+        )
+
+    @staticmethod
+    @Instrumentation.instrument("load.read_purchase_events")
+    def read_purchase_events(path: str) -> pd.DataFrame:
+        """Reads timestamped purchases, skips spaces after delimiter.
+
+        Every line contains user id, movie id and time of purchase in seconds since the epoch, e.g. "5, 8, 1700000000".
+
+        Args:
+            path (str): path of purchase events
+
+        Returns:
+            pd.DataFrame: purchase events with columns "user_id", "movie_id", "timestamp"
+        """
+        return pd.read_csv(
+            abspath(path),
+            sep=",",
+            header=None,
+            names=["user_id", "movie_id", "timestamp"],
+            skipinitialspace=True,
+        )
+
+    @staticmethod
+    def iter_session_data(path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """Reads session data in chunks, so that large session files are streamed.
+
+        Args:
+            path (str): path of CurrentUserSession.txt
+            chunk_size (int): number of sessions per chunk
+
+        Returns:
+            Iterator[pd.DataFrame]: chunks of session data with columns "user_id", "movie_id"
+        """
+        return pd.read_csv(
+            abspath(path),
+            sep=",",
+            header=None,
+            names=["user_id", "movie_id"],
+            skipinitialspace=True,
+            chunksize=chunk_size,
+        )
+
+    @staticmethod
+    def get_source_paths(data_directory: str) -> Dict[str, str]:
+        """Collects paths of the data files in data_directory.
+
+        Args:
+            data_directory (str): directory containing Users.txt, Products.txt and CurrentUserSession.txt
+
+        Returns:
+            Dict[str, str]: maps table name to path of data file
+        """
+        return {
+            "user_data": abspath(join(data_directory, "Users.txt")),
+            "movie_data": abspath(join(data_directory, "Products.txt")),
+            "session_data": abspath(join(data_directory, "CurrentUserSession.txt")),
+        }
+
+    @staticmethod
+    @Instrumentation.instrument("load.data_manager")
+    def load_data_manager(
+        data_directory: str,
+        snapshot_directory: Optional[str] = None,
+        rebuild_snapshot=False,
+        save_snapshot=True,
+    ) -> DataManager:
+        """Creates DataManager from the data files in data_directory.
+
+        If snapshot_directory is given, a snapshot created from unchanged data files is loaded instead of parsing the files. Otherwise the files are parsed and a new snapshot is stored.
+
+        Args:
+            data_directory (str): directory containing Users.txt, Products.txt and CurrentUserSession.txt
+            snapshot_directory (Optional[str], optional): directory of snapshot. Defaults to None, which disables snapshots.
+            rebuild_snapshot (bool, optional): if True, an existing snapshot is ignored and replaced. Defaults to False.
+            save_snapshot (bool, optional): if False, an existing snapshot is loaded but no new one is stored, because storing a snapshot builds all matrices, e.g. genres on paths that never use them. Defaults to True.
+
+        Returns:
+            DataManager: manages the loaded data
+        """
+        source_paths = DataLoader.get_source_paths(data_directory)
+        if (
+            snapshot_directory is not None
+            and not rebuild_snapshot
+            and Snapshot.is_valid(snapshot_directory, source_paths)
+        ):
+            return Snapshot.load(snapshot_directory)
+        data_manager = DataManager(
+            DataLoader.read_user_data(source_paths["user_data"]),
+            DataLoader.read_movie_data(source_paths["movie_data"]),
+            DataLoader.read_session_data(source_paths["session_data"]),
+        )
+        if snapshot_directory is not None and save_snapshot:
+            Snapshot.save(data_manager, snapshot_directory, source_paths)
+        return data_manager
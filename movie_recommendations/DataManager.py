@@ -1,130 +1,294 @@
 # imports
+from typing import Callable, Optional, Tuple, Union
+import numpy as np
 import pandas as pd
 
 # import movie recommendations modules
-from movie_recommendations.Movie import Movie
-from movie_recommendations.User import User
+from movie_recommendations.Instrumentation import Instrumentation
+from movie_recommendations.LRUCache import LRUCache
+from movie_recommendations.MovieBase import MovieBase
+from movie_recommendations.MovieMatrix import MovieMatrix
+from movie_recommendations.MovieTable import MovieTable
+from movie_recommendations.UserBase import UserBase
+from movie_recommendations.UserTable import UserTable
 
 
 class DataManager:
     """Manages data associated with users, movies and user sessions.
 
     Attribues:
-        user_data (pd.DataFrame): user data with columns "user_id", "user_name", "viewed", "purchased"
-        movie_data (pd.DataFrame): movie data with columns "movie_id", "movie_name", "year", "keyword1", "keyword2", "keyword3", "keyword4", "keyword5", "rating", "price"
-        session_data (pd.DataFrame): session data with columns "user_id", "movie_id"
-        purchases_of_movies (pd.DataFrame): overview of which films were bought by which users
-        genres_of_movies (pd.DataFrame): overview of which films belong to which genres
+        user_data (pd.DataFrame): user data with columns "user_id", "user_name", "viewed", "purchased", created on first access
+        movie_data (pd.DataFrame): movie data with columns "movie_id", "movie_name", "year", "keyword1", "keyword2", "keyword3", "keyword4", "keyword5", "rating", "price", created on first access
+        session_data (pd.DataFrame): session data with columns "user_id", "movie_id", created on first access
+        movie_table (MovieTable): characteristics of all movies in typed arrays, created on first access
+        user_table (UserTable): characteristics of all users in typed arrays, created on first access
+        purchases_of_movies (MovieMatrix): sparse overview of which films were bought by which users, created on first access
+        genres_of_movies (MovieMatrix): sparse overview of which films belong to which genres, created on first access
+        movie_cache (Optional[LRUCache]): recently created Movie instances, None if caching is disabled
+        user_cache (Optional[LRUCache]): recently created User instances, None if caching is disabled
+        data_version (int): incremented whenever data changes, so that results derived from data can be invalidated
     """
 
     def __init__(
         self,
-        user_data: pd.DataFrame,
-        movie_data: pd.DataFrame,
-        session_data: pd.DataFrame,
+        user_data: Union[pd.DataFrame, Callable[[], pd.DataFrame]],
+        movie_data: Union[pd.DataFrame, Callable[[], pd.DataFrame]],
+        session_data: Union[pd.DataFrame, Callable[[], pd.DataFrame]],
+        cache_size: Optional[int] = None,
+        purchases_of_movies: Optional[
+            Union[MovieMatrix, Callable[[], MovieMatrix]]
+        ] = None,
+        genres_of_movies: Optional[
+            Union[MovieMatrix, Callable[[], MovieMatrix]]
+        ] = None,
+        movie_table: Optional[Union[MovieTable, Callable[[], MovieTable]]] = None,
+        user_table: Optional[Union[UserTable, Callable[[], UserTable]]] = None,
     ):
-        self.user_data = user_data
-        self.movie_data = movie_data
-        self.session_data = session_data
-        self.purchases_of_movies = self.__get_purchases_of_movies()
-        self.genres_of_movies = self.__get_genres_of_movies()
+        # tables are passed as data frame or as function loading them, e.g. from a snapshot,
+        # so that data frames are only decoded if they are accessed
+        self.__user_data = user_data
+        self.__movie_data = movie_data
+        self.__session_data = session_data
+        self.data_version = 0
+        # data version of last added purchase
+        self.__purchases_version = 0
+        # matrices and lookups are created on first access, so that e.g. popularity never builds the genre matrix,
+        # matrices built before, e.g. stored in a snapshot, are passed as instance or as function loading them
+        self.__purchases_of_movies = purchases_of_movies
+        self.__genres_of_movies = genres_of_movies
+        self.__movie_table = movie_table
+        self.__user_table = user_table
+        self.movie_cache = LRUCache(cache_size) if cache_size else None
+        self.user_cache = LRUCache(cache_size) if cache_size else None
 
-    def __get_purchases_of_movies(self) -> pd.DataFrame:
-        """Creates an overview of which films were bought by which users.
+    @property
+    def user_data(self) -> pd.DataFrame:
+        """User data with columns "user_id", "user_name", "viewed", "purchased", created on first access."""
+        if not isinstance(self.__user_data, pd.DataFrame):
+            self.__user_data = self.__user_data()
+        return self.__user_data
+
+    @property
+    def movie_data(self) -> pd.DataFrame:
+        """Movie data with columns "movie_id", "movie_name", "year", "keyword1", "keyword2", "keyword3", "keyword4", "keyword5", "rating", "price", created on first access."""
+        if not isinstance(self.__movie_data, pd.DataFrame):
+            self.__movie_data = self.__movie_data()
+        return self.__movie_data
+
+    @property
+    def session_data(self) -> pd.DataFrame:
+        """Session data with columns "user_id", "movie_id", created on first access."""
+        if not isinstance(self.__session_data, pd.DataFrame):
+            self.__session_data = self.__session_data()
+        return self.__session_data
+
+    @property
+    def movie_table(self) -> MovieTable:
+        """Characteristics of all movies in typed arrays, created on first access."""
+        if not isinstance(self.__movie_table, MovieTable):
+            self.__movie_table = (
+                self.__movie_table()
+                if self.__movie_table is not None
+                else self.__get_movie_table()
+            )
+        return self.__movie_table
+
+    @property
+    def user_table(self) -> UserTable:
+        """Characteristics of all users in typed arrays, created on first access."""
+        if not isinstance(self.__user_table, UserTable):
+            self.__user_table = (
+                self.__user_table()
+                if self.__user_table is not None
+                else self.__get_user_table()
+            )
+        return self.__user_table
+
+    @Instrumentation.instrument("build.movie_table")
+    def __get_movie_table(self) -> MovieTable:
+        """Creates table of movie characteristics, which hands out Movie instances without storing an object per movie.
 
         Returns:
-            pd.DataFrame: overview on purchases by users
+            MovieTable: characteristics of all movies
         """
-        ## proceed user_data
-        purchases = self.user_data.copy(deep=True)
-        # select relevant columns
-        purchases = purchases[["user_id", "purchased"]]
-        # rename purchases column
-        purchases.rename({"purchased": "movie_id"}, axis=1, inplace=True)
-        # split string of column movie_id into list
-        purchases["movie_id"] = purchases["movie_id"].str.split(";")
-        # explode list where every entry of movie_id is in separate row
-        purchases = purchases.explode("movie_id").reset_index(drop=True)
-        # convert movie_id to int
-        purchases["movie_id"] = purchases["movie_id"].astype(int)
-        ## proceed movie_data
-        movie_id = self.movie_data.copy(deep=True)
-        # select relevant column
-        movie_id = movie_id[["movie_id"]]
+        return MovieTable.from_movie_data(self.movie_data)
+
+    @Instrumentation.instrument("build.user_table")
+    def __get_user_table(self) -> UserTable:
+        """Creates table of user characteristics, which hands out User instances without storing an object per user.
+
+        Returns:
+            UserTable: characteristics of all users
+        """
+        return UserTable.from_user_data(self.user_data)
 
-        ## join movie information to purchase dataframe
-        purchases.join(movie_id.set_index("movie_id"), on="movie_id")
-        purchases["was_purchased"] = True
+    @property
+    def purchases_of_movies(self) -> MovieMatrix:
+        """Sparse overview of which films were bought by which users, created on first access."""
+        if not isinstance(self.__purchases_of_movies, MovieMatrix):
+            self.__purchases_of_movies = (
+                self.__purchases_of_movies()
+                if self.__purchases_of_movies is not None
+                else self.__get_purchases_of_movies()
+            )
+        return self.__purchases_of_movies
 
+    @property
+    def genres_of_movies(self) -> MovieMatrix:
+        """Sparse overview of which films belong to which genres, created on first access."""
+        if not isinstance(self.__genres_of_movies, MovieMatrix):
+            self.__genres_of_movies = (
+                self.__genres_of_movies()
+                if self.__genres_of_movies is not None
+                else self.__get_genres_of_movies()
+            )
+        return self.__genres_of_movies
+
+    @Instrumentation.instrument("build.purchases_of_movies")
+    def __get_purchases_of_movies(self) -> MovieMatrix:
+        """Creates an overview of which films were bought by which users.
+
+        Returns:
+            MovieMatrix: sparse overview on purchases by users, rows are users and columns are movies
+        """
         ## return purchases of movies
-        return purchases.pivot_table(
-            values="was_purchased", index="user_id", columns=["movie_id"]
-        ).fillna(0)
+        # purchased movies are parsed into arrays by the user table, no list of strings is created per user
+        return MovieMatrix.from_pairs(*self.user_table.get_purchases())
 
-    def __get_genres_of_movies(self) -> pd.DataFrame:
+    @Instrumentation.instrument("build.genres_of_movies")
+    def __get_genres_of_movies(self) -> MovieMatrix:
         """Creates an overview of which films belong to which genres.
 
         Returns:
-            pd.DataFrame: overview on genres of movies
+            MovieMatrix: sparse overview on genres of movies, rows are genres and columns are movies
         """
         ## proceed movie_data
-        genres = self.movie_data.copy(deep=True)
-        # select_relevant_columns
-        genres = genres[
-            ["movie_id", "keyword1", "keyword2", "keyword3", "keyword4", "keyword5"]
+        # select relevant columns without copying movie_data
+        movie_ids = self.movie_data["movie_id"].to_numpy()
+        genres = [
+            self.movie_data[column].to_numpy()
+            for column in ["keyword1", "keyword2", "keyword3", "keyword4", "keyword5"]
         ]
-        # put every genre of every movie into its own row
-        genres = genres.set_index(["movie_id"]).stack()
-        genres = genres.reset_index(-1, drop=True).reset_index(name="genre")
-        genres["has_genre"] = True
+        # pair every genre of every movie with the movie, missing genres are dropped
+        has_genre = [~pd.isna(movie_genres) for movie_genres in genres]
 
         ## return genres of movies
-        return genres.pivot_table(
-            values="has_genre", index="genre", columns=["movie_id"]
-        ).fillna(0)
+        return MovieMatrix.from_pairs(
+            np.concatenate(
+                [
+                    movie_genres[is_genre]
+                    for movie_genres, is_genre in zip(genres, has_genre)
+                ]
+            ),
+            np.concatenate([movie_ids[is_genre] for is_genre in has_genre]),
+        )
 
-    def get_movie_by_movie_id(self, movie_id: int) -> Movie:
+    @Instrumentation.instrument("materialize.movie")
+    def get_movie_by_movie_id(self, movie_id: int) -> MovieBase:
         """Generates Movie instance from movie id.
 
         Args:
             movie_id (int): id of Movie instance
 
+        Raises:
+            KeyError: if there is no movie with movie_id
+
         Returns:
-            Movie: created by id
+            MovieBase: view of row of movie_table
         """
-        table_row = self.movie_data[self.movie_data["movie_id"] == movie_id]
-        identifier = table_row["movie_id"].iloc[0]
-        movie_name = table_row["movie_name"].iloc[0]
-        year = table_row["year"].iloc[0]
-        genre_columns = ["keyword1", "keyword2", "keyword3", "keyword4", "keyword5"]
-        # collect genres from keyword column and filter out 'nan' values
-        genres = [
-            table_row[column].iloc[0]
-            for column in genre_columns
-            if not pd.isna(table_row[column].iloc[0])
-        ]
-        rating = table_row["rating"].iloc[0]
-        price = table_row["price"].iloc[0]
-        return Movie(identifier, movie_name, year, genres, rating, price)
+        if self.movie_cache is not None:
+            movie = self.movie_cache.get(movie_id)
+            if movie is not None:
+                return movie
+        movie = self.movie_table.get_movie(movie_id)
+        if self.movie_cache is not None:
+            self.movie_cache.put(movie_id, movie)
+        return movie
 
-    def get_user_by_user_id(self, user_id: int) -> User:
+    @Instrumentation.instrument("materialize.user")
+    def get_user_by_user_id(self, user_id: int) -> UserBase:
         """Generates User instance from user id.
 
         Args:
             user_id (int): id of User instance
 
+        Raises:
+            KeyError: if there is no user with user_id
+
+        Returns:
+            UserBase: view of row of user_table
+        """
+        if self.user_cache is not None:
+            user = self.user_cache.get(user_id)
+            if user is not None:
+                return user
+        user = self.user_table.get_user(user_id)
+        if self.user_cache is not None:
+            self.user_cache.put(user_id, user)
+        return user
+
+    def add_purchase(self, user_id: int, movie_id: int) -> None:
+        """Adds purchase of a movie by a user without rebuilding derived data.
+
+        Purchase matrix and purchase counts are updated in place in time independent of the number of purchases. Results derived from purchases are outdated afterwards, see has_purchases_changed.
+
+        Args:
+            user_id (int): id of user
+            movie_id (int): id of purchased movie
+
+        Raises:
+            KeyError: if there is no user with user_id or no movie with movie_id
+        """
+        # raise KeyError for unknown users and movies
+        row = self.user_table.get_row(user_id)
+        self.movie_table.get_row(movie_id)
+        purchased = self.user_table.get_purchased(row)
+        if movie_id in purchased:
+            return
+        self.purchases_of_movies.add_entry(user_id, movie_id)
+        self.data_version += 1
+        self.__purchases_version = self.data_version
+        self.user_table.add_purchased(row, movie_id)
+        if self.user_cache is not None:
+            self.user_cache.remove(user_id)
+
+    def add_view(self, user_id: int, movie_id: int) -> None:
+        """Adds view of a movie by a user without rebuilding derived data.
+
+        Args:
+            user_id (int): id of user
+            movie_id (int): id of viewed movie
+
+        Raises:
+            KeyError: if there is no user with user_id or no movie with movie_id
+        """
+        # raise KeyError for unknown users and movies
+        row = self.user_table.get_row(user_id)
+        self.movie_table.get_row(movie_id)
+        if movie_id in self.user_table.get_viewed(row):
+            return
+        self.user_table.add_viewed(row, movie_id)
+        self.data_version += 1
+        if self.user_cache is not None:
+            self.user_cache.remove(user_id)
+
+    def get_views(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Collects all views including views added by add_view.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: user id and movie id of every view
+        """
+        return self.user_table.get_views()
+
+    def has_purchases_changed(self, data_version: int) -> bool:
+        """Checks whether purchases were added after data_version.
+
+        An added purchase changes the co-purchase counts of the purchased movie with the movies the user purchased before, and through its purchase count its correlation with every other movie, so that the purchased movie may enter or leave the similar movies of any movie. Results of all movies derived from purchases are therefore outdated, while views do not affect them.
+
+        Args:
+            data_version (int): data version results were derived from
+
         Returns:
-            User: created by id
+            bool: True if results derived from purchases are outdated
         """
-        table_row = self.user_data[self.user_data["user_id"] == user_id]
-        identifier = table_row["user_id"].iloc[0]
-        user_name = table_row["user_name"].iloc[0]
-        # split entries in viewed into list
-        viewed = table_row["viewed"].iloc[0].split(";")
-        # convert entries in list into int
-        viewed = list(map(int, viewed))
-        # split entries in purchased into list
-        purchased = table_row["purchased"].iloc[0].split(";")
-        # convert entries in list into int
-        purchased = list(map(int, purchased))
-        return User(identifier, user_name, viewed, purchased)
+        return self.__purchases_version > data_version
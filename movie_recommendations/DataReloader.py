@@ -0,0 +1,181 @@
+# imports
+import gc
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# import movie recommendations modules
+from movie_recommendations.DataLoader import DataLoader
+from movie_recommendations.DataManager import DataManager
+from movie_recommendations.Instrumentation import Instrumentation
+
+
+class DataReloader:
+    """Replaces the data of a long-running process when its data files change, while requests keep being answered.
+
+    The state of a version is created from its DataManager by create_state, e.g. recommenders with their indexes. A new version is built completely in the calling or a background thread while the current version keeps answering, then state is replaced by one assignment. Callers read state once per request and use it throughout, so that requests started before a swap finish on the previous version, which is freed after its last request. Both versions are held in memory in the meantime.
+
+    Attributes:
+        data_directory (str): directory containing Users.txt, Products.txt and CurrentUserSession.txt
+        snapshot_directory (Optional[str]): directory of snapshot, None if snapshots are disabled
+        create_state (Callable[[DataManager], Any]): creates the objects answering requests from a DataManager
+        state (Any): objects of the current version created by create_state
+        version (int): number of the current version, 0 for the initial one
+        reloads (List[Dict[str, float]]): measurements of every reload, see reload
+    """
+
+    def __init__(
+        self,
+        data_directory: str,
+        create_state: Callable[[DataManager], Any],
+        snapshot_directory: Optional[str] = None,
+        data_manager: Optional[DataManager] = None,
+    ) -> None:
+        self.data_directory = data_directory
+        self.snapshot_directory = snapshot_directory
+        self.create_state = create_state
+        self.version = 0
+        self.reloads: List[Dict[str, float]] = []
+        self.__source_status = self.__get_source_status()
+        if data_manager is None:
+            data_manager = DataLoader.load_data_manager(
+                data_directory, snapshot_directory
+            )
+        self.state = create_state(data_manager)
+        # only one version is built at a time
+        self.__reload_lock = threading.Lock()
+        self.__stop_event = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+
+    def __get_source_status(self) -> Dict[str, Tuple[int, int]]:
+        """Collects size and modification time of every data file.
+
+        Returns:
+            Dict[str, Tuple[int, int]]: size and modification time in nanoseconds per table, missing files are left out
+        """
+        source_status = {}
+        for table, path in DataLoader.get_source_paths(self.data_directory).items():
+            if os.path.exists(path):
+                status = os.stat(path)
+                source_status[table] = (status.st_size, status.st_mtime_ns)
+        return source_status
+
+    def has_changed(self) -> bool:
+        """Checks whether a data file changed since the current version was loaded.
+
+        Returns:
+            bool: True if size or modification time of a data file changed
+        """
+        return self.__get_source_status() != self.__source_status
+
+    @staticmethod
+    def get_resident_memory() -> int:
+        """Measures resident memory of the current process.
+
+        Returns:
+            int: resident bytes, on systems without /proc the peak so far
+        """
+        try:
+            with open("/proc/self/statm") as statm:
+                return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            import resource
+
+            # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak * (1 if sys.platform == "darwin" else 1024)
+
+    @Instrumentation.instrument("reload.build")
+    def __build(self) -> Any:
+        """Loads the data files and creates the state of a new version, the current version stays in use.
+
+        Returns:
+            Any: state of new version
+        """
+        # a changed data file replaces the snapshot, whose files stay readable for the current version until it is freed
+        return self.create_state(
+            DataLoader.load_data_manager(self.data_directory, self.snapshot_directory)
+        )
+
+    def reload(self, force=False, sample_interval=0.01) -> bool:
+        """Builds a new version if a data file changed and swaps it in.
+
+        Resident memory is sampled every sample_interval seconds while both versions are held. The measurements are appended to reloads: "seconds" until the swap, "rss_before_mb" before the build, "peak_rss_mb" the highest sample while building, "rss_two_versions_mb" after the build with both versions held and "rss_after_mb" after the swap, when the previous version is freed unless requests still use it.
+
+        Args:
+            force (bool, optional): if True, a new version is built even if no data file changed. Defaults to False.
+            sample_interval (float, optional): seconds between samples of resident memory. Defaults to 0.01.
+
+        Returns:
+            bool: True if a new version was swapped in
+        """
+        with self.__reload_lock:
+            source_status = self.__get_source_status()
+            if not force and source_status == self.__source_status:
+                return False
+            rss_before = self.get_resident_memory()
+            peak_rss = [rss_before]
+            building = threading.Event()
+
+            def sample_memory() -> None:
+                while not building.wait(sample_interval):
+                    peak_rss[0] = max(peak_rss[0], self.get_resident_memory())
+
+            sampler = threading.Thread(target=sample_memory, daemon=True)
+            sampler.start()
+            start = time.perf_counter()
+            try:
+                state = self.__build()
+            finally:
+                building.set()
+                sampler.join()
+            rss_two_versions = self.get_resident_memory()
+            # swap by one assignment, requests that read the previous state finish on it
+            self.state = state
+            self.version += 1
+            self.__source_status = source_status
+            seconds = time.perf_counter() - start
+            del state
+            gc.collect()
+            self.reloads.append(
+                {
+                    "version": self.version,
+                    "seconds": seconds,
+                    "rss_before_mb": rss_before / 1e6,
+                    "peak_rss_mb": max(peak_rss[0], rss_two_versions) / 1e6,
+                    "rss_two_versions_mb": rss_two_versions / 1e6,
+                    "rss_after_mb": self.get_resident_memory() / 1e6,
+                }
+            )
+            return True
+
+    def start(self, interval=5.0) -> None:
+        """Checks the data files every interval seconds in a background thread and reloads them when they changed.
+
+        Args:
+            interval (float, optional): seconds between checks. Defaults to 5.0.
+        """
+        if self.__thread is not None:
+            return
+        self.__stop_event.clear()
+
+        def watch() -> None:
+            while not self.__stop_event.wait(interval):
+                try:
+                    self.reload()
+                except Exception as error:
+                    # keep the current version, e.g. while a data file is still being written
+                    print(f"Reloading data failed: {error!r}", file=sys.stderr)
+
+        self.__thread = threading.Thread(target=watch, daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """Stops checking the data files, a running reload is finished first."""
+        if self.__thread is None:
+            return
+        self.__stop_event.set()
+        self.__thread.join()
+        self.__thread = None
@@ -0,0 +1,177 @@
+# imports
+from typing import Optional, Sequence
+import numpy as np
+import pandas as pd
+
+# import movie recommendations modules
+from movie_recommendations.IdentifierIndex import IdentifierIndex
+
+
+class DecayedPurchaseCounter:
+    """Counts purchases per movie with exponential decay, so that recent purchases count more than old ones.
+
+    A purchase at time t counts 2 ** ((t - now) / half_life) at time now. Instead of decaying every counter as time passes, a purchase is added with weight 2 ** ((t - reference_time) / half_life), which grows with t. Decay multiplies all counters by the same factor, so shares of counters are the same either way and every purchase is added in constant time. Counters are rescaled to a later reference time before weights get too large for floating point numbers.
+
+    Attributes:
+        movie_ids (np.ndarray): identifiers of counted movies in ascending order
+        half_life (float): time after which a purchase counts half, in units of timestamps
+        version (int): incremented with every added purchase, so that results derived from counters can be invalidated
+    """
+
+    # counters are rescaled once weights exceed 2 ** MAX_EXPONENT
+    MAX_EXPONENT = 256
+
+    def __init__(
+        self,
+        movie_ids: Sequence[int],
+        half_life: float,
+        reference_time: Optional[float] = None,
+    ) -> None:
+        if half_life <= 0:
+            raise ValueError("Input value for half_life should be positive.")
+        self.movie_ids = np.sort(np.asarray(movie_ids))
+        self.half_life = half_life
+        self.version = 0
+        self.__rows = IdentifierIndex(self.movie_ids)
+        # counters scaled to reference time, which is set by the first purchase if not given
+        self.__counts = np.zeros(len(self.movie_ids))
+        self.__total = 0.0
+        self.__reference_time = reference_time
+        self.__latest_time = reference_time
+
+    @classmethod
+    def from_purchase_events(
+        cls,
+        movie_ids: Sequence[int],
+        purchase_events: pd.DataFrame,
+        half_life: float,
+    ) -> "DecayedPurchaseCounter":
+        """Creates counters from past purchases.
+
+        Args:
+            movie_ids (Sequence[int]): identifiers of counted movies
+            purchase_events (pd.DataFrame): purchases with columns "movie_id", "timestamp"
+            half_life (float): time after which a purchase counts half, in units of timestamps
+
+        Returns:
+            DecayedPurchaseCounter: counters of all purchases
+        """
+        purchase_counter = cls(movie_ids, half_life)
+        purchase_counter.add_purchases(
+            purchase_events["movie_id"].to_numpy(),
+            purchase_events["timestamp"].to_numpy(),
+        )
+        return purchase_counter
+
+    def __get_rows(self, movie_ids: np.ndarray) -> np.ndarray:
+        """Finds rows of movies.
+
+        Args:
+            movie_ids (np.ndarray): identifiers of movies
+
+        Raises:
+            KeyError: if a movie is not counted
+
+        Returns:
+            np.ndarray: row of every movie
+        """
+        if len(self.movie_ids) == 0:
+            raise KeyError(f"Movie id {movie_ids[0]} does not exist.")
+        rows = np.minimum(
+            np.searchsorted(self.movie_ids, movie_ids), len(self.movie_ids) - 1
+        )
+        is_missing = self.movie_ids[rows] != movie_ids
+        if is_missing.any():
+            raise KeyError(
+                f"Movie id {movie_ids[np.argmax(is_missing)]} does not exist."
+            )
+        return rows
+
+    def __rescale(self, timestamp: float) -> None:
+        """Moves reference time to timestamp, so that weights of later purchases stay small.
+
+        Args:
+            timestamp (float): new reference time
+        """
+        if self.__reference_time is not None:
+            factor = np.exp2((self.__reference_time - timestamp) / self.half_life)
+            self.__counts *= factor
+            self.__total = float(self.__counts.sum())
+        self.__reference_time = timestamp
+
+    def add_purchase(self, movie_id: int, timestamp: float) -> None:
+        """Counts one purchase, purchases may be added in any order of time.
+
+        Args:
+            movie_id (int): identifier of purchased movie
+            timestamp (float): time of purchase
+
+        Raises:
+            KeyError: if movie is not counted
+        """
+        row = self.__rows.get(movie_id)
+        if row < 0:
+            raise KeyError(f"Movie id {movie_id} does not exist.")
+        if self.__reference_time is None or (
+            timestamp - self.__reference_time > self.MAX_EXPONENT * self.half_life
+        ):
+            self.__rescale(timestamp)
+        weight = 2.0 ** ((timestamp - self.__reference_time) / self.half_life)
+        self.__counts[row] += weight
+        self.__total += weight
+        if self.__latest_time is None or timestamp > self.__latest_time:
+            self.__latest_time = timestamp
+        self.version += 1
+
+    def add_purchases(self, movie_ids: np.ndarray, timestamps: np.ndarray) -> None:
+        """Counts many purchases at once.
+
+        Args:
+            movie_ids (np.ndarray): identifier of every purchased movie
+            timestamps (np.ndarray): time of every purchase
+
+        Raises:
+            KeyError: if a movie is not counted
+        """
+        if len(movie_ids) == 0:
+            return
+        rows = self.__get_rows(np.asarray(movie_ids))
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        latest_time = float(timestamps.max())
+        if self.__reference_time is None or (
+            latest_time - self.__reference_time > self.MAX_EXPONENT * self.half_life
+        ):
+            self.__rescale(latest_time)
+        weights = np.exp2((timestamps - self.__reference_time) / self.half_life)
+        self.__counts += np.bincount(rows, weights, minlength=len(self.movie_ids))
+        self.__total = float(self.__counts.sum())
+        if self.__latest_time is None or latest_time > self.__latest_time:
+            self.__latest_time = latest_time
+        self.version += 1
+
+    def get_counts(self, timestamp: Optional[float] = None) -> np.ndarray:
+        """Calculates decayed number of purchases of every movie.
+
+        Args:
+            timestamp (Optional[float], optional): time of counts. Defaults to None, which is the time of the latest purchase.
+
+        Returns:
+            np.ndarray: decayed number of purchases per movie in order of movie_ids
+        """
+        if self.__reference_time is None:
+            return self.__counts.copy()
+        if timestamp is None:
+            timestamp = self.__latest_time
+        return self.__counts * np.exp2(
+            (self.__reference_time - timestamp) / self.half_life
+        )
+
+    def get_shares(self) -> np.ndarray:
+        """Calculates share of every movie in all decayed purchases, which does not depend on the time of counts.
+
+        Returns:
+            np.ndarray: shares between 0 and 1 per movie in order of movie_ids, all 0 if there are no purchases
+        """
+        if self.__total <= 0:
+            return np.zeros(len(self.movie_ids))
+        return self.__counts / self.__total
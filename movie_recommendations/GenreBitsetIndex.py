@@ -0,0 +1,206 @@
+# imports
+from typing import Dict, Literal, Optional
+import numpy as np
+
+# import movie recommendations modules
+from movie_recommendations.Instrumentation import Instrumentation
+from movie_recommendations.MovieMatrix import MovieMatrix
+
+# number of set bits of every 16 bit value
+POPCOUNT_TABLE = np.unpackbits(
+    np.arange(1 << 16, dtype=np.uint16).view(np.uint8).reshape(-1, 2), axis=1
+).sum(axis=1, dtype=np.uint8)
+
+
+def popcount(words: np.ndarray, n_bits=64) -> np.ndarray:
+    """Counts set bits of every 64 bit word.
+
+    Args:
+        words (np.ndarray): array of dtype uint64
+        n_bits (int, optional): number of low bits that may be set. Defaults to 64.
+
+    Returns:
+        np.ndarray: number of set bits with the same shape as words and dtype uint8
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words)
+    # numpy < 2 has no popcount, so bits are counted by table lookups of 16 bits each
+    counts = POPCOUNT_TABLE[words.astype(np.uint16)]
+    for shift in range(16, min(n_bits, 64), 16):
+        counts += POPCOUNT_TABLE[(words >> np.uint64(shift)).astype(np.uint16)]
+    return counts
+
+
+class GenreBitsetIndex:
+    """Stores the genres of every movie as bits of 64 bit words and scores genre similarity by counting common bits.
+
+    Genres form a small vocabulary, so the genres of a movie usually fit into one word. Scores are calculated from the number of genres of both movies and their number of common genres:
+        "pearson": same correlation as MovieMatrix.get_correlations_of_columns on the genre matrix
+        "jaccard": common genres divided by genres of either movie
+
+    Attributes:
+        movie_ids (np.ndarray): identifiers of movies sorted in ascending order, like in the genre matrix
+        movie_index (Dict[int, int]): maps movie identifier to position in movie_ids
+        bitsets (np.ndarray): genres of every movie of shape (number of movies, number of words) with dtype uint64
+        genre_counts (np.ndarray): number of genres of every movie
+        n_genres (int): number of genres
+        metric (Literal['pearson', 'jaccard']): how genre similarity is scored
+        chunk_elements (int): number of movie pairs scored at once, bounds temporary memory
+    """
+
+    def __init__(
+        self,
+        movie_ids: np.ndarray,
+        movie_index: Dict[int, int],
+        bitsets: np.ndarray,
+        n_genres: int,
+        metric: Literal["pearson", "jaccard"] = "pearson",
+    ) -> None:
+        if metric not in ["pearson", "jaccard"]:
+            raise ValueError(f"Input '{metric}' for metric is not defined.")
+        self.movie_ids = movie_ids
+        self.movie_index = movie_index
+        self.bitsets = bitsets
+        self.genre_counts = popcount(bitsets).sum(axis=1, dtype=np.int64)
+        self.n_genres = n_genres
+        self.metric = metric
+        self.chunk_elements = 1 << 20
+        # counts never exceed the number of genres, so every score of small vocabularies is calculated once,
+        # table is ordered by count, common count and other count
+        self.__score_table: Optional[np.ndarray] = None
+        if n_genres <= 64:
+            possible_counts = np.arange(n_genres + 1)
+            self.__score_table = np.stack(
+                [
+                    self.__get_scores(
+                        np.full(n_genres + 1, count),
+                        possible_counts,
+                        np.full((n_genres + 1, n_genres + 1), possible_counts).T,
+                    )
+                    for count in possible_counts
+                ]
+            ).ravel()
+
+    @classmethod
+    @Instrumentation.instrument("genre_bitset_index.build")
+    def from_movie_matrix(
+        cls,
+        genres_of_movies: MovieMatrix,
+        metric: Literal["pearson", "jaccard"] = "pearson",
+    ) -> "GenreBitsetIndex":
+        """Encodes the genres of every movie of a genre matrix as bitset.
+
+        Args:
+            genres_of_movies (MovieMatrix): genre matrix, rows are genres and columns are movies
+            metric (Literal['pearson', 'jaccard'], optional): how genre similarity is scored. Defaults to "pearson".
+
+        Returns:
+            GenreBitsetIndex: bitsets of all movies of the genre matrix
+        """
+        matrix = genres_of_movies.matrix
+        n_genres, n_movies = matrix.shape
+        n_words = max(1, (n_genres + 63) // 64)
+        bitsets = np.zeros((n_movies, n_words), dtype=np.uint64)
+        genres = matrix.indices.astype(np.uint64)
+        columns = np.repeat(np.arange(n_movies), np.diff(matrix.indptr))
+        # every movie has each genre at most once, so adding bits equals combining them
+        np.add.at(
+            bitsets,
+            (columns, (genres // np.uint64(64)).astype(np.int64)),
+            np.left_shift(np.uint64(1), genres % np.uint64(64)),
+        )
+        return cls(
+            genres_of_movies.movie_ids,
+            genres_of_movies.movie_index,
+            bitsets,
+            n_genres,
+            metric,
+        )
+
+    def get_correlations(self, movie_id: int) -> np.ndarray:
+        """Scores genre similarity of a movie with every movie.
+
+        Args:
+            movie_id (int): identifier of movie
+
+        Raises:
+            KeyError: if movie_id has no genres
+
+        Returns:
+            np.ndarray: scores ordered like movie_ids, nan where score is not defined
+        """
+        return self.get_correlations_of_columns(np.array([self.movie_index[movie_id]]))[
+            0
+        ]
+
+    def get_correlations_of_columns(
+        self, columns: np.ndarray, other_columns: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Scores genre similarity of several movies with every movie at once.
+
+        Args:
+            columns (np.ndarray): positions of movies in movie_ids
+            other_columns (Optional[np.ndarray], optional): positions of movies the scores are calculated with. Defaults to None, which uses all movies.
+
+        Returns:
+            np.ndarray: scores of shape (len(columns), number of other movies), nan where score is not defined
+        """
+        columns = np.asarray(columns, dtype=np.int64)
+        other_bitsets = self.bitsets
+        other_counts = self.genre_counts
+        if other_columns is not None:
+            other_bitsets = self.bitsets[other_columns]
+            other_counts = self.genre_counts[other_columns]
+        counts = self.genre_counts[columns]
+        scores = np.empty((len(columns), len(other_bitsets)), dtype=np.float64)
+        # bound temporary memory by scoring chunks of other movies
+        chunk_size = max(1, self.chunk_elements // max(len(columns), 1))
+        for start in range(0, len(other_bitsets), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            # count common genres word by word
+            common_counts = np.zeros(
+                (len(columns), len(other_bitsets[chunk])), dtype=np.int64
+            )
+            for word in range(self.bitsets.shape[1]):
+                common_counts += popcount(
+                    self.bitsets[columns, word, None]
+                    & other_bitsets[None, chunk, word],
+                    self.n_genres - 64 * word,
+                )
+            if self.__score_table is not None:
+                # position of score of (count, common count, other count) in score table
+                positions = common_counts
+                positions *= self.n_genres + 1
+                positions += counts[:, None] * (self.n_genres + 1) ** 2
+                positions += other_counts[None, chunk]
+                scores[:, chunk] = self.__score_table[positions]
+            else:
+                scores[:, chunk] = self.__get_scores(
+                    counts, other_counts[chunk], common_counts
+                )
+        return scores
+
+    def __get_scores(
+        self, counts: np.ndarray, other_counts: np.ndarray, common_counts: np.ndarray
+    ) -> np.ndarray:
+        """Scores genre similarity from numbers of genres.
+
+        Args:
+            counts (np.ndarray): number of genres of each movie
+            other_counts (np.ndarray): number of genres of each other movie
+            common_counts (np.ndarray): number of common genres of shape (len(counts), len(other_counts))
+
+        Returns:
+            np.ndarray: scores of shape (len(counts), len(other_counts)), nan where score is not defined
+        """
+        common_counts = common_counts.astype(np.float64)
+        if self.metric == "jaccard":
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return np.round(
+                    common_counts
+                    / (counts[:, None] + other_counts[None, :] - common_counts),
+                    12,
+                )
+        return MovieMatrix.get_correlations_of_counts(
+            self.n_genres, common_counts, counts, other_counts
+        )
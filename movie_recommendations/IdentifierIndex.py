@@ -0,0 +1,56 @@
+# imports
+from typing import Hashable
+import numpy as np
+
+
+class IdentifierIndex:
+    """Maps identifiers to rows with arrays instead of a dictionary, so that no Python object is stored per identifier.
+
+    Dense integer identifiers, e.g. 1 to n, are looked up directly in an array of rows indexed by identifier. Other identifiers are found by binary search in the sorted identifiers. Like a dictionary, the last row of a duplicated identifier is returned. Integer identifiers are only found by integers, so that e.g. 3.5 or "3" do not exist.
+
+    Attributes:
+        n_rows (int): number of identifiers
+    """
+
+    def __init__(self, identifiers: np.ndarray) -> None:
+        identifiers = np.asarray(identifiers)
+        self.n_rows = len(identifiers)
+        rows = np.arange(self.n_rows)
+        self.__is_integer = np.issubdtype(identifiers.dtype, np.integer)
+        self.__first = 0
+        self.__rows_by_identifier = None
+        if self.n_rows and self.__is_integer:
+            first, last = int(identifiers.min()), int(identifiers.max())
+            # direct lookup if the array of rows is at most twice as long as the identifiers
+            if last - first < 2 * self.n_rows:
+                self.__first = first
+                self.__rows_by_identifier = np.full(
+                    last - first + 1, -1, dtype=np.min_scalar_type(-self.n_rows)
+                )
+                self.__rows_by_identifier[identifiers - first] = rows
+                return
+        # stable sort keeps duplicated identifiers in order of rows, the last one is found from the right
+        order = np.argsort(identifiers, kind="stable")
+        self.__sorted_identifiers = identifiers[order]
+        self.__sorted_rows = rows[order]
+
+    def get(self, identifier: Hashable) -> int:
+        """Finds row of an identifier.
+
+        Args:
+            identifier (Hashable): identifier
+
+        Returns:
+            int: row of identifier, -1 if identifier does not exist
+        """
+        if self.__is_integer and not isinstance(identifier, (int, np.integer)):
+            return -1
+        if self.__rows_by_identifier is not None:
+            position = identifier - self.__first
+            if 0 <= position < len(self.__rows_by_identifier):
+                return int(self.__rows_by_identifier[position])
+            return -1
+        position = int(self.__sorted_identifiers.searchsorted(identifier, "right")) - 1
+        if position < 0 or self.__sorted_identifiers[position] != identifier:
+            return -1
+        return int(self.__sorted_rows[position])
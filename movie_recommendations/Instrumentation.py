@@ -0,0 +1,185 @@
+# imports
+import functools
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple, TypeVar
+
+Function = TypeVar("Function", bound=Callable[..., Any])
+
+
+class Instrumentation:
+    """Records wall time, number of calls and allocated bytes of pipeline stages.
+
+    Stages are marked with the decorator instrument or the context manager stage. While instrumentation is disabled, which is the default, a marked function only costs one additional check per call. Times of nested stages are included in the times of enclosing stages. Stages executed in worker processes are not recorded.
+
+    Attributes:
+        enabled (bool): if True, stages are recorded
+        trace_memory (bool): if True, allocated bytes are traced with tracemalloc, which slows down the program considerably
+        stages (Dict[str, Dict[str, float]]): "calls", "seconds", "allocated_bytes" and "peak_bytes" per stage
+    """
+
+    enabled = False
+    trace_memory = False
+    stages: Dict[str, Dict[str, float]] = {}
+    # traced memory at start and highest traced memory of every running stage
+    __memory_frames: List[List[int]] = []
+
+    @classmethod
+    def enable(cls, trace_memory=False) -> None:
+        """Starts recording stages.
+
+        Args:
+            trace_memory (bool, optional): if True, allocated bytes are recorded as well. Defaults to False.
+        """
+        cls.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        cls.enabled = True
+
+    @classmethod
+    def disable(cls) -> None:
+        """Stops recording stages, recorded stages are kept."""
+        cls.enabled = False
+        if cls.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        cls.trace_memory = False
+
+    @classmethod
+    def reset(cls) -> None:
+        """Removes all recorded stages."""
+        cls.stages = {}
+
+    @classmethod
+    @contextmanager
+    def stage(cls, name: str) -> Iterator[None]:
+        """Records the enclosed code as one call of a stage.
+
+        Args:
+            name (str): name of stage, e.g. "load.user_data"
+        """
+        if not cls.enabled:
+            yield
+            return
+        trace_memory = cls.trace_memory and tracemalloc.is_tracing()
+        if trace_memory:
+            cls.__enter_memory_frame()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            statistics = cls.stages.setdefault(
+                name,
+                {"calls": 0, "seconds": 0.0, "allocated_bytes": 0, "peak_bytes": 0},
+            )
+            statistics["calls"] += 1
+            statistics["seconds"] += seconds
+            if trace_memory:
+                allocated_bytes, peak_bytes = cls.__exit_memory_frame()
+                statistics["allocated_bytes"] += allocated_bytes
+                statistics["peak_bytes"] = max(statistics["peak_bytes"], peak_bytes)
+
+    @classmethod
+    def __enter_memory_frame(cls) -> None:
+        """Starts measuring memory of a stage, keeps the peak of enclosing stages."""
+        current, peak = tracemalloc.get_traced_memory()
+        if cls.__memory_frames:
+            cls.__memory_frames[-1][1] = max(cls.__memory_frames[-1][1], peak)
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        cls.__memory_frames.append([current, current])
+
+    @classmethod
+    def __exit_memory_frame(cls) -> Tuple[int, int]:
+        """Stops measuring memory of a stage and passes its peak on to the enclosing stage.
+
+        Returns:
+            Tuple[int, int]: bytes allocated and not freed during the stage, highest number of bytes allocated during the stage
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        start, frame_peak = cls.__memory_frames.pop()
+        frame_peak = max(frame_peak, peak)
+        if cls.__memory_frames:
+            cls.__memory_frames[-1][1] = max(cls.__memory_frames[-1][1], frame_peak)
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        return current - start, frame_peak - start
+
+    @classmethod
+    def instrument(cls, name: str) -> Callable[[Function], Function]:
+        """Creates decorator recording every call of a function as one call of a stage.
+
+        Args:
+            name (str): name of stage
+
+        Returns:
+            Callable[[Function], Function]: decorator
+        """
+
+        def decorator(function: Function) -> Function:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not cls.enabled:
+                    return function(*args, **kwargs)
+                with cls.stage(name):
+                    return function(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    @classmethod
+    def to_dict(cls) -> Dict[str, Dict[str, float]]:
+        """Returns recorded stages sorted in descending order by total time.
+
+        Returns:
+            Dict[str, Dict[str, float]]: "calls", "seconds", "allocated_bytes" and "peak_bytes" per stage
+        """
+        return {
+            name: dict(statistics)
+            for name, statistics in sorted(
+                cls.stages.items(), key=lambda item: -item[1]["seconds"]
+            )
+        }
+
+    @classmethod
+    def to_json(cls) -> str:
+        """Returns recorded stages as JSON.
+
+        Returns:
+            str: JSON object with one entry per stage
+        """
+        return json.dumps(cls.to_dict(), indent=2)
+
+    @classmethod
+    def to_text(cls) -> str:
+        """Returns recorded stages as table sorted in descending order by total time.
+
+        Returns:
+            str: one line per stage
+        """
+        lines = [
+            f"{'stage':<40} {'calls':>10} {'total ms':>12} {'per call ms':>12} {'allocated B':>14} {'peak B':>14}"
+        ]
+        for name, statistics in cls.to_dict().items():
+            lines.append(
+                f"{name:<40} {statistics['calls']:>10d} "
+                f"{statistics['seconds'] * 1000:>12.3f} "
+                f"{statistics['seconds'] * 1000 / statistics['calls']:>12.4f} "
+                f"{statistics['allocated_bytes']:>14d} {statistics['peak_bytes']:>14d}"
+            )
+        return "\n".join(lines)
+
+    @classmethod
+    def dump(cls, path: str) -> None:
+        """Writes recorded stages to a file, as JSON if path ends with ".json" and as text otherwise.
+
+        Args:
+            path (str): path of report
+        """
+        with open(path, "w") as report_file:
+            report_file.write(
+                cls.to_json() if path.endswith(".json") else cls.to_text() + "\n"
+            )
@@ -0,0 +1,75 @@
+# imports
+from typing import Dict, Tuple
+import numpy as np
+
+# import movie recommendations modules
+from movie_recommendations.Instrumentation import Instrumentation
+from movie_recommendations.MovieMatrix import MovieMatrix
+
+
+class InvertedIndex:
+    """Maps every movie to its rows (e.g. users who purchased it) and every row to its movies, so that movies sharing rows with a movie are found without visiting all movies.
+
+    Movies that share no row with a movie have a negative correlation with it, so for positive thresholds the movies reached through its rows are the only candidates of similar movies. Their exact correlations are calculated from counts like MovieMatrix.get_correlations_of_columns, so that the cost of a query depends on the number of rows of the movie and their movies instead of the number of movies.
+
+    Rows and movies are read through the matrix, which includes added entries without merging them, so that the index stays valid while entries are added.
+
+    Attributes:
+        movie_matrix (MovieMatrix): indexed relation
+    """
+
+    @Instrumentation.instrument("inverted_index.build")
+    def __init__(self, movie_matrix: MovieMatrix) -> None:
+        self.movie_matrix = movie_matrix
+        # reading the movies of no row builds the row-wise copy of the matrix
+        movie_matrix.get_columns_of_rows(np.zeros(0, dtype=np.int64))
+
+    @property
+    def movie_ids(self) -> np.ndarray:
+        """Identifiers of movies sorted in ascending order."""
+        return self.movie_matrix.movie_ids
+
+    @property
+    def movie_index(self) -> Dict[int, int]:
+        """Maps movie identifier to position in movie_ids."""
+        return self.movie_matrix.movie_index
+
+    def get_co_counts(self, column: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Counts the rows every movie shares with a movie, only for movies sharing at least one row.
+
+        Args:
+            column (int): position of movie in movie_ids
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: positions of movies sharing rows in ascending order, including column itself, and their number of shared rows
+        """
+        _, columns = self.movie_matrix.get_columns_of_rows(
+            self.movie_matrix.get_rows_of_column(column)
+        )
+        return np.unique(columns, return_counts=True)
+
+    @Instrumentation.instrument("inverted_index.correlations")
+    def get_correlations_of_candidates(
+        self, movie_id: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Calculates the Pearson correlation of a movie with every movie sharing at least one row with it.
+
+        Args:
+            movie_id (int): identifier of movie
+
+        Raises:
+            KeyError: if movie_id is not indexed
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: identifiers of candidates in ascending order, including movie_id itself, and their correlations, nan where correlation is not defined
+        """
+        column = self.movie_index[movie_id]
+        columns, co_counts = self.get_co_counts(column)
+        movie_counts = self.movie_matrix.get_movie_counts()
+        correlations = MovieMatrix.get_correlations_of_counts(
+            self.movie_matrix.n_rows,
+            co_counts[None, :].astype(np.float64),
+            movie_counts[[column]],
+            movie_counts[columns],
+        )[0]
+        return self.movie_ids[columns], correlations
@@ -0,0 +1,81 @@
+# imports
+from collections import OrderedDict
+from typing import Any, Hashable, List
+
+
+class LRUCache:
+    """Size-bounded cache which evicts the least recently used entry first.
+
+    Attributes:
+        maxsize (int): maximal number of stored entries
+        hits (int): number of lookups that found an entry
+        misses (int): number of lookups that found no entry
+        evictions (int): number of entries removed to respect maxsize
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        if maxsize < 1:
+            raise ValueError(f"Input value for maxsize should be at least 1.")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.__entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Looks up an entry and marks it as most recently used.
+
+        Args:
+            key (Hashable): key of entry
+            default (Any, optional): returned if there is no entry. Defaults to None.
+
+        Returns:
+            Any: stored value or default
+        """
+        try:
+            value = self.__entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.__entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Stores an entry and evicts the least recently used entry if maxsize is exceeded.
+
+        Args:
+            key (Hashable): key of entry
+            value (Any): value of entry
+        """
+        self.__entries[key] = value
+        self.__entries.move_to_end(key)
+        if len(self.__entries) > self.maxsize:
+            self.__entries.popitem(last=False)
+            self.evictions += 1
+
+    def remove(self, key: Hashable) -> None:
+        """Removes an entry if it exists.
+
+        Args:
+            key (Hashable): key of entry
+        """
+        self.__entries.pop(key, None)
+
+    def keys(self) -> List[Hashable]:
+        """Lists the keys of all entries without marking them as used.
+
+        Returns:
+            List[Hashable]: keys from least to most recently used
+        """
+        return list(self.__entries)
+
+    def clear(self) -> None:
+        """Removes all entries, counters are kept."""
+        self.__entries.clear()
@@ -0,0 +1,213 @@
+# imports
+from typing import Dict, List, Tuple
+import numpy as np
+
+# import movie recommendations modules
+from movie_recommendations.Instrumentation import Instrumentation
+from movie_recommendations.MovieMatrix import MovieMatrix
+
+# Mersenne prime used as modulus of the hash functions
+PRIME = (1 << 31) - 1
+
+
+class MinHashIndex:
+    """Finds candidates of similar movies with MinHash signatures and locality-sensitive hashing (LSH).
+
+    The set of rows of every movie is summarized by n_hashes minimal hash values. Signatures are split into n_bands bands, and movies whose signatures agree in at least one band become candidates of each other. Two movies with Jaccard similarity s are candidates with probability 1 - (1 - s^r)^n_bands, where r = n_hashes / n_bands. More bands increase recall, more rows per band reduce the number of candidates.
+
+    The defaults of four rows per band suit movies whose similar movies share most of their rows, like genres, where they keep over 98% of the exact similar movies among about 8% of the movies. Similar movies of sparse relations like purchases share few rows, e.g. s = 0.03, so that bands of several rows almost never find them: such relations need one row per band (n_bands = n_hashes), where sparsity keeps the number of candidates small. See SimilarMovieRecommender.MINHASH_PARAMETERS.
+
+    Entries added to the matrix afterwards are applied by update, which lowers the signatures of their movies and moves them to the buckets of their new band keys, until the matrix merges them and moves rows and columns.
+
+    Attributes:
+        n_hashes (int): length of MinHash signatures
+        n_bands (int): number of LSH bands, must divide n_hashes
+        signatures (np.ndarray): minimal hash values of shape (n_hashes, number of movies)
+        layout_version (int): layout version of the matrix the index was built from, see MovieMatrix
+        n_applied_entries (int): number of entries added to the matrix since its last merge that were applied
+    """
+
+    @Instrumentation.instrument("minhash_index.build")
+    def __init__(
+        self, movie_matrix: MovieMatrix, n_hashes=128, n_bands=32, seed=0
+    ) -> None:
+        if n_hashes % n_bands != 0:
+            raise ValueError(f"Input value for n_bands should divide n_hashes.")
+        self.n_hashes = n_hashes
+        self.n_bands = n_bands
+        # hash functions h(x) = (a * x + b) mod PRIME
+        random = np.random.default_rng(seed)
+        self.__a = random.integers(1, PRIME, self.n_hashes, dtype=np.int64)
+        self.__b = random.integers(0, PRIME, self.n_hashes, dtype=np.int64)
+        self.signatures = self.__get_signatures(movie_matrix)
+        self.layout_version = movie_matrix.layout_version
+        self.n_applied_entries = 0
+        self.__index_bands()
+
+    def __get_signatures(self, movie_matrix: MovieMatrix) -> np.ndarray:
+        """Calculates MinHash signature of every movie.
+
+        Args:
+            movie_matrix (MovieMatrix): relation the signatures are based on
+
+        Returns:
+            np.ndarray: minimal hash values of shape (n_hashes, number of movies), PRIME for movies without rows
+        """
+        matrix = movie_matrix.matrix
+        a = self.__a
+        b = self.__b
+        rows = matrix.indices.astype(np.int64)
+        non_empty = np.flatnonzero(np.diff(matrix.indptr))
+        signatures = np.full((self.n_hashes, matrix.shape[1]), PRIME, dtype=np.int64)
+        for hash_number in range(self.n_hashes):
+            hashes = (a[hash_number] * rows + b[hash_number]) % PRIME
+            # minimum of hashes of every column
+            if len(non_empty):
+                signatures[hash_number, non_empty] = np.minimum.reduceat(
+                    hashes, matrix.indptr[non_empty]
+                )
+        return signatures
+
+    def __get_band_keys(self, band: int, signatures: np.ndarray) -> np.ndarray:
+        """Combines the hash values of a band of signatures into one key per movie.
+
+        Keys of bands with one row equal the hash value, longer bands are combined modulo 2^64, so that different values rarely share a key.
+
+        Args:
+            band (int): number of band
+            signatures (np.ndarray): signatures of shape (n_hashes, number of movies)
+
+        Returns:
+            np.ndarray: key of every movie
+        """
+        rows_per_band = self.n_hashes // self.n_bands
+        keys = np.zeros(signatures.shape[1], dtype=np.uint64)
+        for values in signatures[band * rows_per_band : (band + 1) * rows_per_band]:
+            keys = keys * np.uint64(PRIME) + values.astype(np.uint64)
+        return keys
+
+    def __index_bands(self) -> None:
+        """Assigns every movie to one bucket per band and stores the members of every bucket.
+
+        Buckets of all bands are numbered consecutively, members of bucket b are stored in bucket_members[bucket_starts[b]:bucket_starts[b + 1]]. Movies moved to another bucket by update are kept in moved_members instead.
+        """
+        n_movies = self.signatures.shape[1]
+        self.__buckets = np.empty((self.n_bands, n_movies), dtype=np.int64)
+        # sorted keys of every band, the bucket of a key is its position plus the first bucket of the band
+        self.__band_keys: List[np.ndarray] = []
+        self.__band_starts = np.zeros(self.n_bands, dtype=np.int64)
+        n_buckets = 0
+        for band in range(self.n_bands):
+            # movies with equal keys in this band share a bucket
+            unique_keys, buckets = np.unique(
+                self.__get_band_keys(band, self.signatures), return_inverse=True
+            )
+            self.__buckets[band] = n_buckets + buckets.ravel()
+            self.__band_keys.append(unique_keys)
+            self.__band_starts[band] = n_buckets
+            n_buckets += len(unique_keys)
+        self.__n_buckets = n_buckets
+        # buckets of keys that only occur after update, and movies moved to buckets by update
+        self.__new_buckets: Dict[Tuple[int, int], int] = {}
+        self.__moved_members: Dict[int, List[int]] = {}
+        buckets = self.__buckets.ravel()
+        self.__bucket_members = np.argsort(buckets, kind="stable") % max(n_movies, 1)
+        self.__bucket_starts = np.zeros(n_buckets + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(buckets, minlength=n_buckets), out=self.__bucket_starts[1:]
+        )
+
+    def update(self, movie_matrix: MovieMatrix) -> None:
+        """Applies the entries added to the matrix since the last update.
+
+        Args:
+            movie_matrix (MovieMatrix): matrix the index was built from, with layout_version unchanged
+        """
+        rows, columns = movie_matrix.get_pending_entries(self.n_applied_entries)
+        for row, column in zip(rows.tolist(), columns.tolist()):
+            self.add_entry(row, column)
+        self.n_applied_entries += len(rows)
+
+    def add_entry(self, row: int, column: int) -> None:
+        """Adds a row to the set of rows of a movie, in time independent of the number of movies.
+
+        Args:
+            row (int): row position
+            column (int): column position of movie
+        """
+        hashes = (self.__a * row + self.__b) % PRIME
+        signature = self.signatures[:, column]
+        lowered = hashes < signature
+        if not lowered.any():
+            return
+        signature[lowered] = hashes[lowered]
+        rows_per_band = self.n_hashes // self.n_bands
+        for band in np.unique(np.flatnonzero(lowered) // rows_per_band).tolist():
+            key = int(self.__get_band_keys(band, signature[:, None])[0])
+            bucket = self.__get_bucket(band, key)
+            self.__buckets[band, column] = bucket
+            self.__moved_members.setdefault(bucket, []).append(column)
+
+    def __get_bucket(self, band: int, key: int) -> int:
+        """Finds the bucket of a key in a band, creates one for new keys.
+
+        Args:
+            band (int): number of band
+            key (int): key of band signature
+
+        Returns:
+            int: bucket number
+        """
+        band_keys = self.__band_keys[band]
+        position = int(np.searchsorted(band_keys, np.uint64(key)))
+        if position < len(band_keys) and int(band_keys[position]) == key:
+            return int(self.__band_starts[band]) + position
+        bucket = self.__new_buckets.get((band, key))
+        if bucket is None:
+            bucket = self.__n_buckets
+            self.__n_buckets += 1
+            self.__new_buckets[(band, key)] = bucket
+        return bucket
+
+    def get_candidates(self, column: int) -> np.ndarray:
+        """Collects movies sharing a bucket with the given movie in at least one band.
+
+        Args:
+            column (int): column position of movie in the matrix the index was built from
+
+        Returns:
+            np.ndarray: column positions of candidates in ascending order, excluding the movie itself
+        """
+        buckets = self.__buckets[:, column]
+        n_indexed_buckets = len(self.__bucket_starts) - 1
+        indexed = buckets < n_indexed_buckets
+        starts = self.__bucket_starts[buckets[indexed]]
+        lengths = self.__bucket_starts[buckets[indexed] + 1] - starts
+        # positions of members of all buckets, range by range
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        candidates = self.__bucket_members[offsets + np.arange(lengths.sum())]
+        if self.__moved_members:
+            moved = [
+                self.__moved_members.get(bucket, []) for bucket in buckets.tolist()
+            ]
+            bands = np.concatenate(
+                [
+                    np.repeat(np.flatnonzero(indexed), lengths),
+                    np.repeat(
+                        np.arange(self.n_bands), [len(members) for members in moved]
+                    ),
+                ]
+            ).astype(np.int64)
+            candidates = np.concatenate(
+                [
+                    candidates,
+                    np.array(
+                        [member for members in moved for member in members],
+                        dtype=np.int64,
+                    ),
+                ]
+            )
+            # members that moved to another bucket of a band are no candidates through it
+            candidates = candidates[self.__buckets[bands, candidates] == buckets[bands]]
+        candidates = np.unique(candidates)
+        return candidates[candidates != column]
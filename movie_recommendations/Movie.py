@@ -1,8 +1,11 @@
 # imports
 from typing import List, Union
 
+# import movie recommendations modules
+from movie_recommendations.MovieBase import MovieBase
 
-class Movie:
+
+class Movie(MovieBase):
     """Stores movie characteristics.
 
     Attributes:
@@ -14,6 +17,8 @@ class Movie:
         price (Union[int,float]): price
     """
 
+    __slots__ = ("identifier", "name", "year", "genres", "rating", "price")
+
     def __init__(
         self,
         identifier: int,
@@ -29,20 +34,3 @@ class Movie:
         self.genres = genres
         self.rating = rating
         self.price = price
-
-    def __str__(self) -> str:
-        """Overrides string method.
-
-        Returns:
-            str: string representation of Movie instance
-        """
-        return (
-            f"\n====== Movie ======\n"
-            f"id: {self.identifier}\n"
-            f"name: {self.name}\n"
-            f"year: {self.year}\n"
-            f"genres: {', '.join(self.genres)}\n"
-            f"rating: {self.rating}\n"
-            f"price: {self.price}\n"
-            f"===================\n"
-        )
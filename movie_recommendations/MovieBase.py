@@ -0,0 +1,43 @@
+# imports
+from typing import List, Union
+
+
+class MovieBase:
+    """Movie characteristics shared by Movie, which stores them, and MovieView, which reads them from a MovieTable.
+
+    The base declares no slots, so that neither subclass carries the unused slots of the other.
+
+    Attributes:
+        identifier (int): unique identifier
+        name (str): movie name
+        year (int): the year the movie was first released
+        genres (List[str]): genres in which the movie is classified
+        rating (Union[int,float]): average user review (rating 0-5)
+        price (Union[int,float]): price
+    """
+
+    __slots__ = ()
+
+    identifier: int
+    name: str
+    year: int
+    genres: List[str]
+    rating: Union[int, float]
+    price: Union[int, float]
+
+    def __str__(self) -> str:
+        """Overrides string method.
+
+        Returns:
+            str: string representation of Movie instance
+        """
+        return (
+            f"\n====== Movie ======\n"
+            f"id: {self.identifier}\n"
+            f"name: {self.name}\n"
+            f"year: {self.year}\n"
+            f"genres: {', '.join(self.genres)}\n"
+            f"rating: {self.rating}\n"
+            f"price: {self.price}\n"
+            f"===================\n"
+        )
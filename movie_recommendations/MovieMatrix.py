@@ -0,0 +1,426 @@
+# imports
+from typing import Dict, Hashable, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from scipy import sparse
+
+# import movie recommendations modules
+from movie_recommendations.Instrumentation import Instrumentation
+
+
+class MovieMatrix:
+    """Stores a binary relation between rows (e.g. users) and movies as sparse matrix.
+
+    Entries added by add_entry are kept apart from the merged matrix, so that adding an entry takes time independent of the number of entries. Counts, correlations and the rows and movies read through get_rows_of_column and get_columns_of_rows include them without merging. They are merged on access of matrix or row_ids, when a new movie is added, as columns are kept in ascending order of movie_ids, and once they exceed MERGE_SHARE of all entries, so that merging costs amortized constant time per added entry.
+
+    Attributes:
+        matrix (sparse.csc_matrix): binary matrix of shape (number of rows, number of movies) with dtype uint8
+        row_ids (np.ndarray): identifiers of rows sorted in ascending order
+        movie_ids (np.ndarray): identifiers of movies sorted in ascending order
+        row_index (Dict[int, int]): maps row identifier to row position in matrix
+        movie_index (Dict[int, int]): maps movie identifier to column position in matrix
+        layout_version (int): incremented whenever added entries are merged, which may move rows and columns
+    """
+
+    # share of all entries added entries are merged at, and minimal number of added entries merged
+    MERGE_SHARE = 1 / 32
+    MIN_MERGE_SIZE = 1024
+
+    def __init__(
+        self, matrix: sparse.spmatrix, row_ids: np.ndarray, movie_ids: np.ndarray
+    ) -> None:
+        # avoid copies of matrices that already have the right format, e.g. memory-mapped ones
+        self.__matrix = (
+            matrix
+            if sparse.isspmatrix_csc(matrix) and matrix.dtype == np.uint8
+            else sparse.csc_matrix(matrix, dtype=np.uint8)
+        )
+        self.__row_ids = np.asarray(row_ids)
+        self.__movie_ids = np.asarray(movie_ids)
+        self.layout_version = 0
+        self.__index()
+
+    def __index(self) -> None:
+        """Maps identifiers to positions and resets buffer of added entries."""
+        self.row_index: Dict[int, int] = {
+            row_id: position for position, row_id in enumerate(self.__row_ids.tolist())
+        }
+        self.movie_index: Dict[int, int] = {
+            movie_id: position
+            for position, movie_id in enumerate(self.__movie_ids.tolist())
+        }
+        # counts have spare capacity, so that new movies are added in amortized constant time
+        self.__movie_counts = np.diff(self.__matrix.indptr).astype(np.int64)
+        self.__pending_entries: Set[Tuple[int, int]] = set()
+        # positions of added entries in the order they were added, and per column and row
+        self.__pending_rows: List[int] = []
+        self.__pending_columns: List[int] = []
+        self.__pending_rows_of_columns: Dict[int, List[int]] = {}
+        self.__pending_columns_of_rows: Dict[int, List[int]] = {}
+        # copy of matrix in CSR format to read movies of rows, built on first use
+        self.__rows_matrix: Optional[sparse.csr_matrix] = None
+        self.__new_row_ids: List[Hashable] = []
+        self.__new_movie_ids: List[Hashable] = []
+
+    @classmethod
+    def from_pairs(cls, row_ids: Sequence, movie_ids: Sequence) -> "MovieMatrix":
+        """Creates matrix from pairs of row and movie identifiers. Every pair marks one entry of the matrix.
+
+        Args:
+            row_ids (Sequence): row identifier of every pair
+            movie_ids (Sequence): movie identifier of every pair
+
+        Returns:
+            MovieMatrix: binary matrix containing all pairs
+        """
+        # map identifiers to positions, identifiers are sorted in ascending order
+        unique_row_ids, rows = np.unique(np.asarray(row_ids), return_inverse=True)
+        unique_movie_ids, columns = np.unique(
+            np.asarray(movie_ids), return_inverse=True
+        )
+        matrix = sparse.csc_matrix(
+            (np.ones(len(rows), dtype=np.uint8), (rows, columns)),
+            shape=(len(unique_row_ids), len(unique_movie_ids)),
+        )
+        # duplicated pairs are summed up during conversion, but relation is binary
+        matrix.data[:] = 1
+        return cls(matrix, unique_row_ids, unique_movie_ids)
+
+    @property
+    def matrix(self) -> sparse.csc_matrix:
+        """Binary matrix including all added entries."""
+        self.__merge_pending_entries()
+        return self.__matrix
+
+    @property
+    def row_ids(self) -> np.ndarray:
+        """Identifiers of rows sorted in ascending order."""
+        if self.__new_row_ids:
+            self.__merge_pending_entries()
+        return self.__row_ids
+
+    @property
+    def movie_ids(self) -> np.ndarray:
+        """Identifiers of movies sorted in ascending order."""
+        # new movies are merged when they are added
+        return self.__movie_ids
+
+    @property
+    def n_pending_entries(self) -> int:
+        """Number of entries added since the last merge."""
+        return len(self.__pending_rows)
+
+    @property
+    def n_rows(self) -> int:
+        """Number of rows of matrix."""
+        return len(self.row_index)
+
+    def add_entry(self, row_id: Hashable, movie_id: Hashable) -> bool:
+        """Adds an entry in time independent of the number of entries. Unknown identifiers create a new row or column.
+
+        New rows are appended after the rows of the merged matrix, new movies are merged immediately, so that column positions stay ordered like movie_ids.
+
+        Args:
+            row_id (Hashable): identifier of row
+            movie_id (Hashable): identifier of movie
+
+        Returns:
+            bool: False if the entry already existed
+        """
+        row = self.row_index.get(row_id)
+        if row is None:
+            row = len(self.row_index)
+            self.row_index[row_id] = row
+            self.__new_row_ids.append(row_id)
+        column = self.movie_index.get(movie_id)
+        if column is None:
+            column = len(self.movie_index)
+            self.movie_index[movie_id] = column
+            self.__new_movie_ids.append(movie_id)
+            if column == len(self.__movie_counts):
+                # double capacity of counts
+                self.__movie_counts = np.concatenate(
+                    [self.__movie_counts, np.zeros(max(column, 1), dtype=np.int64)]
+                )
+        if (row, column) in self.__pending_entries:
+            return False
+        if column < self.__matrix.shape[1] and row < self.__matrix.shape[0]:
+            # rows of every column are sorted, so existing entries are found by binary search
+            column_rows = self.__matrix.indices[
+                self.__matrix.indptr[column] : self.__matrix.indptr[column + 1]
+            ]
+            position = np.searchsorted(column_rows, row)
+            if position < len(column_rows) and column_rows[position] == row:
+                return False
+        self.__pending_entries.add((row, column))
+        self.__pending_rows.append(row)
+        self.__pending_columns.append(column)
+        self.__pending_rows_of_columns.setdefault(column, []).append(row)
+        self.__pending_columns_of_rows.setdefault(row, []).append(column)
+        self.__movie_counts[column] += 1
+        if self.__new_movie_ids or len(self.__pending_rows) > max(
+            MovieMatrix.MIN_MERGE_SIZE, self.__matrix.nnz * MovieMatrix.MERGE_SHARE
+        ):
+            self.__merge_pending_entries()
+        return True
+
+    def get_pending_entries(self, start=0) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns positions of the entries added since the last merge, so that derived indexes can be updated instead of rebuilt.
+
+        Args:
+            start (int, optional): number of added entries to skip. Defaults to 0.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: row and column positions of added entries in the order they were added, valid until layout_version changes
+        """
+        return (
+            np.array(self.__pending_rows[start:], dtype=np.int64),
+            np.array(self.__pending_columns[start:], dtype=np.int64),
+        )
+
+    def get_rows_of_column(self, column: int) -> np.ndarray:
+        """Reads the rows related to a movie, including added entries.
+
+        Args:
+            column (int): column position of movie
+
+        Returns:
+            np.ndarray: positions of rows, rows of the merged matrix in ascending order followed by added rows
+        """
+        rows = self.__matrix.indices[
+            self.__matrix.indptr[column] : self.__matrix.indptr[column + 1]
+        ]
+        pending_rows = self.__pending_rows_of_columns.get(column)
+        if pending_rows is None:
+            return rows
+        return np.concatenate([rows, np.array(pending_rows, dtype=rows.dtype)])
+
+    def get_columns_of_rows(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Reads the movies related to several rows at once, including added entries.
+
+        Args:
+            rows (np.ndarray): row positions
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: for every related movie the index of its row in rows and its column position
+        """
+        return self.__get_columns_of_rows(rows, include_pending=True)
+
+    def __get_columns_of_rows(
+        self, rows: np.ndarray, include_pending: bool
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Reads the movies related to several rows at once.
+
+        Args:
+            rows (np.ndarray): row positions
+            include_pending (bool): whether added entries are included
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: for every related movie the index of its row in rows and its column position
+        """
+        if self.__rows_matrix is None:
+            self.__rows_matrix = self.__matrix.tocsr()
+        rows = np.asarray(rows, dtype=np.int64)
+        # added rows have no movies in the merged matrix
+        merged = rows < self.__rows_matrix.shape[0]
+        starts = np.zeros(len(rows), dtype=np.int64)
+        lengths = np.zeros(len(rows), dtype=np.int64)
+        starts[merged] = self.__rows_matrix.indptr[rows[merged]]
+        lengths[merged] = self.__rows_matrix.indptr[rows[merged] + 1] - starts[merged]
+        owners = np.repeat(np.arange(len(rows)), lengths)
+        # positions of the movies of all rows, row by row
+        positions = np.repeat(
+            starts - np.cumsum(lengths) + lengths, lengths
+        ) + np.arange(lengths.sum())
+        columns = self.__rows_matrix.indices[positions].astype(np.int64)
+        if include_pending and self.__pending_columns_of_rows:
+            pending = [
+                (owner, column)
+                for owner, row in enumerate(rows.tolist())
+                for column in self.__pending_columns_of_rows.get(row, ())
+            ]
+            if pending:
+                pending_owners, pending_columns = np.array(pending, dtype=np.int64).T
+                owners = np.concatenate([owners, pending_owners])
+                columns = np.concatenate([columns, pending_columns])
+        return owners, columns
+
+    @Instrumentation.instrument("matrix.merge_pending_entries")
+    def __merge_pending_entries(self) -> None:
+        """Merges added entries into matrix, so that identifiers stay sorted in ascending order."""
+        if (
+            not self.__pending_entries
+            and not self.__new_row_ids
+            and not self.__new_movie_ids
+        ):
+            return
+        existing = self.__matrix.tocoo()
+        rows = np.concatenate(
+            [existing.row, np.array(self.__pending_rows, dtype=existing.row.dtype)]
+        )
+        columns = np.concatenate(
+            [existing.col, np.array(self.__pending_columns, dtype=existing.col.dtype)]
+        )
+        row_ids = np.concatenate(
+            [self.__row_ids, np.array(self.__new_row_ids, dtype=self.__row_ids.dtype)]
+        )
+        movie_ids = np.concatenate(
+            [
+                self.__movie_ids,
+                np.array(self.__new_movie_ids, dtype=self.__movie_ids.dtype),
+            ]
+        )
+        # sort identifiers and move entries to the sorted positions
+        row_order = np.argsort(row_ids, kind="stable")
+        row_positions = np.empty_like(row_order)
+        row_positions[row_order] = np.arange(len(row_order))
+        movie_order = np.argsort(movie_ids, kind="stable")
+        movie_positions = np.empty_like(movie_order)
+        movie_positions[movie_order] = np.arange(len(movie_order))
+        self.__matrix = sparse.csc_matrix(
+            (
+                np.ones(len(rows), dtype=np.uint8),
+                (row_positions[rows], movie_positions[columns]),
+            ),
+            shape=(len(row_ids), len(movie_ids)),
+        )
+        self.__row_ids = row_ids[row_order]
+        self.__movie_ids = movie_ids[movie_order]
+        self.__index()
+        self.layout_version += 1
+
+    def get_movie_counts(self) -> np.ndarray:
+        """Counts the entries of every movie.
+
+        Returns:
+            np.ndarray: number of rows related to each movie, ordered like movie_ids
+        """
+        return self.__movie_counts[: len(self.movie_index)].copy()
+
+    def get_correlations(self, movie_id: int) -> np.ndarray:
+        """Calculates the Pearson correlation of a movie with every movie in the matrix.
+
+        Args:
+            movie_id (int): identifier of movie
+
+        Raises:
+            KeyError: if movie_id is not in matrix
+
+        Returns:
+            np.ndarray: correlations ordered like movie_ids, nan where correlation is not defined
+        """
+        column = self.movie_index[movie_id]
+        return self.get_correlations_of_columns(np.array([column]))[0]
+
+    @Instrumentation.instrument("matrix.correlations")
+    def get_correlations_of_columns(
+        self, columns: np.ndarray, other_columns: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Calculates the Pearson correlation of several movies with every movie in the matrix at once.
+
+        For binary columns the correlation is obtained from counts only, where n is the number of rows, a_i the count of movie i and c the count of rows containing both movies: (n * c - a_1 * a_2) / sqrt(a_1 * (n - a_1) * a_2 * (n - a_2))
+
+        Rows containing both movies are counted in the merged matrix, entries added since the last merge are counted separately, so that the matrix is not merged.
+
+        Args:
+            columns (np.ndarray): column positions of movies, taken from movie_index
+            other_columns (Optional[np.ndarray], optional): column positions of movies the correlations are calculated with. Defaults to None, which uses all movies.
+
+        Returns:
+            np.ndarray: correlations of shape (len(columns), number of other movies), nan where correlation is not defined
+        """
+        matrix = self.__matrix
+        counts = self.get_movie_counts().astype(np.float64)
+        other_matrix = matrix
+        other_counts = counts
+        if other_columns is not None:
+            other_matrix = matrix[:, other_columns]
+            other_counts = counts[other_columns]
+        # count rows containing each given movie and every other movie, cast to avoid uint8 overflow
+        co_counts = (
+            (matrix[:, columns].T.astype(np.int32) @ other_matrix)
+            .toarray()
+            .astype(np.float64)
+        )
+        if self.__pending_rows:
+            co_counts += self.__get_pending_co_counts(columns, other_columns)
+        return MovieMatrix.get_correlations_of_counts(
+            self.n_rows, co_counts, counts[columns], other_counts
+        )
+
+    def __get_pending_co_counts(
+        self, columns: np.ndarray, other_columns: Optional[np.ndarray]
+    ) -> np.ndarray:
+        """Counts the rows containing each given movie and every other movie, in which at least one of both entries was added since the last merge.
+
+        Args:
+            columns (np.ndarray): column positions of movies
+            other_columns (Optional[np.ndarray]): column positions of other movies, None for all movies
+
+        Returns:
+            np.ndarray: counts of shape (len(columns), number of other movies)
+        """
+        n_movies = len(self.movie_index)
+        column_positions = np.full(n_movies, -1, dtype=np.int64)
+        column_positions[columns] = np.arange(len(columns))
+        if other_columns is None:
+            other_positions = np.arange(n_movies)
+        else:
+            other_positions = np.full(n_movies, -1, dtype=np.int64)
+            other_positions[other_columns] = np.arange(len(other_columns))
+        co_counts = np.zeros(
+            (len(columns), n_movies if other_columns is None else len(other_columns))
+        )
+        pending_rows, pending_columns = self.get_pending_entries()
+        # added entries of other movies pair with all entries of their rows
+        selected = other_positions[pending_columns] >= 0
+        owners, row_columns = self.__get_columns_of_rows(
+            pending_rows[selected], include_pending=True
+        )
+        pairs = column_positions[row_columns] >= 0
+        np.add.at(
+            co_counts,
+            (
+                column_positions[row_columns[pairs]],
+                other_positions[pending_columns[selected]][owners[pairs]],
+            ),
+            1,
+        )
+        # added entries of given movies pair with the merged entries of their rows
+        selected = column_positions[pending_columns] >= 0
+        owners, row_columns = self.__get_columns_of_rows(
+            pending_rows[selected], include_pending=False
+        )
+        pairs = other_positions[row_columns] >= 0
+        np.add.at(
+            co_counts,
+            (
+                column_positions[pending_columns[selected]][owners[pairs]],
+                other_positions[row_columns[pairs]],
+            ),
+            1,
+        )
+        return co_counts
+
+    @staticmethod
+    def get_correlations_of_counts(
+        n: int, co_counts: np.ndarray, counts: np.ndarray, other_counts: np.ndarray
+    ) -> np.ndarray:
+        """Calculates Pearson correlations of binary columns from their counts.
+
+        Args:
+            n (int): number of rows
+            co_counts (np.ndarray): number of rows containing both movies, of shape (len(counts), len(other_counts))
+            counts (np.ndarray): number of rows containing each movie
+            other_counts (np.ndarray): number of rows containing each other movie
+
+        Returns:
+            np.ndarray: correlations of shape (len(counts), len(other_counts)), nan where correlation is not defined
+        """
+        counts = counts.astype(np.float64)[:, None]
+        other_counts = other_counts.astype(np.float64)[None, :]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            correlations = (n * co_counts - counts * other_counts) / np.sqrt(
+                counts * (n - counts) * other_counts * (n - other_counts)
+            )
+        # remove floating point noise so that equal correlations compare equal
+        return np.round(correlations, 12)
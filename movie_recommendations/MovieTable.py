@@ -0,0 +1,223 @@
+# imports
+from typing import List, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+# import movie recommendations modules
+from movie_recommendations.IdentifierIndex import IdentifierIndex
+from movie_recommendations.MovieBase import MovieBase
+
+
+def encode_strings(values: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenates strings to UTF-8 bytes with offsets.
+
+    Args:
+        values (Sequence[str]): strings to be encoded
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: bytes of all strings with dtype uint8 and offsets of every string with dtype int64
+    """
+    values = list(map(str, values))
+    lengths = list(map(len, values))
+    # strings are encoded at once, lengths in characters equal lengths in bytes unless a character is not ASCII
+    data = "".join(values).encode("utf-8")
+    if len(data) != sum(lengths):
+        lengths = [len(value.encode("utf-8")) for value in values]
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return np.frombuffer(data, dtype=np.uint8), offsets
+
+
+def decode_string(data: np.ndarray, offsets: np.ndarray, position: int) -> str:
+    """Decodes one string encoded by encode_strings.
+
+    Args:
+        data (np.ndarray): bytes of all strings
+        offsets (np.ndarray): offsets of every string
+        position (int): position of string
+
+    Returns:
+        str: decoded string
+    """
+    return data[offsets[position] : offsets[position + 1]].tobytes().decode("utf-8")
+
+
+class MovieTable:
+    """Stores the characteristics of all movies column by column in typed arrays.
+
+    Names are stored as concatenated UTF-8 bytes with offsets and genres as codes into a vocabulary of genre names, so that the table holds no Python object per movie. Movies are handed out as MovieView instances, which read their attributes from the table.
+
+    Attributes:
+        movie_ids (np.ndarray): identifier of every row
+        name_data (np.ndarray): UTF-8 bytes of all names with dtype uint8
+        name_offsets (np.ndarray): name of row i is name_data[name_offsets[i]:name_offsets[i + 1]]
+        years (np.ndarray): year of every row
+        genre_names (np.ndarray): vocabulary of genre names sorted in ascending order
+        genre_offsets (np.ndarray): genres of row i are genre_codes[genre_offsets[i]:genre_offsets[i + 1]]
+        genre_codes (np.ndarray): positions in genre_names in the order of the keyword columns
+        ratings (np.ndarray): rating of every row
+        prices (np.ndarray): price of every row
+    """
+
+    def __init__(
+        self,
+        movie_ids: np.ndarray,
+        name_data: np.ndarray,
+        name_offsets: np.ndarray,
+        years: np.ndarray,
+        genre_names: np.ndarray,
+        genre_offsets: np.ndarray,
+        genre_codes: np.ndarray,
+        ratings: np.ndarray,
+        prices: np.ndarray,
+    ) -> None:
+        self.movie_ids = movie_ids
+        self.name_data = name_data
+        self.name_offsets = name_offsets
+        self.years = years
+        self.genre_names = genre_names
+        self.genre_offsets = genre_offsets
+        self.genre_codes = genre_codes
+        self.ratings = ratings
+        self.prices = prices
+        self.__rows = IdentifierIndex(movie_ids)
+
+    @classmethod
+    def from_movie_data(cls, movie_data: pd.DataFrame) -> "MovieTable":
+        """Creates table from movie data.
+
+        Args:
+            movie_data (pd.DataFrame): movie data with columns "movie_id", "movie_name", "year", "keyword1", "keyword2", "keyword3", "keyword4", "keyword5", "rating", "price"
+
+        Returns:
+            MovieTable: characteristics of all movies of movie_data
+        """
+        name_data, name_offsets = encode_strings(movie_data["movie_name"].tolist())
+        genre_columns = ["keyword1", "keyword2", "keyword3", "keyword4", "keyword5"]
+        keywords = np.stack(
+            [movie_data[column].to_numpy(dtype=object) for column in genre_columns],
+            axis=1,
+        )
+        # missing genres are dropped, row-major order keeps the order of the keyword columns
+        has_genre = np.stack(
+            [movie_data[column].notna().to_numpy() for column in genre_columns], axis=1
+        )
+        # hashing is faster than sorting all genres, only the vocabulary is sorted
+        genre_codes, genre_names = pd.factorize(keywords[has_genre], sort=True)
+        genre_offsets = np.zeros(len(movie_data) + 1, dtype=np.int64)
+        np.cumsum(has_genre.sum(axis=1), out=genre_offsets[1:])
+        return cls(
+            movie_data["movie_id"].to_numpy(),
+            name_data,
+            name_offsets,
+            movie_data["year"].to_numpy(),
+            np.asarray(genre_names, dtype=object),
+            genre_offsets,
+            genre_codes.astype(np.min_scalar_type(max(len(genre_names) - 1, 0))),
+            movie_data["rating"].to_numpy(),
+            movie_data["price"].to_numpy(),
+        )
+
+    def __len__(self) -> int:
+        """Returns number of movies."""
+        return len(self.movie_ids)
+
+    def get_row(self, movie_id: int) -> int:
+        """Finds row of a movie.
+
+        Args:
+            movie_id (int): identifier of movie
+
+        Raises:
+            KeyError: if there is no movie with movie_id
+
+        Returns:
+            int: row of movie
+        """
+        row = self.__rows.get(movie_id)
+        if row < 0:
+            raise KeyError(f"Movie id {movie_id} does not exist.")
+        return row
+
+    def get_name(self, row: int) -> str:
+        """Decodes name of a row.
+
+        Args:
+            row (int): row of movie
+
+        Returns:
+            str: name of movie
+        """
+        return decode_string(self.name_data, self.name_offsets, row)
+
+    def get_genres(self, row: int) -> List[str]:
+        """Looks up genre names of a row.
+
+        Args:
+            row (int): row of movie
+
+        Returns:
+            List[str]: genres of movie in the order of the keyword columns
+        """
+        return self.genre_names[
+            self.genre_codes[self.genre_offsets[row] : self.genre_offsets[row + 1]]
+        ].tolist()
+
+    def get_movie(self, movie_id: int) -> "MovieView":
+        """Creates view of a movie.
+
+        Args:
+            movie_id (int): identifier of movie
+
+        Raises:
+            KeyError: if there is no movie with movie_id
+
+        Returns:
+            MovieView: movie reading its attributes from the table
+        """
+        return MovieView(self, self.get_row(movie_id))
+
+
+class MovieView(MovieBase):
+    """Movie whose attributes are read from a row of a MovieTable, so that only a reference to the table and the row are stored per instance.
+
+    Attributes:
+        table (MovieTable): table containing the movie
+        row (int): row of movie in table
+    """
+
+    __slots__ = ("table", "row")
+
+    def __init__(self, table: MovieTable, row: int) -> None:
+        self.table = table
+        self.row = row
+
+    @property
+    def identifier(self) -> int:
+        """Unique identifier."""
+        return self.table.movie_ids[self.row]
+
+    @property
+    def name(self) -> str:
+        """Movie name."""
+        return self.table.get_name(self.row)
+
+    @property
+    def year(self) -> int:
+        """The year the movie was first released."""
+        return self.table.years[self.row]
+
+    @property
+    def genres(self) -> List[str]:
+        """Genres in which the movie is classified."""
+        return self.table.get_genres(self.row)
+
+    @property
+    def rating(self) -> float:
+        """Average user review (rating 0-5)."""
+        return self.table.ratings[self.row]
+
+    @property
+    def price(self) -> float:
+        """Price."""
+        return self.table.prices[self.row]
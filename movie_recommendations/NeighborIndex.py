@@ -0,0 +1,199 @@
+# imports
+from typing import Dict, Optional, Sequence
+import numpy as np
+
+# import movie recommendations modules
+from movie_recommendations.Instrumentation import Instrumentation
+from movie_recommendations.MovieMatrix import MovieMatrix
+
+
+class NeighborIndex:
+    """Stores the most correlated movies of every movie in compact arrays.
+
+    The neighbors of the movie at position i in movie_ids are stored in neighbors[indptr[i]:indptr[i + 1]], sorted in descending order by correlation. Movies with equal correlation are sorted in ascending order by movie_id.
+
+    Attributes:
+        movie_ids (np.ndarray): identifiers of indexed movies sorted in ascending order
+        movie_index (Dict[int, int]): maps movie identifier to position in movie_ids
+        indptr (np.ndarray): offsets of the neighbors of every movie
+        neighbors (np.ndarray): identifiers of neighbors
+        correlations (np.ndarray): correlation of every neighbor with its movie
+        n_neighbors (int): maximal number of neighbors stored per movie
+        correlation_threshold (float): correlations with a smaller value are not stored
+    """
+
+    def __init__(
+        self,
+        movie_ids: np.ndarray,
+        indptr: np.ndarray,
+        neighbors: np.ndarray,
+        correlations: np.ndarray,
+        n_neighbors: int,
+        correlation_threshold: float,
+    ) -> None:
+        self.movie_ids = movie_ids
+        self.movie_index: Dict[int, int] = {
+            movie_id: position
+            for position, movie_id in enumerate(self.movie_ids.tolist())
+        }
+        self.indptr = indptr
+        self.neighbors = neighbors
+        self.correlations = correlations
+        self.n_neighbors = n_neighbors
+        self.correlation_threshold = correlation_threshold
+
+    @classmethod
+    @Instrumentation.instrument("neighbor_index.build")
+    def build(
+        cls,
+        movie_matrix: MovieMatrix,
+        correlation_threshold: float,
+        n_neighbors: int,
+        block_size=1024,
+        movie_ids: Optional[Sequence[int]] = None,
+    ) -> "NeighborIndex":
+        """Calculates the n_neighbors most correlated movies of every movie in movie_matrix.
+
+        Correlations are calculated as one matrix product for block_size movies at once, so memory is bounded by block_size times the number of movies.
+
+        Args:
+            movie_matrix (MovieMatrix): relation the correlations are based on
+            correlation_threshold (float): correlations with a smaller value are not stored
+            n_neighbors (int): maximal number of neighbors stored per movie
+            block_size (int, optional): number of movies whose correlations are calculated at once. Defaults to 1024.
+            movie_ids (Optional[Sequence[int]], optional): movies to be indexed, identifiers missing in movie_matrix are skipped. Defaults to None, which indexes all movies.
+
+        Returns:
+            NeighborIndex: neighbors of the indexed movies
+        """
+        if movie_ids is None:
+            indexed_columns = np.arange(len(movie_matrix.movie_ids))
+        else:
+            indexed_columns = np.array(
+                sorted(
+                    {
+                        movie_matrix.movie_index[movie_id]
+                        for movie_id in movie_ids
+                        if movie_id in movie_matrix.movie_index
+                    }
+                ),
+                dtype=np.int64,
+            )
+        n_movies = len(indexed_columns)
+        counts = np.zeros(n_movies, dtype=np.int64)
+        neighbor_columns = []
+        neighbor_correlations = []
+        for block_start in range(0, n_movies, block_size):
+            columns = indexed_columns[block_start : block_start + block_size]
+            block = movie_matrix.get_correlations_of_columns(columns)
+            for position, column, correlations in zip(
+                range(block_start, block_start + len(columns)), columns, block
+            ):
+                candidates = NeighborIndex.select_neighbors(
+                    correlations, correlation_threshold, n_neighbors, excluded=column
+                )
+                counts[position] = len(candidates)
+                neighbor_columns.append(candidates)
+                neighbor_correlations.append(correlations[candidates])
+        indptr = np.zeros(n_movies + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        columns = (
+            np.concatenate(neighbor_columns)
+            if neighbor_columns
+            else np.zeros(0, dtype=np.int64)
+        )
+        return cls(
+            movie_ids=movie_matrix.movie_ids[indexed_columns],
+            indptr=indptr,
+            neighbors=movie_matrix.movie_ids[columns],
+            correlations=(
+                np.concatenate(neighbor_correlations).astype(np.float32)
+                if neighbor_correlations
+                else np.zeros(0, dtype=np.float32)
+            ),
+            n_neighbors=n_neighbors,
+            correlation_threshold=correlation_threshold,
+        )
+
+    @staticmethod
+    def select_neighbors(
+        correlations: np.ndarray,
+        correlation_threshold: float,
+        n_neighbors: int,
+        excluded=-1,
+    ) -> np.ndarray:
+        """Selects positions of the n_neighbors highest correlations.
+
+        Args:
+            correlations (np.ndarray): correlations of candidates ordered by ascending movie id, nan where not defined
+            correlation_threshold (float): correlations with a smaller value are not selected
+            n_neighbors (int): maximal number of selected positions
+            excluded (int, optional): position that is never selected, e.g. the movie itself. Defaults to -1.
+
+        Returns:
+            np.ndarray: selected positions sorted in descending order by correlation, equal correlations in ascending order by position
+        """
+        # keep correlations above threshold, nan values are dropped by comparison
+        candidates = np.flatnonzero(correlations >= correlation_threshold)
+        # remove self correlation
+        candidates = candidates[candidates != excluded]
+        if len(candidates) > n_neighbors > 0:
+            # keep every candidate at least as correlated as the n_neighbors-th one
+            kth_correlation = np.partition(
+                correlations[candidates], len(candidates) - n_neighbors
+            )[len(candidates) - n_neighbors]
+            candidates = candidates[correlations[candidates] >= kth_correlation]
+        # sort stable, so that ties keep ascending movie_id order
+        return candidates[np.argsort(-correlations[candidates], kind="stable")][
+            :n_neighbors
+        ]
+
+    @classmethod
+    def load(cls, path: str) -> "NeighborIndex":
+        """Loads index stored by save.
+
+        Args:
+            path (str): path of .npz file
+
+        Returns:
+            NeighborIndex: loaded index
+        """
+        with np.load(path) as arrays:
+            return cls(
+                movie_ids=arrays["movie_ids"],
+                indptr=arrays["indptr"],
+                neighbors=arrays["neighbors"],
+                correlations=arrays["correlations"],
+                n_neighbors=int(arrays["n_neighbors"]),
+                correlation_threshold=float(arrays["correlation_threshold"]),
+            )
+
+    def save(self, path: str) -> None:
+        """Stores index as .npz file.
+
+        Args:
+            path (str): path of .npz file
+        """
+        np.savez(
+            path,
+            movie_ids=self.movie_ids,
+            indptr=self.indptr,
+            neighbors=self.neighbors,
+            correlations=self.correlations,
+            n_neighbors=self.n_neighbors,
+            correlation_threshold=self.correlation_threshold,
+        )
+
+    def get_neighbors(self, movie_id: int) -> np.ndarray:
+        """Returns neighbors of a movie sorted in descending order by correlation.
+
+        Args:
+            movie_id (int): identifier of movie
+
+        Returns:
+            np.ndarray: identifiers of neighbors, empty if movie is not indexed
+        """
+        position = self.movie_index.get(movie_id)
+        if position is None:
+            return self.neighbors[:0]
+        return self.neighbors[self.indptr[position] : self.indptr[position + 1]]
@@ -0,0 +1,180 @@
+# imports
+import os
+from os.path import join
+from typing import Dict
+import numpy as np
+from scipy import sparse
+
+# import movie recommendations modules
+from movie_recommendations.DataManager import DataManager
+from movie_recommendations.Instrumentation import Instrumentation
+
+
+class PersonalizedIndex:
+    """Stores the n_recommendations best movies for every user in fixed-size arrays.
+
+    Recommendations of the user at position i in user_ids are stored in movie_ids[i], sorted in descending order by score. Movies with equal score are sorted in ascending order by movie_id. Users with fewer recommendations are padded with -1.
+
+    Attributes:
+        user_ids (np.ndarray): identifiers of users sorted in ascending order
+        user_index (Dict[int, int]): maps user identifier to position in user_ids
+        movie_ids (np.ndarray): recommended movies of shape (number of users, n_recommendations)
+        scores (np.ndarray): score of every recommended movie, 0 for padding
+        n_recommendations (int): maximal number of recommendations per user
+    """
+
+    FILES = ["user_ids", "movie_ids", "scores"]
+
+    def __init__(
+        self, user_ids: np.ndarray, movie_ids: np.ndarray, scores: np.ndarray
+    ) -> None:
+        self.user_ids = user_ids
+        self.user_index: Dict[int, int] = {
+            user_id: position for position, user_id in enumerate(self.user_ids.tolist())
+        }
+        self.movie_ids = movie_ids
+        self.scores = scores
+        self.n_recommendations = movie_ids.shape[1]
+
+    @classmethod
+    @Instrumentation.instrument("personalized_index.build")
+    def build(
+        cls,
+        data_manager: DataManager,
+        n_recommendations=10,
+        view_weight=0.5,
+        max_chunk_bytes=1 << 28,
+    ) -> "PersonalizedIndex":
+        """Scores every movie for every user by item-item co-occurrence and keeps the best movies not purchased yet.
+
+        Two movies co-occur once for every user who purchased both. The score of a movie for a user is the sum of its co-occurrences with the movies in the user's history. Purchased movies count with weight 1, movies only viewed with view_weight. Users are scored in chunks of sparse matrix products, so that scores of at most max_chunk_bytes exist at once.
+
+        Args:
+            data_manager (DataManager): manages data associated with users, movies and user sessions
+            n_recommendations (int, optional): maximal number of recommendations per user. Defaults to 10.
+            view_weight (float, optional): weight of viewed but not purchased movies in history. Defaults to 0.5.
+            max_chunk_bytes (int, optional): memory of scores of one chunk of users if every movie gets a score. Defaults to 256 MiB.
+
+        Returns:
+            PersonalizedIndex: recommendations of every user of data_manager
+        """
+        purchases_of_movies = data_manager.purchases_of_movies
+        purchases = purchases_of_movies.matrix
+        movie_ids = purchases_of_movies.movie_ids
+        user_ids = np.unique(data_manager.user_table.user_ids)
+        n_users, n_movies = len(user_ids), len(movie_ids)
+
+        # co-occurrence of movies, a movie does not co-occur with itself
+        co_occurrences = (purchases.T.astype(np.int32) @ purchases).tocsr()
+        co_occurrences.setdiag(0)
+        co_occurrences.eliminate_zeros()
+
+        # purchases and views of all users, movies without purchases have no co-occurrences
+        purchases = purchases.tocoo()
+        purchased = sparse.csr_matrix(
+            (
+                np.ones(purchases.nnz),
+                (
+                    np.searchsorted(
+                        user_ids, purchases_of_movies.row_ids[purchases.row]
+                    ),
+                    purchases.col,
+                ),
+            ),
+            shape=(n_users, n_movies),
+        )
+        view_user_ids, view_movie_ids = data_manager.get_views()
+        columns = np.searchsorted(movie_ids, view_movie_ids)
+        is_purchased_movie = columns < n_movies
+        is_purchased_movie[is_purchased_movie] = (
+            movie_ids[columns[is_purchased_movie]] == view_movie_ids[is_purchased_movie]
+        )
+        viewed = sparse.csr_matrix(
+            (
+                np.ones(is_purchased_movie.sum()),
+                (
+                    np.searchsorted(user_ids, view_user_ids[is_purchased_movie]),
+                    columns[is_purchased_movie],
+                ),
+            ),
+            shape=(n_users, n_movies),
+        )
+        # duplicated pairs are summed up during conversion, but relations are binary
+        purchased.data[:] = 1
+        viewed.data[:] = view_weight
+        history = purchased.maximum(viewed).tocsr()
+
+        n_recommendations = min(n_recommendations, n_movies)
+        recommended = np.full((n_users, n_recommendations), -1, dtype=movie_ids.dtype)
+        scores = np.zeros((n_users, n_recommendations), dtype=np.float32)
+        # upper bound of bytes per user is reached if every movie gets a score
+        chunk_size = max(1, max_chunk_bytes // max(12 * n_movies, 1))
+        for start in range(0, n_users, chunk_size):
+            chunk = slice(start, min(start + chunk_size, n_users))
+            chunk_scores = (history[chunk] @ co_occurrences).tocsr()
+            # do not recommend movies that were already purchased
+            chunk_scores = chunk_scores - chunk_scores.multiply(purchased[chunk])
+            chunk_scores.eliminate_zeros()
+            for row in range(chunk_scores.shape[0]):
+                row_slice = slice(
+                    chunk_scores.indptr[row], chunk_scores.indptr[row + 1]
+                )
+                row_scores = chunk_scores.data[row_slice]
+                row_columns = chunk_scores.indices[row_slice]
+                candidates = np.arange(len(row_scores))
+                if len(row_scores) > n_recommendations > 0:
+                    # keep every score at least as high as the n_recommendations-th one
+                    kth_score = np.partition(
+                        row_scores, len(row_scores) - n_recommendations
+                    )[len(row_scores) - n_recommendations]
+                    candidates = np.flatnonzero(row_scores >= kth_score)
+                # columns of a row are not sorted, so ties are ordered by ascending column explicitly
+                selected = candidates[
+                    np.lexsort((row_columns[candidates], -row_scores[candidates]))
+                ][:n_recommendations]
+                recommended[start + row, : len(selected)] = movie_ids[
+                    row_columns[selected]
+                ]
+                scores[start + row, : len(selected)] = row_scores[selected]
+        return cls(user_ids, recommended, scores)
+
+    @classmethod
+    def load(cls, directory: str) -> "PersonalizedIndex":
+        """Loads index stored by save, arrays are memory-mapped.
+
+        Args:
+            directory (str): directory of index
+
+        Returns:
+            PersonalizedIndex: loaded index
+        """
+        arrays = {
+            name: np.load(join(directory, f"{name}.npy"), mmap_mode="r")
+            for name in PersonalizedIndex.FILES
+        }
+        return cls(**arrays)
+
+    def save(self, directory: str) -> None:
+        """Stores every array as .npy file.
+
+        Args:
+            directory (str): directory of index, created if it does not exist
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in PersonalizedIndex.FILES:
+            np.save(join(directory, f"{name}.npy"), getattr(self, name))
+
+    def get_recommendations(self, user_id: int) -> np.ndarray:
+        """Returns recommended movies of a user sorted in descending order by score.
+
+        Args:
+            user_id (int): identifier of user
+
+        Returns:
+            np.ndarray: identifiers of recommended movies, empty if user is not indexed
+        """
+        position = self.user_index.get(user_id)
+        if position is None:
+            return np.array([], dtype=self.movie_ids.dtype)
+        recommended = self.movie_ids[position]
+        return recommended[recommended != -1]
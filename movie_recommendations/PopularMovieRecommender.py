@@ -1,10 +1,14 @@
 # imports
-from typing import List
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 import pandas as pd
 
 # import movie recommendations modules
 from movie_recommendations.DataManager import DataManager
-from movie_recommendations.Movie import Movie
+from movie_recommendations.DecayedPurchaseCounter import DecayedPurchaseCounter
+from movie_recommendations.Instrumentation import Instrumentation
+from movie_recommendations.LRUCache import LRUCache
+from movie_recommendations.MovieBase import MovieBase
 
 
 class PopularMovieRecommender:
@@ -12,10 +16,27 @@ class PopularMovieRecommender:
 
     Attributes:
         data_manager (DataManager): manages data associated with users, movies and user sessions
+        purchase_counter (Optional[DecayedPurchaseCounter]): time-decayed purchase counters used instead of all purchases of data_manager, so that recent purchases count more. None if all purchases count equally.
+        result_cache (Optional[LRUCache]): identifiers of popular movies per number of movies and weight_rating, cleared whenever data or purchase counters change, None if caching is disabled
     """
 
-    def __init__(self, data_manager: DataManager) -> None:
+    def __init__(
+        self,
+        data_manager: DataManager,
+        purchase_counter: Optional[DecayedPurchaseCounter] = None,
+        cache_size: Optional[int] = None,
+    ) -> None:
         self.data_manager = data_manager
+        self.purchase_counter = purchase_counter
+        # results are reused until data or purchase counters change
+        self.result_cache = LRUCache(cache_size) if cache_size else None
+        self.__result_cache_version = self.__get_version()
+        # total scores per weight_rating together with data and counter version they were calculated for
+        self.__total_scores_cache: Dict[
+            float, Tuple[Tuple[int, int], np.ndarray, np.ndarray]
+        ] = {}
+        # rating scores together with data version they were calculated for
+        self.__rating_scores_cache: Optional[Tuple[int, pd.DataFrame]] = None
 
     def __calculate_rating_scores(self) -> pd.DataFrame:
         """Calculates scores indicating popularity of movies based on user ratings.
@@ -23,49 +44,66 @@ class PopularMovieRecommender:
         Returns:
             pd.DataFrame: Contains scores based on ratings sorted in ascending order by movie_id. Scores range between lowest score 0 and highest score 1.
         """
+        data_version = self.data_manager.data_version
+        # ratings do not change with purchase counters, so that they are only recalculated if data changed
+        if (
+            self.__rating_scores_cache is not None
+            and self.__rating_scores_cache[0] == data_version
+        ):
+            return self.__rating_scores_cache[1].copy()
+        # typed table is read instead of movie_data, so that loading a snapshot needs no decoding of strings
+        movie_table = self.data_manager.movie_table
         # get highest rating
-        highest_rating = self.data_manager.movie_data["rating"].max()
-        # get rating for each movie
-        scores_rating = self.data_manager.movie_data[["movie_id", "rating"]].copy(
-            deep=True
-        )
+        highest_rating = movie_table.ratings.max()
         # get rating score for each movie
-        scores_rating["rating"] = scores_rating["rating"].div(highest_rating)
-        # rename column containing score
-        scores_rating.rename(columns={"rating": "score"}, inplace=True)
+        scores_rating = pd.DataFrame(
+            {
+                "movie_id": np.asarray(movie_table.movie_ids),
+                "score": movie_table.ratings / highest_rating,
+            }
+        )
         # sort by ascending movie identifier
         scores_rating = scores_rating.sort_values(by="movie_id").reset_index(drop=True)
-        return scores_rating
+        self.__rating_scores_cache = (data_version, scores_rating)
+        return scores_rating.copy()
 
     def __calculate_purchase_scores(self) -> pd.DataFrame:
         """Calculates scores indicating popularity of movies based on how often they were purchased.
 
+        If there are purchase counters, the share of every movie in all time-decayed purchases is used instead of the share in all purchases.
+
         Returns:
             pd.DataFrame: Contains scores based on purchases sorted in ascending order by movie_id. Scores range between lowest score 0 and highest score 1.
         """
-        # get total purchase sum
-        total_purchases_of_movies = (
-            self.data_manager.purchases_of_movies.to_numpy().sum()
-        )
-        # get purchase sum for each movie
-        purchases_of_movie = self.data_manager.purchases_of_movies.sum()
-        # get purchases score for each movie by dividing by totoal_purchases_of_movies
-        scores_purchases = pd.DataFrame(
-            purchases_of_movie.div(total_purchases_of_movies), columns=["score"]
+        if self.purchase_counter is not None:
+            # counters are maintained per event, no purchase history is read
+            purchased_movie_ids = self.purchase_counter.movie_ids
+            shares = self.purchase_counter.get_shares()
+        else:
+            purchases_of_movies = self.data_manager.purchases_of_movies
+            purchased_movie_ids = purchases_of_movies.movie_ids
+            # get purchase sum for each movie
+            purchases_of_movie = purchases_of_movies.get_movie_counts()
+            # get total purchase sum
+            total_purchases_of_movies = purchases_of_movie.sum()
+            # get share of every movie in all purchases, all 0 if there are no purchases
+            shares = (
+                purchases_of_movie / total_purchases_of_movies
+                if total_purchases_of_movies > 0
+                else np.zeros(len(purchases_of_movie))
+            )
+        # align shares with movies by movie_id, movies without purchases score 0
+        movie_ids = np.sort(self.data_manager.movie_table.movie_ids)
+        return pd.DataFrame(
+            {
+                "movie_id": movie_ids,
+                "score": pd.Series(shares, index=purchased_movie_ids)
+                .reindex(movie_ids, fill_value=0)
+                .to_numpy(),
+            }
         )
-        # join scores with movie ids
-        movie_ids = pd.DataFrame(self.data_manager.movie_data["movie_id"])
-        scores_purchases = (
-            scores_purchases.join(movie_ids, on="movie_id", how="outer")
-            .reset_index(drop=True)
-            .fillna(0)
-        )
-        # sort by ascending movie identifier
-        scores_purchases = scores_purchases.sort_values(by="movie_id").reset_index(
-            drop=True
-        )
-        return scores_purchases
 
+    @Instrumentation.instrument("popular.total_scores")
     def __calculate_total_scores(
         self, weight_rating=0.85
     ) -> pd.DataFrame:  # TODO instead of weight_rating ratio of rating and purchases
@@ -79,43 +117,164 @@ class PopularMovieRecommender:
         """
         scores_rating = self.__calculate_rating_scores()
         scores_purchases = self.__calculate_purchase_scores()
+        # calculate total score
+        total_scores = scores_rating
+        total_scores["score"] = PopularMovieRecommender.weight_scores(
+            scores_rating["score"].to_numpy(),
+            scores_purchases["score"].to_numpy(),
+            weight_rating,
+        )
+        return total_scores
+
+    @staticmethod
+    def weight_scores(
+        rating_scores: np.ndarray, purchase_scores: np.ndarray, weight_rating: float
+    ) -> np.ndarray:
+        """Weights scores based on ratings and purchases into total scores.
+
+        Args:
+            rating_scores (np.ndarray): scores based on ratings, see get_factor_scores
+            purchase_scores (np.ndarray): scores based on purchases of the same movies
+            weight_rating (float): Defines the weighting with which the rating is included in the calculation.
+
+        Raises:
+            ValueError: if weight_rating is not in interval [0, 1]
+
+        Returns:
+            np.ndarray: total scores of the movies
+        """
         # make sure that input value for weight is in correct interval
         if weight_rating > 1 or weight_rating < 0:
             raise ValueError(f"Input value for weight should be in interval [0, 1].")
         # both weights sum up to 1
         weight_purchases = 1 - weight_rating
-        # weight scores
-        scores_rating["score"] = scores_rating["score"].mul(weight_rating)
-        scores_purchases["score"] = scores_purchases["score"].mul(weight_purchases)
-        # calculate total score
-        total_scores = scores_rating.copy(deep=True)
-        total_scores["score"] = scores_rating["score"] + scores_purchases["score"]
-        return total_scores
+        # weight scores and calculate total score
+        return rating_scores * weight_rating + purchase_scores * weight_purchases
+
+    def get_factor_scores(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Calculates the scores based on ratings and on purchases that get_popular_movies weights, e.g. to evaluate many weight_rating values at once.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: movie identifiers in ascending order, their scores based on ratings and their scores based on purchases
+        """
+        scores_rating = self.__calculate_rating_scores()
+        scores_purchases = self.__calculate_purchase_scores()
+        return (
+            scores_rating["movie_id"].to_numpy(),
+            scores_rating["score"].to_numpy(),
+            scores_purchases["score"].to_numpy(),
+        )
+
+    def __get_version(self) -> Tuple[int, int]:
+        """Returns versions of data and purchase counters scores are calculated from.
+
+        Returns:
+            Tuple[int, int]: data version and version of purchase counters, 0 if there are none
+        """
+        return (
+            self.data_manager.data_version,
+            self.purchase_counter.version if self.purchase_counter is not None else 0,
+        )
+
+    def __get_total_scores(self, weight_rating: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns total scores of movies, which are only recalculated if weight_rating is new or data or purchase counters changed.
+
+        Args:
+            weight_rating (float): Defines the weighting with which the rating is included in the calculation.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: movie identifiers in ascending order and their total scores
+        """
+        data_version = self.__get_version()
+        cached = self.__total_scores_cache.get(weight_rating)
+        if cached is not None and cached[0] == data_version:
+            return cached[1], cached[2]
+        total_scores = self.__calculate_total_scores(weight_rating)
+        movie_ids = total_scores["movie_id"].to_numpy()
+        scores = total_scores["score"].to_numpy()
+        self.__total_scores_cache[weight_rating] = (data_version, movie_ids, scores)
+        return movie_ids, scores
 
-    def get_popular_movies(self, n_popular_movies: int) -> List[Movie]:
+    @Instrumentation.instrument("popular.get_popular_movies")
+    def get_popular_movies(
+        self, n_popular_movies: int, weight_rating=0.85
+    ) -> List[MovieBase]:
         """Creates list of n_popular_movies most popular movies based on purchase rate and user rating.
 
         Args:
             n_popular_movies (int): number of popular movies to be returned
+            weight_rating (float, optional): Defines the weighting with which the rating is included in the calculation. Defaults to 0.85.
 
         Returns:
-            List[Movie]: contains n_popular_movies popular movies
+            List[MovieBase]: contains n_popular_movies popular movies, movies with equal score are sorted in ascending order by movie_id
         """
-        # receive total scores for movies
-        total_movie_scores = self.__calculate_total_scores()
-        # sort dataframe by scores in descending order
-        movie_scores_sorted_by_score = total_movie_scores.sort_values(
-            by="score", ascending=False
-        )
-        # select ids of n_popular_movies highest scored movies
-        highly_scored_movies_id = movie_scores_sorted_by_score["movie_id"].iloc[
-            0:n_popular_movies
-        ]
+        if self.result_cache is None:
+            highly_scored_movies_id = self.__select_popular_movie_ids(
+                n_popular_movies, weight_rating
+            )
+        else:
+            version = self.__get_version()
+            if self.__result_cache_version != version:
+                self.result_cache.clear()
+                self.__result_cache_version = version
+            key = (n_popular_movies, weight_rating)
+            highly_scored_movies_id = self.result_cache.get(key)
+            if highly_scored_movies_id is None:
+                highly_scored_movies_id = tuple(
+                    self.__select_popular_movie_ids(n_popular_movies, weight_rating)
+                )
+                self.result_cache.put(key, highly_scored_movies_id)
         # create empty list to collect n_popular_movies highest scored movie objects
-        highly_scored_movies: List[Movie] = []
+        highly_scored_movies: List[MovieBase] = []
         for id in highly_scored_movies_id:
             # create movie object
             movie = self.data_manager.get_movie_by_movie_id(id)
             # add movie object to list
             highly_scored_movies.append(movie)
         return highly_scored_movies
+
+    def __select_popular_movie_ids(
+        self, n_popular_movies: int, weight_rating: float
+    ) -> np.ndarray:
+        """Selects identifiers of the n_popular_movies highest scored movies without result cache.
+
+        Args:
+            n_popular_movies (int): number of popular movies
+            weight_rating (float): Defines the weighting with which the rating is included in the calculation.
+
+        Returns:
+            np.ndarray: identifiers of popular movies, movies with equal score are sorted in ascending order by movie_id
+        """
+        # receive total scores for movies
+        movie_ids, scores = self.__get_total_scores(weight_rating)
+        return PopularMovieRecommender.select_popular_movie_ids(
+            movie_ids, scores, n_popular_movies
+        )
+
+    @staticmethod
+    def select_popular_movie_ids(
+        movie_ids: np.ndarray, scores: np.ndarray, n_popular_movies: int
+    ) -> np.ndarray:
+        """Selects identifiers of the n_popular_movies highest scored movies.
+
+        Args:
+            movie_ids (np.ndarray): movie identifiers in ascending order
+            scores (np.ndarray): total scores of the movies
+            n_popular_movies (int): number of popular movies
+
+        Returns:
+            np.ndarray: identifiers of popular movies, movies with equal score are sorted in ascending order by movie_id
+        """
+        n_popular_movies = max(0, min(n_popular_movies, len(scores)))
+        if n_popular_movies == 0:
+            return movie_ids[:0]
+        # select n_popular_movies highest scores without sorting all scores
+        kth_score = np.partition(scores, len(scores) - n_popular_movies)[
+            len(scores) - n_popular_movies
+        ]
+        # keep ties with the n_popular_movies-th score, ascending position equals ascending movie_id
+        candidates = np.flatnonzero(scores >= kth_score)
+        # sort candidates by score in descending order
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        # select ids of n_popular_movies highest scored movies
+        return movie_ids[candidates[0:n_popular_movies]]
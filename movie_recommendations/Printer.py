@@ -2,7 +2,8 @@
 from typing import List, Literal
 
 # import movie recommendations modules
-from movie_recommendations.Movie import Movie
+from movie_recommendations.MovieBase import MovieBase
+from movie_recommendations.UserBase import UserBase
 
 
 class Printer:
@@ -10,12 +11,12 @@ class Printer:
 
     @staticmethod
     def display_recent_popular_movies(
-        popular_movies: List[Movie],
+        popular_movies: List[MovieBase],
     ) -> None: 
         """Prints text that recommends recent popular products.
 
         Args:
-            popular_movies (List[Movie]): contains movies with highest scores
+            popular_movies (List[MovieBase]): contains movies with highest scores
         """
         # create text to be displayed
         text_to_be_displayed = f"---------> Checkout our most popular movies"
@@ -30,15 +31,15 @@ class Printer:
 
     @staticmethod
     def display_similar_movies(
-        movie: Movie,
-        similar_movies: List[Movie],
+        movie: MovieBase,
+        similar_movies: List[MovieBase],
         based_on: Literal["purchases", "genres"],
     ) -> None:
         """Prints text that recommends similar movies either based on similar genres or based on bought together.
 
         Args:
-            movie (Movie): movie the recommendation is based on
-            similar_movies (List[Movie]): recommendations based on given movie
+            movie (MovieBase): movie the recommendation is based on
+            similar_movies (List[MovieBase]): recommendations based on given movie
             based_on (Literal['purchases', 'genres']): what recommendation is based on
 
         Raises:
@@ -76,3 +77,24 @@ class Printer:
                 # add last movie name to text_to_be_displayed
                 text_to_be_displayed += f' and "{similar_movie.name}"! <---------'
         print(text_to_be_displayed)
+
+    @staticmethod
+    def display_personal_movies(user: UserBase, personal_movies: List[MovieBase]) -> None:
+        """Prints text that recommends movies based on the purchases and views of a user.
+
+        Args:
+            user (UserBase): user the recommendation is made for
+            personal_movies (List[MovieBase]): recommendations for the user
+        """
+        if not personal_movies:
+            return
+        # create text to be displayed
+        text_to_be_displayed = f"---------> {user.name}, you might also like"
+        for n_movie, movie in enumerate(personal_movies):
+            if n_movie < (len(personal_movies) - 1):
+                # add movie name to text_to_be_displayed
+                text_to_be_displayed += f' "{movie.name}",'
+            else:
+                # add last movie name to text_to_be_displayed
+                text_to_be_displayed += f' and "{movie.name}"! <---------'
+        print(text_to_be_displayed)
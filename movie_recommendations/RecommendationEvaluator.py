@@ -0,0 +1,524 @@
+# imports
+import multiprocessing
+from typing import Dict, List, Literal, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+# import movie recommendations modules
+from movie_recommendations.DataManager import DataManager
+from movie_recommendations.GenreBitsetIndex import GenreBitsetIndex
+from movie_recommendations.Instrumentation import Instrumentation
+from movie_recommendations.MovieMatrix import MovieMatrix
+from movie_recommendations.NeighborIndex import NeighborIndex
+from movie_recommendations.PopularMovieRecommender import PopularMovieRecommender
+
+# evaluator used by worker processes, set before the pool is forked so that workers share its score matrices read-only
+_worker_evaluator: Optional["RecommendationEvaluator"] = None
+
+
+def _get_neighbors(
+    task: Tuple[Literal["purchases", "genres"], np.ndarray, float],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Selects the most similar movies of a block of movies.
+
+    Args:
+        task (Tuple[Literal['purchases', 'genres'], np.ndarray, float]): basis of similarity, positions of movies and smallest correlation threshold
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: identifiers and correlations of similar movies, see RecommendationEvaluator.get_neighbors
+    """
+    based_on, columns, correlation_threshold = task
+    return _worker_evaluator.get_neighbors(based_on, columns, correlation_threshold)
+
+
+def _evaluate_weights(weight_ratings: np.ndarray) -> pd.DataFrame:
+    """Calculates the metrics of a chunk of weight_rating values combined with every correlation threshold.
+
+    Args:
+        weight_ratings (np.ndarray): weight_rating values
+
+    Returns:
+        pd.DataFrame: metrics of every grid point, see RecommendationEvaluator.evaluate
+    """
+    return _worker_evaluator.evaluate_weights(weight_ratings)
+
+
+class RecommendationEvaluator:
+    """Evaluates the recommendations of a session offline for a whole grid of weight_rating and correlation_threshold values.
+
+    A random holdout_fraction of the purchases of every user with at least two purchases is held out and the recommenders are trained on the remaining purchases. Every evaluated user looks at one of their remaining purchases (the seed movie) and is shown n_recommendations popular movies and n_recommendations similar movies of the seed movie per basis of similarity, like in the demo of main.py. A recommended movie is a hit if the user purchased it in the held out purchases.
+
+    Scores are calculated once and shared by all grid points: total scores of popular movies are linear in weight_rating, and the similar movies of a correlation threshold are a prefix of the similar movies of the smallest threshold. Hits of similar movies are counted once per threshold, and per weight_rating only the held out purchases of its popular movies are visited, instead of recommending per grid point.
+
+    Attributes:
+        data_manager (DataManager): manages data associated with users, movies and user sessions
+        holdout_fraction (float): share of purchases of every evaluated user that is held out
+        n_recommendations (int): number of popular movies and of similar movies per basis shown to every user
+        based_on (Tuple[str, ...]): bases of similar movies, "purchases" and/or "genres"
+        user_ids (np.ndarray): identifiers of evaluated users in ascending order
+        seed_movie_ids (np.ndarray): identifier of the movie every evaluated user looks at
+        train_purchases (MovieMatrix): purchases that are not held out, rows are users
+        holdout_users (np.ndarray): position in user_ids of the user of every held out purchase
+        holdout_movie_ids (np.ndarray): identifier of the movie of every held out purchase
+    """
+
+    @Instrumentation.instrument("evaluation.split")
+    def __init__(
+        self,
+        data_manager: DataManager,
+        holdout_fraction=0.2,
+        n_recommendations=3,
+        based_on: Sequence[Literal["purchases", "genres"]] = ("purchases", "genres"),
+        seed=0,
+    ) -> None:
+        if holdout_fraction <= 0 or holdout_fraction >= 1:
+            raise ValueError(
+                f"Input value for holdout_fraction should be in interval (0, 1)."
+            )
+        for basis in based_on:
+            if basis not in ["purchases", "genres"]:
+                raise ValueError(f"Input '{basis}' for based_on is not defined.")
+        self.data_manager = data_manager
+        self.holdout_fraction = holdout_fraction
+        self.n_recommendations = n_recommendations
+        self.based_on = tuple(based_on)
+        purchases_of_movies = data_manager.purchases_of_movies
+        matrix = purchases_of_movies.matrix.tocsr()
+        movie_ids = purchases_of_movies.movie_ids
+        n_purchases = np.diff(matrix.indptr)
+        rows = np.repeat(np.arange(len(n_purchases)), n_purchases)
+        # rank purchases of every user in random order
+        order = np.lexsort(
+            (np.random.default_rng(seed).random(len(matrix.indices)), rows)
+        )
+        ranks = np.empty(len(order), dtype=np.int64)
+        ranks[order] = np.arange(len(order)) - matrix.indptr[rows[order]]
+        # users with a single purchase are not evaluated, every evaluated user keeps at least one purchase
+        n_holdout = np.where(
+            n_purchases >= 2,
+            np.maximum(1, np.floor(holdout_fraction * n_purchases)).astype(np.int64),
+            0,
+        )
+        held_out = ranks < n_holdout[rows]
+        evaluated_rows = np.flatnonzero(n_holdout > 0)
+        self.user_ids = purchases_of_movies.row_ids[evaluated_rows]
+        # the first remaining purchase in random order is the seed movie, purchases are ordered by user
+        self.seed_movie_ids = movie_ids[
+            matrix.indices[(ranks == n_holdout[rows]) & (n_holdout[rows] > 0)]
+        ]
+        self.holdout_users = np.searchsorted(evaluated_rows, rows[held_out])
+        self.holdout_movie_ids = movie_ids[matrix.indices[held_out]]
+        self.train_purchases = MovieMatrix.from_pairs(
+            purchases_of_movies.row_ids[rows[~held_out]],
+            movie_ids[matrix.indices[~held_out]],
+        )
+        # held out purchases are ordered by user, every evaluated user has at least one
+        self.__user_starts = np.searchsorted(
+            self.holdout_users, np.arange(len(self.user_ids))
+        )
+        # held out purchases grouped by movie, so that those of popular movies are found without comparing all
+        self.__holdouts_by_movie = np.argsort(self.holdout_movie_ids, kind="stable")
+        self.__sorted_holdout_movie_ids = self.holdout_movie_ids[
+            self.__holdouts_by_movie
+        ]
+        self.__movie_infos: Dict[str, object] = {}
+        self.__popular_scores: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = (
+            None
+        )
+        # similar movies of seed movies per basis together with the threshold they were selected at
+        self.__seed_neighbors: Dict[
+            str, Tuple[float, np.ndarray, np.ndarray, np.ndarray]
+        ] = {}
+        self.__similar_hits: Optional[Dict[str, np.ndarray]] = None
+
+    def __get_movie_info(self, based_on: Literal["purchases", "genres"]) -> object:
+        """Returns data similarity is calculated from, like SimilarMovieRecommender does.
+
+        Args:
+            based_on (Literal['purchases', 'genres']): what similarity is based on
+
+        Returns:
+            object: purchase matrix without held out purchases or genre bitsets
+        """
+        if based_on not in self.__movie_infos:
+            self.__movie_infos[based_on] = (
+                self.train_purchases
+                if based_on == "purchases"
+                else GenreBitsetIndex.from_movie_matrix(
+                    self.data_manager.genres_of_movies, "pearson"
+                )
+            )
+        return self.__movie_infos[based_on]
+
+    def __get_popular_scores(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Calculates the rating and purchase scores of popular movies from the purchases that are not held out.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: movie identifiers in ascending order, their rating scores and purchase scores, see PopularMovieRecommender.get_factor_scores
+        """
+        if self.__popular_scores is None:
+            # scored by PopularMovieRecommender on data whose purchases are the ones not held out
+            train_data_manager = DataManager(
+                self.data_manager.user_data,
+                self.data_manager.movie_data,
+                self.data_manager.session_data,
+                purchases_of_movies=self.train_purchases,
+            )
+            self.__popular_scores = PopularMovieRecommender(
+                train_data_manager
+            ).get_factor_scores()
+        return self.__popular_scores
+
+    def get_popular_movie_ids(self, weight_ratings: Sequence[float]) -> np.ndarray:
+        """Selects the popular movies of every weight_rating value at once.
+
+        Args:
+            weight_ratings (Sequence[float]): weightings with which the rating is included in the total score
+
+        Returns:
+            np.ndarray: identifiers of shape (number of weight_rating values, n_recommendations), movies with equal score in ascending order by movie_id
+        """
+        movie_ids, rating_scores, purchase_scores = self.__get_popular_scores()
+        # weighted and selected by PopularMovieRecommender, so that popular movies equal those of the recommender
+        popular_movie_ids = np.empty(
+            (len(weight_ratings), min(max(self.n_recommendations, 0), len(movie_ids))),
+            dtype=movie_ids.dtype,
+        )
+        for position, weight_rating in enumerate(weight_ratings):
+            popular_movie_ids[position] = (
+                PopularMovieRecommender.select_popular_movie_ids(
+                    movie_ids,
+                    PopularMovieRecommender.weight_scores(
+                        rating_scores, purchase_scores, float(weight_rating)
+                    ),
+                    self.n_recommendations,
+                )
+            )
+        return popular_movie_ids
+
+    def get_neighbors(
+        self,
+        based_on: Literal["purchases", "genres"],
+        columns: np.ndarray,
+        correlation_threshold: float,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Selects the n_recommendations + 1 most similar movies of a block of movies, the movie itself included.
+
+        Args:
+            based_on (Literal['purchases', 'genres']): what similarity is based on
+            columns (np.ndarray): positions of movies in the data similarity is calculated from
+            correlation_threshold (float): correlations with a smaller value are not selected
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: identifiers and correlations of shape (number of movies, n_recommendations + 1) sorted in descending order by correlation, padded with -1 and -inf
+        """
+        movie_info = self.__get_movie_info(based_on)
+        n_neighbors = self.n_recommendations + 1
+        neighbors = np.full((len(columns), n_neighbors), -1, dtype=np.int64)
+        correlations = np.full((len(columns), n_neighbors), -np.inf, dtype=np.float64)
+        if len(columns) == 0:
+            return neighbors, correlations
+        block = movie_info.get_correlations_of_columns(columns)
+        for position, column_correlations in enumerate(block):
+            selected = NeighborIndex.select_neighbors(
+                column_correlations, correlation_threshold, n_neighbors
+            )
+            neighbors[position, : len(selected)] = movie_info.movie_ids[selected]
+            correlations[position, : len(selected)] = column_correlations[selected]
+        return neighbors, correlations
+
+    def __get_seed_neighbors(
+        self,
+        based_on: Literal["purchases", "genres"],
+        correlation_threshold: float,
+        block_size: int,
+        pool,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Selects the similar movies of every distinct seed movie, which are kept for later grids whose smallest threshold is not smaller.
+
+        Args:
+            based_on (Literal['purchases', 'genres']): what similarity is based on
+            correlation_threshold (float): smallest correlation threshold of the grid
+            block_size (int): number of movies whose correlations are calculated at once
+            pool: pool of worker processes, None calculates in the current process
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: identifiers of seed movies with data in ascending order, identifiers and correlations of their similar movies of shape (number of seed movies, n_recommendations) as selected by SimilarMovieRecommender
+        """
+        cached = self.__seed_neighbors.get(based_on)
+        if cached is not None and cached[0] <= correlation_threshold:
+            return cached[1:]
+        movie_info = self.__get_movie_info(based_on)
+        seed_movie_ids = np.unique(self.seed_movie_ids)
+        seed_movie_ids = seed_movie_ids[
+            [movie_id in movie_info.movie_index for movie_id in seed_movie_ids.tolist()]
+        ]
+        columns = np.array(
+            [movie_info.movie_index[movie_id] for movie_id in seed_movie_ids.tolist()],
+            dtype=np.int64,
+        )
+        seed_rows = np.arange(len(columns))
+        if based_on == "genres" and len(columns):
+            # movies with equal genres have equal correlations, so they are calculated once per distinct genres
+            _, first_rows, seed_rows = np.unique(
+                movie_info.bitsets[columns],
+                axis=0,
+                return_index=True,
+                return_inverse=True,
+            )
+            columns = columns[first_rows]
+            seed_rows = seed_rows.reshape(-1)
+        tasks = [
+            (based_on, columns[start : start + block_size], correlation_threshold)
+            for start in range(0, len(columns), block_size)
+        ]
+        results = (
+            pool.map(_get_neighbors, tasks)
+            if pool is not None
+            else list(map(_get_neighbors, tasks))
+        )
+        neighbors = np.concatenate(
+            [result[0] for result in results]
+            + [np.zeros((0, self.n_recommendations + 1), dtype=np.int64)]
+        )[seed_rows]
+        correlations = np.concatenate(
+            [result[1] for result in results]
+            + [np.zeros((0, self.n_recommendations + 1))]
+        )[seed_rows]
+        # remove the seed movie itself, the n_recommendations most similar other movies remain in order
+        kept = np.argsort(neighbors == seed_movie_ids[:, None], axis=1, kind="stable")[
+            :, : self.n_recommendations
+        ]
+        neighbors = np.take_along_axis(neighbors, kept, axis=1)
+        correlations = np.take_along_axis(correlations, kept, axis=1)
+        self.__seed_neighbors[based_on] = (
+            correlation_threshold,
+            seed_movie_ids,
+            neighbors,
+            correlations,
+        )
+        return seed_movie_ids, neighbors, correlations
+
+    @Instrumentation.instrument("evaluation.similar")
+    def __calculate_similar_hits(
+        self, correlation_thresholds: np.ndarray, block_size: int, pool
+    ) -> Dict[str, np.ndarray]:
+        """Finds the held out purchases and users hit by similar movies at every correlation threshold.
+
+        Args:
+            correlation_thresholds (np.ndarray): correlation thresholds of the grid
+            block_size (int): number of movies whose correlations are calculated at once
+            pool: pool of worker processes, None calculates in the current process
+
+        Returns:
+            Dict[str, np.ndarray]: "thresholds", hit indicators of shape (number of held out purchases, number of thresholds) as "holdouts" and of shape (number of evaluated users, number of thresholds) as "users", and per threshold the number of hit held out purchases "hits", of hit users "hit_users" and of recommended similar movies "slots"
+        """
+        holdout_correlations = np.full(len(self.holdout_movie_ids), -np.inf)
+        recommendation_correlations = []
+        for based_on in self.based_on:
+            seed_movie_ids, neighbors, correlations = self.__get_seed_neighbors(
+                based_on, correlation_thresholds.min(), block_size, pool
+            )
+            # last row is used by seed movies without data, which have no similar movies
+            neighbors = np.concatenate(
+                [neighbors, np.full((1, self.n_recommendations), -1, dtype=np.int64)]
+            )
+            correlations = np.concatenate(
+                [correlations, np.full((1, self.n_recommendations), -np.inf)]
+            )
+            positions = np.searchsorted(seed_movie_ids, self.seed_movie_ids)
+            found = positions < len(seed_movie_ids)
+            found[found] = (
+                seed_movie_ids[positions[found]] == self.seed_movie_ids[found]
+            )
+            user_rows = np.where(found, positions, len(seed_movie_ids))
+            recommendation_correlations.append(correlations[user_rows].ravel())
+            # neighbors of a seed movie are distinct, so at most one matches a held out movie
+            holdout_rows = user_rows[self.holdout_users]
+            matches = neighbors[holdout_rows] == self.holdout_movie_ids[:, None]
+            holdout_correlations = np.maximum(
+                holdout_correlations,
+                np.where(matches, correlations[holdout_rows], -np.inf).max(
+                    axis=1, initial=-np.inf
+                ),
+            )
+        # similar movies of a threshold are the ones of the smallest threshold with at least its correlation
+        holdout_hits = holdout_correlations[:, None] >= correlation_thresholds[None, :]
+        user_hits = (
+            np.logical_or.reduceat(holdout_hits, self.__user_starts, axis=0)
+            if len(self.__user_starts)
+            else np.zeros((0, len(correlation_thresholds)), dtype=bool)
+        )
+        recommendation_correlations = np.sort(
+            np.concatenate(recommendation_correlations + [np.zeros(0)])
+        )
+        recommendation_correlations = recommendation_correlations[
+            np.isfinite(recommendation_correlations)
+        ]
+        return {
+            "thresholds": correlation_thresholds,
+            "holdouts": holdout_hits,
+            "users": user_hits,
+            "hits": holdout_hits.sum(axis=0),
+            "hit_users": user_hits.sum(axis=0),
+            "slots": len(recommendation_correlations)
+            - np.searchsorted(recommendation_correlations, correlation_thresholds),
+        }
+
+    def __get_holdouts_of_movies(self, movie_ids: np.ndarray) -> np.ndarray:
+        """Finds the held out purchases of some movies.
+
+        Args:
+            movie_ids (np.ndarray): distinct identifiers of movies
+
+        Returns:
+            np.ndarray: positions of held out purchases of the movies
+        """
+        starts = np.searchsorted(self.__sorted_holdout_movie_ids, movie_ids, "left")
+        ends = np.searchsorted(self.__sorted_holdout_movie_ids, movie_ids, "right")
+        return np.concatenate(
+            [self.__holdouts_by_movie[start:end] for start, end in zip(starts, ends)]
+            + [np.zeros(0, dtype=np.int64)]
+        )
+
+    def evaluate_weights(self, weight_ratings: Sequence[float]) -> pd.DataFrame:
+        """Calculates the metrics of weight_rating values combined with every correlation threshold from the shared similar hits.
+
+        Only held out purchases of the popular movies of a weight_rating value are visited, the counts of all thresholds are updated at once.
+
+        Args:
+            weight_ratings (Sequence[float]): weightings with which the rating is included in the total score
+
+        Returns:
+            pd.DataFrame: metrics of every grid point, see evaluate
+        """
+        weight_ratings = np.asarray(weight_ratings, dtype=np.float64)
+        similar_hits = self.__similar_hits
+        correlation_thresholds = similar_hits["thresholds"]
+        n_weights, n_thresholds = len(weight_ratings), len(correlation_thresholds)
+        n_users = len(self.user_ids)
+        popular_movie_ids = self.get_popular_movie_ids(weight_ratings)
+        popular_hits = np.zeros(n_weights)
+        popular_users = np.zeros(n_weights)
+        # held out purchases and users hit by popular and by similar movies
+        both_hits = np.zeros((n_weights, n_thresholds))
+        both_users = np.zeros((n_weights, n_thresholds))
+        for position, movie_ids in enumerate(popular_movie_ids):
+            holdouts = self.__get_holdouts_of_movies(movie_ids)
+            users = np.unique(self.holdout_users[holdouts])
+            popular_hits[position] = len(holdouts)
+            popular_users[position] = len(users)
+            both_hits[position] = similar_hits["holdouts"][holdouts].sum(axis=0)
+            both_users[position] = similar_hits["users"][users].sum(axis=0)
+        # a held out purchase is a hit of the session if it is a popular or a similar movie
+        hits = popular_hits[:, None] + similar_hits["hits"] - both_hits
+        hit_users = popular_users[:, None] + similar_hits["hit_users"] - both_users
+        # recommended movies, a movie shown in several lists counts once per list
+        popular_slots = popular_movie_ids.shape[1] * n_users
+        slots = popular_slots + similar_hits["slots"][None, :]
+        popular_precision = (
+            popular_hits / popular_slots if popular_slots else np.zeros(n_weights)
+        )
+        similar_precision = np.divide(
+            similar_hits["hits"],
+            similar_hits["slots"],
+            out=np.zeros(n_thresholds),
+            where=similar_hits["slots"] > 0,
+        )
+        return pd.DataFrame(
+            {
+                "weight_rating": np.repeat(weight_ratings, n_thresholds),
+                "correlation_threshold": np.tile(correlation_thresholds, n_weights),
+                "hit_rate": (hit_users / max(n_users, 1)).ravel(),
+                "precision": np.divide(
+                    hits, slots, out=np.zeros(hits.shape), where=slots > 0
+                ).ravel(),
+                "popular_hit_rate": np.repeat(
+                    popular_users / max(n_users, 1), n_thresholds
+                ),
+                "popular_precision": np.repeat(popular_precision, n_thresholds),
+                "similar_hit_rate": np.tile(
+                    similar_hits["hit_users"] / max(n_users, 1), n_weights
+                ),
+                "similar_precision": np.tile(similar_precision, n_weights),
+            }
+        )
+
+    @Instrumentation.instrument("evaluation.evaluate")
+    def evaluate(
+        self,
+        weight_ratings: Sequence[float],
+        correlation_thresholds: Sequence[float],
+        n_workers=1,
+        chunk_size=8,
+        block_size=256,
+    ) -> pd.DataFrame:
+        """Calculates hit rate and precision at n_recommendations of every combination of weight_rating and correlation_threshold values.
+
+        Similar movies are calculated once for the smallest threshold and popular scores once for all weight_rating values. The weight_rating values are split into chunks of chunk_size, whose grid points are evaluated by a pool of worker processes, like the blocks of seed movies before.
+
+        Args:
+            weight_ratings (Sequence[float]): weightings with which the rating is included in the total score of popular movies, in interval [0, 1]
+            correlation_thresholds (Sequence[float]): correlations with a smaller value are not considered for similar movies
+            n_workers (int, optional): number of worker processes, 1 evaluates in the current process. Defaults to 1.
+            chunk_size (int, optional): number of weight_rating values evaluated at once by a worker. Defaults to 8.
+            block_size (int, optional): number of seed movies whose correlations are calculated at once. Defaults to 256.
+
+        Raises:
+            ValueError: if a weight_rating value is not in interval [0, 1] or there are no grid points
+
+        Returns:
+            pd.DataFrame: one row per grid point with columns "weight_rating", "correlation_threshold", "hit_rate" and "precision" of the session, and the same metrics of popular and of similar movies alone ("popular_hit_rate", "popular_precision", "similar_hit_rate", "similar_precision"). Hit rate is the share of evaluated users with at least one recommended held out purchase, precision the share of recommended movies that are held out purchases.
+        """
+        global _worker_evaluator
+        weight_ratings = np.asarray(weight_ratings, dtype=np.float64)
+        correlation_thresholds = np.asarray(correlation_thresholds, dtype=np.float64)
+        if len(weight_ratings) == 0 or len(correlation_thresholds) == 0:
+            raise ValueError(f"Grid of parameter values should not be empty.")
+        if (weight_ratings > 1).any() or (weight_ratings < 0).any():
+            raise ValueError(f"Input value for weight should be in interval [0, 1].")
+        _worker_evaluator = self
+        # build shared data before forking, so that workers do not build their own copies
+        self.__get_popular_scores()
+        for based_on in self.based_on:
+            self.__get_movie_info(based_on)
+        pool = self.__create_pool(n_workers)
+        try:
+            self.__similar_hits = self.__calculate_similar_hits(
+                correlation_thresholds, block_size, pool
+            )
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        # fork again, so that workers share the similar hits
+        pool = self.__create_pool(n_workers)
+        tasks = [
+            weight_ratings[start : start + chunk_size]
+            for start in range(0, len(weight_ratings), chunk_size)
+        ]
+        try:
+            results: List[pd.DataFrame] = (
+                pool.map(_evaluate_weights, tasks)
+                if pool is not None
+                else list(map(_evaluate_weights, tasks))
+            )
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        return pd.concat(results, ignore_index=True)
+
+    @staticmethod
+    def __create_pool(n_workers: int):
+        """Forks a pool of worker processes sharing the evaluator.
+
+        Args:
+            n_workers (int): number of worker processes
+
+        Returns:
+            Optional[multiprocessing.pool.Pool]: pool, None if one worker is requested or fork is not available
+        """
+        if n_workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+            return multiprocessing.get_context("fork").Pool(n_workers)
+        return None
@@ -0,0 +1,333 @@
+# imports
+import asyncio
+import json
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+# import movie recommendations modules
+from movie_recommendations.CoPurchaseCounts import CoPurchaseCounts
+from movie_recommendations.DataManager import DataManager
+from movie_recommendations.DataReloader import DataReloader
+from movie_recommendations.DecayedPurchaseCounter import DecayedPurchaseCounter
+from movie_recommendations.PopularMovieRecommender import PopularMovieRecommender
+from movie_recommendations.SimilarMovieRecommender import SimilarMovieRecommender
+
+
+class RecommendationServer:
+    """Answers recommendation requests of many clients from one loaded DataManager.
+
+    Clients send one JSON object per line and receive one JSON object per line:
+        {"id": 1, "type": "popular", "n": 3} -> {"id": 1, "movie_ids": [...]}
+        {"id": 2, "type": "similar", "movie_id": 8, "n": 3, "based_on": "purchases"} -> {"id": 2, "movie_ids": [...]}
+        {"id": 3, "type": "stats"} -> {"id": 3, "stats": {"n_batches": ..., "n_batched_requests": ..., "similar_cache": {"hits": ..., "misses": ..., "evictions": ...}, "popular_cache": {...}, "data_version": ..., "reloads": [...]}}
+        {"id": 4, "type": "reload"} -> {"id": 4, "reloaded": true, "data_version": 1}
+    Invalid requests are answered with {"id": ..., "error": "..."}. Requests of one connection may be answered out of order, "id" is returned unchanged to match responses.
+
+    Similar requests arriving within batch_window seconds are answered together by one call of get_similar_movie_ids_batch per basis of similarity.
+
+    If data_directory is given, changed data files are loaded by a DataReloader, every reload_interval seconds or on a reload request, and the new DataManager and recommenders are swapped in at once. Every request is answered by the version that was current when it arrived.
+
+    Attributes:
+        data_manager (DataManager): manages data associated with users, movies and user sessions of the current version
+        popular_movie_recommender (PopularMovieRecommender): answers popular requests of the current version
+        similar_movie_recommender (SimilarMovieRecommender): answers similar requests of the current version
+        data_reloader (Optional[DataReloader]): swaps in new versions when data files change, None if data is not reloaded
+        reload_interval (Optional[float]): seconds between checks of the data files, None only reloads on request
+        batch_window (float): seconds similar requests are collected before they are answered
+        max_batch_size (int): number of collected similar requests that are answered without waiting for the end of batch_window
+        n_batches (int): number of answered batches of similar requests
+        n_batched_requests (int): number of similar requests answered in batches
+    """
+
+    def __init__(
+        self,
+        data_manager: DataManager,
+        correlation_threshold=0.4,
+        batch_window=0.002,
+        max_batch_size=1024,
+        engine: Literal["exact", "minhash"] = "exact",
+        purchase_counter: Optional[DecayedPurchaseCounter] = None,
+        cache_size: Optional[int] = None,
+        co_purchase_counts: Optional[CoPurchaseCounts] = None,
+        data_directory: Optional[str] = None,
+        snapshot_directory: Optional[str] = None,
+        reload_interval: Optional[float] = None,
+    ) -> None:
+        self.__correlation_threshold = correlation_threshold
+        self.__engine = engine
+        self.__purchase_counter = purchase_counter
+        self.__cache_size = cache_size
+        self.__co_purchase_counts = co_purchase_counts
+        self.data_reloader = None
+        self.__state = None
+        if data_directory is None:
+            self.__state = self.__create_state(data_manager)
+        else:
+            self.data_reloader = DataReloader(
+                data_directory,
+                self.__create_state,
+                snapshot_directory,
+                data_manager=data_manager,
+            )
+        self.reload_interval = reload_interval
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.n_batches = 0
+        self.n_batched_requests = 0
+        # similar requests waiting for the current batch as movie id, n, based_on, future of response and recommender of their version
+        self.__pending: List[
+            Tuple[int, int, str, asyncio.Future, SimilarMovieRecommender]
+        ] = []
+        self.__flush_handle: Optional[asyncio.TimerHandle] = None
+
+    def __create_state(
+        self, data_manager: DataManager
+    ) -> Tuple[DataManager, PopularMovieRecommender, SimilarMovieRecommender]:
+        """Creates the recommenders of one version of the data.
+
+        Args:
+            data_manager (DataManager): manages the data of the version
+
+        Returns:
+            Tuple[DataManager, PopularMovieRecommender, SimilarMovieRecommender]: data manager and recommenders of the version
+        """
+        # build lazy data before the version answers requests, so that a swapped in version is ready
+        data_manager.movie_table
+        data_manager.purchases_of_movies.matrix
+        data_manager.genres_of_movies.matrix
+        state = (
+            data_manager,
+            PopularMovieRecommender(
+                data_manager, self.__purchase_counter, cache_size=self.__cache_size
+            ),
+            SimilarMovieRecommender(
+                data_manager,
+                self.__correlation_threshold,
+                engine=self.__engine,
+                cache_size=self.__cache_size,
+                co_purchase_counts=self.__co_purchase_counts,
+            ),
+        )
+        # precomputed co-purchases were counted from the initial data files
+        self.__co_purchase_counts = None
+        return state
+
+    def __get_state(
+        self,
+    ) -> Tuple[DataManager, PopularMovieRecommender, SimilarMovieRecommender]:
+        """Returns data manager and recommenders of the current version."""
+        if self.data_reloader is not None:
+            return self.data_reloader.state
+        return self.__state
+
+    @property
+    def data_manager(self) -> DataManager:
+        """Data manager of the current version."""
+        return self.__get_state()[0]
+
+    @property
+    def popular_movie_recommender(self) -> PopularMovieRecommender:
+        """Recommender of popular movies of the current version."""
+        return self.__get_state()[1]
+
+    @property
+    def similar_movie_recommender(self) -> SimilarMovieRecommender:
+        """Recommender of similar movies of the current version."""
+        return self.__get_state()[2]
+
+    async def serve(
+        self, host="127.0.0.1", port=8765, unix_path: Optional[str] = None
+    ) -> None:
+        """Accepts connections until cancelled.
+
+        Args:
+            host (str, optional): host of TCP socket. Defaults to "127.0.0.1".
+            port (int, optional): port of TCP socket. Defaults to 8765.
+            unix_path (Optional[str], optional): path of Unix socket used instead of TCP. Defaults to None.
+        """
+        if unix_path is not None:
+            server = await asyncio.start_unix_server(self.handle_connection, unix_path)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+        if self.data_reloader is not None and self.reload_interval is not None:
+            self.data_reloader.start(self.reload_interval)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if self.data_reloader is not None:
+                self.data_reloader.stop()
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Answers requests of one client until it closes the connection.
+
+        Args:
+            reader (asyncio.StreamReader): receives request lines
+            writer (asyncio.StreamWriter): sends response lines
+        """
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                # answer requests concurrently, so that requests of one client share batches
+                task = asyncio.ensure_future(self.__respond(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def __respond(self, line: bytes, writer: asyncio.StreamWriter) -> None:
+        """Answers one request line.
+
+        Args:
+            line (bytes): JSON encoded request
+            writer (asyncio.StreamWriter): sends response line
+        """
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Request should be a JSON object.")
+            request_id = request.get("id")
+            response = {"id": request_id, **(await self.answer(request))}
+        except (KeyError, ValueError, TypeError) as error:
+            # KeyError stores its message as only argument
+            message = error.args[0] if error.args else repr(error)
+            response = {"id": request_id, "error": str(message)}
+        if not writer.is_closing():
+            writer.write((json.dumps(response) + "\n").encode())
+            await writer.drain()
+
+    async def answer(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Calculates response of a request.
+
+        Args:
+            request (Dict[str, Any]): request with key "type", "n" for popular and similar requests, and "movie_id" and "based_on" for similar requests
+
+        Raises:
+            ValueError: if type, n or based_on is not a supported value
+            KeyError: if movie_id does not exist
+
+        Returns:
+            Dict[str, Any]: "movie_ids" of recommended movies, "stats" of batches, result caches and reloads, or whether data was "reloaded"
+        """
+        # the whole request is answered by the version current at its arrival
+        data_manager, popular_movie_recommender, similar_movie_recommender = (
+            self.__get_state()
+        )
+        if request.get("type") == "reload":
+            if self.data_reloader is None:
+                raise ValueError("Reloading data is not enabled.")
+            # build in a thread, so that other requests are answered meanwhile
+            reloaded = await asyncio.get_running_loop().run_in_executor(
+                None, self.data_reloader.reload
+            )
+            return {"reloaded": reloaded, "data_version": self.data_reloader.version}
+        if request.get("type") == "stats":
+            stats: Dict[str, Any] = {
+                "n_batches": self.n_batches,
+                "n_batched_requests": self.n_batched_requests,
+            }
+            # counters of result caches, if caching is enabled
+            for name, result_cache in [
+                ("similar_cache", similar_movie_recommender.result_cache),
+                ("popular_cache", popular_movie_recommender.result_cache),
+            ]:
+                if result_cache is not None:
+                    stats[name] = {
+                        "size": len(result_cache),
+                        "hits": result_cache.hits,
+                        "misses": result_cache.misses,
+                        "evictions": result_cache.evictions,
+                    }
+            if self.data_reloader is not None:
+                stats["data_version"] = self.data_reloader.version
+                stats["reloads"] = self.data_reloader.reloads
+            return {"stats": stats}
+        n = int(request.get("n", 3))
+        if n < 0:
+            raise ValueError("Input value for n should not be negative.")
+        if request.get("type") == "popular":
+            return {
+                "movie_ids": [
+                    int(movie.identifier)
+                    for movie in popular_movie_recommender.get_popular_movies(n)
+                ]
+            }
+        if request.get("type") == "similar":
+            movie_id = int(request["movie_id"])
+            based_on = request.get("based_on", "purchases")
+            if based_on not in ["purchases", "genres"]:
+                raise ValueError(f"Input '{based_on}' for based_on is not defined.")
+            # raises KeyError for unknown movies
+            data_manager.get_movie_by_movie_id(movie_id)
+            future = asyncio.get_running_loop().create_future()
+            self.__pending.append(
+                (movie_id, n, based_on, future, similar_movie_recommender)
+            )
+            if len(self.__pending) >= self.max_batch_size:
+                self.__flush()
+            elif self.__flush_handle is None:
+                self.__flush_handle = asyncio.get_running_loop().call_later(
+                    self.batch_window, self.__flush
+                )
+            return {"movie_ids": await future}
+        raise ValueError(f"Input '{request.get('type')}' for type is not defined.")
+
+    def __flush(self) -> None:
+        """Answers all pending similar requests with one batch calculation per basis of similarity."""
+        if self.__flush_handle is not None:
+            self.__flush_handle.cancel()
+            self.__flush_handle = None
+        pending, self.__pending = self.__pending, []
+        if not pending:
+            return
+        self.n_batches += 1
+        self.n_batched_requests += len(pending)
+        # requests that arrived before a reload are answered by the previous version
+        for similar_movie_recommender in dict.fromkeys(
+            request[4] for request in pending
+        ):
+            for based_on in ["purchases", "genres"]:
+                requests = [
+                    request
+                    for request in pending
+                    if request[2] == based_on
+                    and request[4] is similar_movie_recommender
+                ]
+                if not requests:
+                    continue
+                # most similar movies of smaller n are a prefix of those of the largest n
+                n_similar_movies = max(request[1] for request in requests)
+                movie_ids = sorted({request[0] for request in requests})
+                try:
+                    similar_movies_ids = dict(
+                        zip(
+                            movie_ids,
+                            similar_movie_recommender.get_similar_movie_ids_batch(
+                                movie_ids, n_similar_movies, based_on
+                            ),
+                        )
+                    )
+                except Exception as error:
+                    for request in requests:
+                        if not request[3].done():
+                            request[3].set_exception(error)
+                    continue
+                for movie_id, n, _, future, _ in requests:
+                    if not future.done():
+                        future.set_result(
+                            [
+                                int(similar)
+                                for similar in similar_movies_ids[movie_id][:n]
+                            ]
+                        )
@@ -1,10 +1,19 @@
 # imports
-from typing import List, Literal
+from typing import Dict, List, Literal, Optional, Sequence, Set, Tuple, Union
+import numpy as np
 import pandas as pd
 
 # import movie recommendations modules
+from movie_recommendations.CoPurchaseCounts import CoPurchaseCounts
 from movie_recommendations.DataManager import DataManager
-from movie_recommendations.Movie import Movie
+from movie_recommendations.GenreBitsetIndex import GenreBitsetIndex
+from movie_recommendations.Instrumentation import Instrumentation
+from movie_recommendations.InvertedIndex import InvertedIndex
+from movie_recommendations.LRUCache import LRUCache
+from movie_recommendations.MinHashIndex import MinHashIndex
+from movie_recommendations.MovieBase import MovieBase
+from movie_recommendations.MovieMatrix import MovieMatrix
+from movie_recommendations.NeighborIndex import NeighborIndex
 
 
 class SimilarMovieRecommender:
@@ -13,11 +22,437 @@ class SimilarMovieRecommender:
     Attributes:
         data_manager (DataManager): manages data associated with users, movies and user sessions
         correlation_threshold (float): correlations with a smaller value are not considered for recommendations
+        neighbor_indexes (Dict[str, NeighborIndex]): precomputed neighbors of all movies per basis of similarity, filled by build_neighbor_indexes
+        engine (Literal['exact', 'minhash']): "exact" correlates a movie with all movies, "minhash" only with candidates found by MinHashIndex
+        n_hashes (Optional[int]): length of MinHash signatures, more hashes estimate similarity more accurately but take longer to build, None uses MINHASH_PARAMETERS of the basis of similarity
+        n_bands (Optional[int]): number of LSH bands, more bands find more similar movies at the cost of more candidates, None uses MINHASH_PARAMETERS of the basis of similarity
+        minhash_indexes (Dict[str, MinHashIndex]): candidate indexes per basis of similarity, built on first use by the "minhash" engine
+        genre_metric (Literal['pearson', 'jaccard']): how similarity based on genres is scored, see GenreBitsetIndex
+        result_cache (Optional[LRUCache]): identifiers of most similar movies of recent queries, results based on purchases are removed when added purchases may change them, None if caching is disabled
+        inverted_index (Optional[InvertedIndex]): buyers of every movie and movies of every buyer, built on first use to find candidates of movies frequently bought together and movies affected by added purchases
+        co_purchase_counts (Optional[CoPurchaseCounts]): precomputed co-purchases of the data, e.g. built by CoPurchaseCounts.build_sharded, used for similarity based on purchases until data changes, None calculates co-purchases from the purchase matrix
     """
 
-    def __init__(self, data_manager: DataManager, correlation_threshold=0.6) -> None:
+    # default number of hashes and bands of the "minhash" engine per basis of similarity, see benchmarks/run_benchmarks.py:
+    # movies correlated by purchases share few of their buyers, so only bands of one hash find them, sparse purchases still keep
+    # candidates below 1% of movies; movies with similar genres share most genres, so bands of four hashes cut candidates to
+    # about 8% of movies and keep over 98% of the exact similar movies
+    MINHASH_PARAMETERS: Dict[str, Tuple[int, int]] = {
+        "purchases": (64, 64),
+        "genres": (128, 32),
+    }
+
+    def __init__(
+        self,
+        data_manager: DataManager,
+        correlation_threshold=0.6,
+        engine: Literal["exact", "minhash"] = "exact",
+        n_hashes: Optional[int] = None,
+        n_bands: Optional[int] = None,
+        genre_metric: Literal["pearson", "jaccard"] = "pearson",
+        cache_size: Optional[int] = None,
+        co_purchase_counts: Optional[CoPurchaseCounts] = None,
+    ) -> None:
+        if engine not in ["exact", "minhash"]:
+            raise ValueError(f"Input '{engine}' for engine is not defined.")
+        if genre_metric not in ["pearson", "jaccard"]:
+            raise ValueError(f"Input '{genre_metric}' for genre_metric is not defined.")
         self.data_manager = data_manager
         self.correlation_threshold = correlation_threshold
+        self.engine = engine
+        self.n_hashes = n_hashes
+        self.n_bands = n_bands
+        self.neighbor_indexes: Dict[str, NeighborIndex] = {}
+        self.minhash_indexes: Dict[str, MinHashIndex] = {}
+        self.inverted_index: Optional[InvertedIndex] = None
+        self.genre_metric = genre_metric
+        # genre bitsets are built on first use from the genre matrix of data_manager
+        self.__genre_index: Optional[GenreBitsetIndex] = None
+        # movies whose indexed neighbors based on purchases changed, all if None
+        self.__outdated_movie_ids: Optional[Set[int]] = set()
+        # results of hot movies are reused until added purchases may change them
+        self.result_cache = LRUCache(cache_size) if cache_size else None
+        # data version of the last added purchase that was applied to results and indexes
+        self.__purchases_version = data_manager.data_version
+        # state of the purchase matrix when purchases were last applied, see __get_state
+        self.__purchases_state: Optional[Tuple[int, int, int]] = None
+        self.co_purchase_counts = co_purchase_counts
+        # precomputed co-purchases only match the data they were counted from
+        self.__co_purchase_counts_version = data_manager.data_version
+        # co-purchases are compared with the purchases of data_manager on first use
+        self.__co_purchase_counts_checked = False
+
+    def build_neighbor_indexes(self, n_neighbors=10, block_size=1024) -> None:
+        """Precomputes the n_neighbors most similar movies of every movie based on purchases and genres.
+
+        Afterwards get_similar_movies reads recommendations from the indexes as long as at most n_neighbors movies are requested. After purchases are added, similar movies based on purchases of the movies affected by them are calculated without index until the indexes are built again.
+
+        Args:
+            n_neighbors (int, optional): maximal number of neighbors stored per movie. Defaults to 10.
+            block_size (int, optional): number of movies whose correlations are calculated at once. Defaults to 1024.
+        """
+        self.__apply_added_purchases()
+        self.neighbor_indexes["purchases"] = NeighborIndex.build(
+            self.__get_movie_info("purchases"),
+            self.correlation_threshold,
+            n_neighbors,
+            block_size,
+        )
+        self.neighbor_indexes["genres"] = NeighborIndex.build(
+            self.__get_movie_info("genres"),
+            self.correlation_threshold,
+            n_neighbors,
+            block_size,
+        )
+        self.__outdated_movie_ids = set()
+
+    def build_indexes(self) -> None:
+        """Builds the indexes of the current data that queries otherwise build on first use: genre bitsets, the inverted index of purchases and, for the "minhash" engine, the candidate indexes.
+
+        E.g. before worker processes are forked, so that all workers share the indexes instead of building their own copies.
+        """
+        self.__apply_added_purchases()
+        purchase_info = self.__get_movie_info("purchases")
+        if isinstance(purchase_info, MovieMatrix):
+            self.__get_inverted_index(purchase_info)
+        self.__get_movie_info("genres")
+        if self.engine == "minhash":
+            self.__get_minhash_index("purchases")
+            self.__get_minhash_index("genres")
+
+    def __get_movie_info(
+        self, based_on: Literal["purchases", "genres"]
+    ) -> Union[MovieMatrix, CoPurchaseCounts, GenreBitsetIndex]:
+        """Returns data similarity is calculated from, genres are scored with bitsets.
+
+        Args:
+            based_on (Literal['purchases', 'genres']): what similarity is based on
+
+        Raises:
+            ValueError: if precomputed co-purchases were not counted from the purchases of data_manager
+
+        Returns:
+            Union[MovieMatrix, CoPurchaseCounts, GenreBitsetIndex]: precomputed co-purchases, purchase matrix or genre bitsets of the current data
+        """
+        if based_on == "purchases":
+            if (
+                self.co_purchase_counts is not None
+                and not self.data_manager.has_purchases_changed(
+                    self.__co_purchase_counts_version
+                )
+            ):
+                if not self.__co_purchase_counts_checked:
+                    self.__check_co_purchase_counts()
+                return self.co_purchase_counts
+            purchases_of_movies = self.data_manager.purchases_of_movies
+            if self.__purchases_state is None:
+                # later purchases are compared with the purchases results are calculated from
+                self.__purchases_state = SimilarMovieRecommender.__get_state(
+                    purchases_of_movies
+                )
+            return purchases_of_movies
+        genres_of_movies = self.data_manager.genres_of_movies
+        if (
+            self.__genre_index is None
+            or self.__genre_index.movie_ids is not genres_of_movies.movie_ids
+            or self.__genre_index.metric != self.genre_metric
+        ):
+            self.__genre_index = GenreBitsetIndex.from_movie_matrix(
+                genres_of_movies, self.genre_metric
+            )
+        return self.__genre_index
+
+    def __check_co_purchase_counts(self) -> None:
+        """Compares movies, users and purchases per movie of precomputed co-purchases with the purchase matrix of data_manager.
+
+        Raises:
+            ValueError: if precomputed co-purchases were not counted from the purchases of data_manager
+        """
+        purchases_of_movies = self.data_manager.purchases_of_movies
+        if (
+            self.co_purchase_counts.n_rows != purchases_of_movies.n_rows
+            or not np.array_equal(
+                self.co_purchase_counts.movie_ids, purchases_of_movies.movie_ids
+            )
+            or not np.array_equal(
+                self.co_purchase_counts.get_movie_counts(),
+                purchases_of_movies.get_movie_counts(),
+            )
+        ):
+            raise ValueError(
+                f"Input co_purchase_counts were not counted from the purchases of data_manager."
+            )
+        self.__co_purchase_counts_checked = True
+
+    def __get_neighbor_index(
+        self, based_on: Literal["purchases", "genres"], n_similar_movies: int
+    ) -> Optional[NeighborIndex]:
+        """Returns neighbor index if it was built with the current threshold and stores enough neighbors.
+
+        Args:
+            based_on (Literal['purchases', 'genres']): what similarity is based on
+            n_similar_movies (int): number of requested similar movies
+
+        Returns:
+            Optional[NeighborIndex]: usable neighbor index, None if there is none
+        """
+        neighbor_index = self.neighbor_indexes.get(based_on)
+        if (
+            neighbor_index is None
+            or n_similar_movies > neighbor_index.n_neighbors
+            or neighbor_index.correlation_threshold != self.correlation_threshold
+        ):
+            return None
+        return neighbor_index
+
+    def __is_outdated(
+        self, movie_id: int, based_on: Literal["purchases", "genres"]
+    ) -> bool:
+        """Checks whether neighbors of a movie changed since the neighbor indexes were built.
+
+        Args:
+            movie_id (int): identifier of movie
+            based_on (Literal['purchases', 'genres']): what similarity is based on
+
+        Returns:
+            bool: True if indexed neighbors are outdated
+        """
+        return based_on == "purchases" and (
+            self.__outdated_movie_ids is None or movie_id in self.__outdated_movie_ids
+        )
+
+    @staticmethod
+    def __get_state(movie_matrix: MovieMatrix) -> Tuple[int, int, int]:
+        """Describes which entries a matrix contains, so that entries added later can be found.
+
+        Args:
+            movie_matrix (MovieMatrix): matrix to be described
+
+        Returns:
+            Tuple[int, int, int]: layout version, number of rows and number of entries added since the last merge
+        """
+        return (
+            movie_matrix.layout_version,
+            movie_matrix.n_rows,
+            movie_matrix.n_pending_entries,
+        )
+
+    def __apply_added_purchases(self) -> None:
+        """Removes results and marks indexed neighbors of movies whose similar movies based on purchases may have changed by added purchases.
+
+        A purchase of movie m by a user with earlier purchases only changes the count of m and the co-purchases of m with the other movies of the user. Every other movie shares no buyer with m, so its correlation with m stays negative and its other correlations stay equal, which keeps its similar movies for non-negative thresholds. The first purchase of a user changes the number of buyers and thereby all correlations, so all results are removed.
+        """
+        if not self.data_manager.has_purchases_changed(self.__purchases_version):
+            return
+        self.__purchases_version = self.data_manager.data_version
+        purchases_of_movies = self.data_manager.purchases_of_movies
+        state = self.__purchases_state
+        self.__purchases_state = SimilarMovieRecommender.__get_state(
+            purchases_of_movies
+        )
+        affected_movie_ids: Optional[Set[int]] = None
+        # merged entries cannot be told apart, so merges affect all movies
+        if state is not None and state[:2] == self.__purchases_state[:2]:
+            _, columns = purchases_of_movies.get_pending_entries(state[2])
+            inverted_index = self.__get_inverted_index(purchases_of_movies)
+            affected_columns = [
+                inverted_index.get_co_counts(column)[0]
+                for column in np.unique(columns).tolist()
+            ]
+            affected_movie_ids = set(
+                purchases_of_movies.movie_ids[
+                    np.unique(np.concatenate([[], *affected_columns]).astype(np.int64))
+                ].tolist()
+            )
+        if self.__outdated_movie_ids is not None:
+            neighbor_index = self.neighbor_indexes.get("purchases")
+            if (
+                affected_movie_ids is None
+                or neighbor_index is not None
+                and neighbor_index.correlation_threshold < 0
+            ):
+                self.__outdated_movie_ids = None
+            else:
+                self.__outdated_movie_ids |= affected_movie_ids
+        if self.result_cache is not None:
+            # negative thresholds also select movies without common buyers
+            for key in self.result_cache.keys():
+                movie_id, based_on, _, correlation_threshold = key[:4]
+                if based_on == "purchases" and (
+                    affected_movie_ids is None
+                    or movie_id in affected_movie_ids
+                    or correlation_threshold < 0
+                ):
+                    self.result_cache.remove(key)
+
+    def __get_result_key(
+        self,
+        movie_id: int,
+        n_similar_movies: int,
+        based_on: Literal["purchases", "genres"],
+    ) -> Tuple:
+        """Creates key of a query in result cache, which includes all settings results depend on.
+
+        Args:
+            movie_id (int): identifier of movie
+            n_similar_movies (int): number of similar movies
+            based_on (Literal['purchases', 'genres']): what similarity is based on
+
+        Returns:
+            Tuple: key of query
+        """
+        return (
+            movie_id,
+            based_on,
+            n_similar_movies,
+            self.correlation_threshold,
+            self.engine,
+            self.genre_metric,
+        )
+
+    def __get_minhash_index(
+        self, based_on: Literal["purchases", "genres"]
+    ) -> MinHashIndex:
+        """Returns candidate index of the current data, builds it if there is none or data changed.
+
+        Args:
+            based_on (Literal['purchases', 'genres']): what similarity is based on
+
+        Returns:
+            MinHashIndex: candidate index built from the current data
+        """
+        movie_matrix = (
+            self.data_manager.purchases_of_movies
+            if based_on == "purchases"
+            else self.data_manager.genres_of_movies
+        )
+        minhash_index = self.minhash_indexes.get(based_on)
+        if (
+            minhash_index is None
+            or minhash_index.layout_version != movie_matrix.layout_version
+        ):
+            n_hashes, n_bands = SimilarMovieRecommender.MINHASH_PARAMETERS[based_on]
+            minhash_index = MinHashIndex(
+                movie_matrix,
+                self.n_hashes if self.n_hashes is not None else n_hashes,
+                self.n_bands if self.n_bands is not None else n_bands,
+            )
+            self.minhash_indexes[based_on] = minhash_index
+        else:
+            # entries added since the index was built or updated
+            minhash_index.update(movie_matrix)
+        return minhash_index
+
+    def __get_purchase_candidate_info(self) -> Union[InvertedIndex, CoPurchaseCounts]:
+        """Returns precomputed co-purchases or the inverted index of the current data.
+
+        Returns:
+            Union[InvertedIndex, CoPurchaseCounts]: data movies purchased together are read from
+        """
+        movie_info = self.__get_movie_info("purchases")
+        if isinstance(movie_info, CoPurchaseCounts):
+            return movie_info
+        return self.__get_inverted_index(movie_info)
+
+    def __get_inverted_index(self, purchases_of_movies: MovieMatrix) -> InvertedIndex:
+        """Returns the inverted index of the purchase matrix, builds it on first use.
+
+        Args:
+            purchases_of_movies (MovieMatrix): purchase matrix of data_manager
+
+        Returns:
+            InvertedIndex: index reading buyers and their movies from the purchase matrix, including added purchases
+        """
+        if (
+            self.inverted_index is None
+            or self.inverted_index.movie_matrix is not purchases_of_movies
+        ):
+            self.inverted_index = InvertedIndex(purchases_of_movies)
+        return self.inverted_index
+
+    def __get_approximate_similar_movie_ids(
+        self,
+        movie_ids: Sequence[int],
+        n_similar_movies: int,
+        based_on: Literal["purchases", "genres"],
+        block_size=1024,
+    ) -> List[List[int]]:
+        """Finds similar movies among the candidates of the MinHash index, candidates are ranked by exact correlation.
+
+        Correlations of block_size movies are calculated at once with the union of their candidates only, instead of all movies.
+
+        Args:
+            movie_ids (Sequence[int]): identifiers of movies the recommendations are based on
+            n_similar_movies (int): number of similar movies per movie
+            based_on (Literal['purchases', 'genres']): what similarity is based on
+            block_size (int, optional): number of movies whose correlations are calculated at once. Defaults to 1024.
+
+        Returns:
+            List[List[int]]: identifiers of most similar candidates for every entry of movie_ids in the same order, empty if a movie is not in corresponding data
+        """
+        # get index first, as building merges added entries and may move columns
+        minhash_index = self.__get_minhash_index(based_on)
+        movie_info = self.__get_movie_info(based_on)
+        similar_movies_ids_batch: List[List[int]] = [[] for _ in movie_ids]
+        known = [
+            (position, movie_info.movie_index[movie_id])
+            for position, movie_id in enumerate(movie_ids)
+            if movie_id in movie_info.movie_index
+        ]
+        for block_start in range(0, len(known), block_size):
+            block = known[block_start : block_start + block_size]
+            candidates = [minhash_index.get_candidates(column) for _, column in block]
+            all_candidates = np.unique(np.concatenate([[], *candidates])).astype(int)
+            if len(all_candidates) == 0:
+                continue
+            block_correlations = movie_info.get_correlations_of_columns(
+                np.array([column for _, column in block]), all_candidates
+            )
+            for (position, _), movie_candidates, correlations in zip(
+                block, candidates, block_correlations
+            ):
+                # candidates are sorted by column, so ties keep ascending movie_id order
+                movie_candidates_correlations = correlations[
+                    np.searchsorted(all_candidates, movie_candidates)
+                ]
+                selected = NeighborIndex.select_neighbors(
+                    movie_candidates_correlations,
+                    self.correlation_threshold,
+                    n_similar_movies,
+                )
+                similar_movies_ids_batch[position] = movie_info.movie_ids[
+                    movie_candidates[selected]
+                ].tolist()
+        return similar_movies_ids_batch
+
+    def __get_bought_together_movie_ids(
+        self, movie_id: int, n_similar_movies: int
+    ) -> List[int]:
+        """Finds the movies most frequently bought together with a movie among the movies purchased by its buyers.
+
+        Movies never purchased together with the movie have a negative correlation with it, so for positive correlation thresholds the result equals correlating the movie with all movies.
+
+        Args:
+            movie_id (int): identifier of movie
+            n_similar_movies (int): number of similar movies
+
+        Returns:
+            List[int]: identifiers of most similar movies, empty if there are none
+        """
+        candidate_info = self.__get_purchase_candidate_info()
+        if movie_id not in candidate_info.movie_index:
+            return []
+        candidate_ids, correlations = candidate_info.get_correlations_of_candidates(
+            movie_id
+        )
+        # candidates are sorted by movie_id, so ties keep ascending movie_id order
+        selected = NeighborIndex.select_neighbors(
+            correlations,
+            self.correlation_threshold,
+            n_similar_movies,
+            excluded=int(np.searchsorted(candidate_ids, movie_id)),
+        )
+        return candidate_ids[selected].tolist()
 
     def __get_correlations(
         self, movie_id: int, based_on: Literal["purchases", "genres"]
@@ -39,20 +474,22 @@ class SimilarMovieRecommender:
             raise ValueError(
                 f"Implementation only supports recommendation based on purchases or genre."
             )
-        movie_info = (
-            self.data_manager.purchases_of_movies
-            if based_on == "purchases"
-            else self.data_manager.genres_of_movies
-        )
+        movie_info = self.__get_movie_info(based_on)
         # if there is no purchases or genre data, raise an error
-        if movie_id not in movie_info.keys():
+        if movie_id not in movie_info.movie_index:
             return (
                 pd.DataFrame
             )  # TODO raise ValueError(f"Input identifier is not existent in {based_on} data.")
-        correlations = movie_info.corrwith(movie_info[movie_id])
+        correlations = pd.Series(
+            movie_info.get_correlations(movie_id),
+            index=pd.Index(movie_info.movie_ids, name="movie_id"),
+        )
         correlations.dropna(inplace=True)
         correlations = pd.DataFrame(correlations, columns=["correlation"]).reset_index()
-        correlations = correlations.sort_values(by="correlation", ascending=False)
+        # sort stable, so that movies with equal correlation keep ascending movie_id order
+        correlations = correlations.sort_values(
+            by="correlation", ascending=False, kind="stable"
+        )
         # remove self correlation
         correlations = correlations[correlations["movie_id"] != movie_id]
         # remove correlations below threshold
@@ -61,33 +498,242 @@ class SimilarMovieRecommender:
         ]
         return correlations
 
+    @Instrumentation.instrument("similar.get_similar_movies")
     def get_similar_movies(
-        self, movie: Movie, n_similar_movies=3, based_on=Literal["purchases", "genres"]
-    ) -> List[Movie]:
+        self,
+        movie: MovieBase,
+        n_similar_movies=3,
+        based_on=Literal["purchases", "genres"],
+    ) -> List[MovieBase]:
         """Creates list of n_similar_movies most similar movies.
 
         Returns:
             Literal['purchases', 'genres']]: most similar videos and how that was judged
         """
-        if based_on == "purchases":
-            # movies are recommened based on jointly purchases
-            correlations = self.__get_correlations(
-                movie_id=movie.identifier, based_on="purchases"
-            )
-        elif based_on == "genres":
-            # movies are recommended based on similar genres
-            correlations = self.__get_correlations(
-                movie_id=movie.identifier, based_on="genres"
+        if based_on not in ["purchases", "genres"]:
+            raise ValueError(f"Input '{based_on}' for based_on is not defined.")
+        self.__apply_added_purchases()
+        result_cache = self.result_cache
+        if result_cache is None:
+            similar_movies_ids = self.__calculate_similar_movie_ids(
+                movie.identifier, n_similar_movies, based_on
             )
         else:
-            raise ValueError(f"Input '{based_on}' for based_on is not defined.")
-        # if no correlation was calculated
-        if correlations.empty:
-            return []
-        high_correlations = correlations[0:n_similar_movies]
-        similar_movies_ids = high_correlations["movie_id"].to_list()
+            key = self.__get_result_key(movie.identifier, n_similar_movies, based_on)
+            similar_movies_ids = result_cache.get(key)
+            if similar_movies_ids is None:
+                similar_movies_ids = tuple(
+                    self.__calculate_similar_movie_ids(
+                        movie.identifier, n_similar_movies, based_on
+                    )
+                )
+                result_cache.put(key, similar_movies_ids)
         similar_movies = []
         for similar_movie_id in similar_movies_ids:
             movie = self.data_manager.get_movie_by_movie_id(similar_movie_id)
             similar_movies.append(movie)
         return similar_movies
+
+    def __calculate_similar_movie_ids(
+        self,
+        movie_id: int,
+        n_similar_movies: int,
+        based_on: Literal["purchases", "genres"],
+    ) -> List[int]:
+        """Finds identifiers of the n_similar_movies most similar movies of one movie without result cache.
+
+        Args:
+            movie_id (int): identifier of movie
+            n_similar_movies (int): number of similar movies
+            based_on (Literal['purchases', 'genres']): what similarity is based on
+
+        Returns:
+            List[int]: identifiers of most similar movies, empty if there are none
+        """
+        neighbor_index = self.__get_neighbor_index(based_on, n_similar_movies)
+        if neighbor_index is not None and not self.__is_outdated(movie_id, based_on):
+            # read precomputed neighbors
+            return neighbor_index.get_neighbors(movie_id)[0:n_similar_movies].tolist()
+        if self.engine == "minhash":
+            return self.__get_approximate_similar_movie_ids(
+                [movie_id], n_similar_movies, based_on
+            )[0]
+        if based_on == "purchases" and self.correlation_threshold > 0:
+            return self.__get_bought_together_movie_ids(movie_id, n_similar_movies)
+        # movies are recommended based on jointly purchases or similar genres
+        correlations = self.__get_correlations(movie_id=movie_id, based_on=based_on)
+        # if no correlation was calculated
+        if correlations.empty:
+            return []
+        high_correlations = correlations[0:n_similar_movies]
+        return high_correlations["movie_id"].to_list()
+
+    def get_similar_movies_batch(
+        self,
+        movie_ids: Sequence[int],
+        n_similar_movies=3,
+        based_on: Literal["purchases", "genres"] = "purchases",
+        block_size=1024,
+    ) -> List[List[MovieBase]]:
+        """Creates lists of n_similar_movies most similar movies for many movies at once.
+
+        Correlations of all given movies are calculated together as normalized matrix products of block_size movies each, instead of one pass per movie. The "minhash" engine reranks the candidates of every movie instead.
+
+        Args:
+            movie_ids (Sequence[int]): identifiers of movies the recommendations are based on
+            n_similar_movies (int, optional): number of similar movies per movie. Defaults to 3.
+            based_on (Literal['purchases', 'genres'], optional): what similarity is based on. Defaults to "purchases".
+            block_size (int, optional): number of movies whose correlations are calculated at once. Defaults to 1024.
+
+        Raises:
+            ValueError: if based_on is not a supported value
+
+        Returns:
+            List[List[MovieBase]]: most similar movies for every entry of movie_ids in the same order, empty if there are none
+        """
+        return [
+            [
+                self.data_manager.get_movie_by_movie_id(similar_movie_id)
+                for similar_movie_id in similar_movies_ids
+            ]
+            for similar_movies_ids in self.get_similar_movie_ids_batch(
+                movie_ids, n_similar_movies, based_on, block_size
+            )
+        ]
+
+    @Instrumentation.instrument("similar.get_similar_movie_ids_batch")
+    def get_similar_movie_ids_batch(
+        self,
+        movie_ids: Sequence[int],
+        n_similar_movies=3,
+        based_on: Literal["purchases", "genres"] = "purchases",
+        block_size=1024,
+    ) -> List[List[int]]:
+        """Like get_similar_movies_batch, but returns identifiers instead of Movie instances.
+
+        Args:
+            movie_ids (Sequence[int]): identifiers of movies the recommendations are based on
+            n_similar_movies (int, optional): number of similar movies per movie. Defaults to 3.
+            based_on (Literal['purchases', 'genres'], optional): what similarity is based on. Defaults to "purchases".
+            block_size (int, optional): number of movies whose correlations are calculated at once. Defaults to 1024.
+
+        Raises:
+            ValueError: if based_on is not a supported value
+
+        Returns:
+            List[List[int]]: identifiers of most similar movies for every entry of movie_ids in the same order
+        """
+        if based_on not in ["purchases", "genres"]:
+            raise ValueError(f"Input '{based_on}' for based_on is not defined.")
+        self.__apply_added_purchases()
+        result_cache = self.result_cache
+        if result_cache is None:
+            return self.__calculate_similar_movie_ids_batch(
+                movie_ids, n_similar_movies, based_on, block_size
+            )
+        # only movies without cached results are calculated, together in one batch
+        similar_movies_ids_by_movie: Dict[int, Tuple[int, ...]] = {}
+        missing_movie_ids: List[int] = []
+        for movie_id in movie_ids:
+            if movie_id in similar_movies_ids_by_movie:
+                continue
+            similar_movies_ids = result_cache.get(
+                self.__get_result_key(movie_id, n_similar_movies, based_on)
+            )
+            if similar_movies_ids is None:
+                missing_movie_ids.append(movie_id)
+                # marks movie as seen, replaced after the calculation
+                similar_movies_ids_by_movie[movie_id] = ()
+            else:
+                similar_movies_ids_by_movie[movie_id] = similar_movies_ids
+        if missing_movie_ids:
+            for movie_id, similar_movies_ids in zip(
+                missing_movie_ids,
+                self.__calculate_similar_movie_ids_batch(
+                    missing_movie_ids, n_similar_movies, based_on, block_size
+                ),
+            ):
+                similar_movies_ids_by_movie[movie_id] = tuple(similar_movies_ids)
+                result_cache.put(
+                    self.__get_result_key(movie_id, n_similar_movies, based_on),
+                    similar_movies_ids_by_movie[movie_id],
+                )
+        return [list(similar_movies_ids_by_movie[movie_id]) for movie_id in movie_ids]
+
+    def __calculate_similar_movie_ids_batch(
+        self,
+        movie_ids: Sequence[int],
+        n_similar_movies: int,
+        based_on: Literal["purchases", "genres"],
+        block_size: int,
+    ) -> List[List[int]]:
+        """Finds identifiers of the n_similar_movies most similar movies of many movies at once without result cache.
+
+        Args:
+            movie_ids (Sequence[int]): identifiers of movies the recommendations are based on
+            n_similar_movies (int): number of similar movies per movie
+            based_on (Literal['purchases', 'genres']): what similarity is based on
+            block_size (int): number of movies whose correlations are calculated at once
+
+        Returns:
+            List[List[int]]: identifiers of most similar movies for every entry of movie_ids in the same order
+        """
+        movie_info = self.__get_movie_info(based_on)
+        neighbor_index = self.__get_neighbor_index(based_on, n_similar_movies)
+        if self.engine == "minhash":
+            # rerank candidates of movies without usable precomputed neighbors
+            approximate_movie_ids = [
+                movie_id
+                for movie_id in movie_ids
+                if neighbor_index is None or self.__is_outdated(movie_id, based_on)
+            ]
+            approximate_similar_movies_ids = dict(
+                zip(
+                    approximate_movie_ids,
+                    self.__get_approximate_similar_movie_ids(
+                        approximate_movie_ids, n_similar_movies, based_on, block_size
+                    ),
+                )
+            )
+            return [
+                (
+                    approximate_similar_movies_ids[movie_id]
+                    if movie_id in approximate_similar_movies_ids
+                    else neighbor_index.get_neighbors(movie_id)[
+                        0:n_similar_movies
+                    ].tolist()
+                )
+                for movie_id in movie_ids
+            ]
+        if neighbor_index is None:
+            # calculate neighbors of the requested movies only
+            neighbor_index = NeighborIndex.build(
+                movie_info,
+                self.correlation_threshold,
+                n_similar_movies,
+                block_size,
+                movie_ids=movie_ids,
+            )
+            outdated_movie_ids = set()
+        else:
+            # recalculate neighbors changed by purchases added since the index was built
+            outdated_movie_ids = {
+                movie_id
+                for movie_id in movie_ids
+                if self.__is_outdated(movie_id, based_on)
+            }
+        outdated_index = NeighborIndex.build(
+            movie_info,
+            self.correlation_threshold,
+            n_similar_movies,
+            block_size,
+            movie_ids=sorted(outdated_movie_ids),
+        )
+        similar_movies_ids_batch = []
+        for movie_id in movie_ids:
+            similar_movies_ids_batch.append(
+                (outdated_index if movie_id in outdated_movie_ids else neighbor_index)
+                .get_neighbors(movie_id)[0:n_similar_movies]
+                .tolist()
+            )
+        return similar_movies_ids_batch
@@ -0,0 +1,427 @@
+# imports
+import hashlib
+import json
+import os
+import shutil
+from functools import partial
+from os.path import exists, join
+from typing import Callable, Dict, List, Union
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# import movie recommendations modules
+from movie_recommendations.DataManager import DataManager
+from movie_recommendations.Instrumentation import Instrumentation
+from movie_recommendations.MovieMatrix import MovieMatrix
+from movie_recommendations.MovieTable import MovieTable
+from movie_recommendations.UserTable import UserTable
+
+
+class Snapshot:
+    """Helper class to persist the parsed tables and derived matrices of a DataManager in a binary columnar layout.
+
+    Every array is stored as .npy file which is memory-mapped on load. Strings are stored as concatenated UTF-8 bytes with offsets. A manifest.json describes the arrays and the data files the snapshot was created from.
+
+    The typed tables of movies and users are stored with their arrays, so that loading them only maps files instead of parsing movie lists again. Strings of the data frames are only decoded when a data frame is accessed.
+    """
+
+    FORMAT_VERSION = 2
+    TABLES = ["user_data", "movie_data", "session_data"]
+    MATRICES = ["purchases_of_movies", "genres_of_movies"]
+    # arrays of the typed tables, names of movies and users are already stored as UTF-8 bytes with offsets
+    TYPED_TABLES: Dict[str, List[str]] = {
+        "movie_table": [
+            "movie_ids",
+            "name_data",
+            "name_offsets",
+            "years",
+            "genre_names",
+            "genre_offsets",
+            "genre_codes",
+            "ratings",
+            "prices",
+        ],
+        "user_table": [
+            "user_ids",
+            "name_data",
+            "name_offsets",
+            "viewed_offsets",
+            "viewed_movie_ids",
+            "purchased_offsets",
+            "purchased_movie_ids",
+        ],
+    }
+
+    @staticmethod
+    def __get_file_hash(path: str) -> str:
+        """Calculates sha256 hash of file content.
+
+        Args:
+            path (str): path of file
+
+        Returns:
+            str: hex digest of hash
+        """
+        file_hash = hashlib.sha256()
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                file_hash.update(block)
+        return file_hash.hexdigest()
+
+    @staticmethod
+    def describe_source(path: str) -> Dict:
+        """Collects size, modification time and hash of a data file.
+
+        Args:
+            path (str): path of data file
+
+        Returns:
+            Dict: description of data file
+        """
+        status = os.stat(path)
+        return {
+            "path": path,
+            "size": status.st_size,
+            "mtime_ns": status.st_mtime_ns,
+            "sha256": Snapshot.__get_file_hash(path),
+        }
+
+    @staticmethod
+    def __save_array(directory: str, name: str, array: np.ndarray) -> str:
+        """Stores array as .npy files, arrays of strings are stored as UTF-8 bytes with offsets and missing value mask.
+
+        Args:
+            directory (str): directory of snapshot
+            name (str): name of array
+            array (np.ndarray): array to be stored
+
+        Returns:
+            str: kind of stored array, either "numeric" or "string"
+        """
+        if array.dtype != object:
+            np.save(join(directory, f"{name}.npy"), array)
+            return "numeric"
+        is_missing = pd.isna(array)
+        encoded = [
+            b"" if missing else str(value).encode("utf-8")
+            for value, missing in zip(array.tolist(), is_missing)
+        ]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        np.save(
+            join(directory, f"{name}.data.npy"),
+            np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        )
+        np.save(join(directory, f"{name}.offsets.npy"), offsets)
+        np.save(join(directory, f"{name}.missing.npy"), is_missing)
+        return "string"
+
+    @staticmethod
+    def __map_array(directory: str, name: str, kind: str) -> Dict[str, np.ndarray]:
+        """Memory-maps the files of an array stored by __save_array.
+
+        Args:
+            directory (str): directory of snapshot
+            name (str): name of array
+            kind (str): kind of stored array, either "numeric" or "string"
+
+        Returns:
+            Dict[str, np.ndarray]: "values" of numeric arrays, "data", "offsets" and "missing" of arrays of strings
+        """
+        if kind == "numeric":
+            return {"values": np.load(join(directory, f"{name}.npy"), mmap_mode="r")}
+        return {
+            part: np.load(join(directory, f"{name}.{part}.npy"), mmap_mode="r")
+            for part in ["data", "offsets", "missing"]
+        }
+
+    @staticmethod
+    def __decode_array(files: Dict[str, np.ndarray]) -> np.ndarray:
+        """Creates array from the files mapped by __map_array, numeric arrays stay memory-mapped and strings are decoded.
+
+        Args:
+            files (Dict[str, np.ndarray]): memory-mapped files of array
+
+        Returns:
+            np.ndarray: loaded array
+        """
+        if "values" in files:
+            return files["values"]
+        data = files["data"].tobytes()
+        offsets = files["offsets"].tolist()
+        is_missing = np.asarray(files["missing"])
+        text = data.decode("utf-8")
+        array = np.empty(len(is_missing), dtype=object)
+        if len(text) == len(data):
+            # byte offsets equal character offsets of ASCII text, so text is decoded once instead of per value
+            array[:] = [
+                text[start:end] for start, end in zip(offsets[:-1], offsets[1:])
+            ]
+        else:
+            array[:] = [
+                data[start:end].decode("utf-8")
+                for start, end in zip(offsets[:-1], offsets[1:])
+            ]
+        array[is_missing] = np.nan
+        return array
+
+    @staticmethod
+    def is_valid(snapshot_directory: str, source_paths: Dict[str, str]) -> bool:
+        """Checks whether snapshot exists and was created from the current content of the data files.
+
+        Files with unchanged size and modification time are considered unchanged, otherwise their hash is compared.
+
+        Args:
+            snapshot_directory (str): directory of snapshot
+            source_paths (Dict[str, str]): maps table name to path of data file
+
+        Returns:
+            bool: True if snapshot can be used
+        """
+        manifest_path = join(snapshot_directory, "manifest.json")
+        if not exists(manifest_path):
+            return False
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+        if manifest.get("format_version") != Snapshot.FORMAT_VERSION:
+            return False
+        sources = manifest["sources"]
+        if set(sources) != set(source_paths):
+            return False
+        return all(
+            Snapshot.is_source_unchanged(sources[table], path)
+            for table, path in source_paths.items()
+        )
+
+    @staticmethod
+    def is_source_unchanged(source: Dict, path: str) -> bool:
+        """Checks whether a data file still has the content described by describe_source.
+
+        Files with unchanged size and modification time are considered unchanged, otherwise their hash is compared.
+
+        Args:
+            source (Dict): description of data file, see describe_source
+            path (str): path of data file
+
+        Returns:
+            bool: True if the file exists and its content is unchanged
+        """
+        if not exists(path):
+            return False
+        status = os.stat(path)
+        if source["size"] != status.st_size:
+            return False
+        if source["mtime_ns"] == status.st_mtime_ns:
+            return True
+        return source["sha256"] == Snapshot.__get_file_hash(path)
+
+    @staticmethod
+    @Instrumentation.instrument("snapshot.save")
+    def save(
+        data_manager: DataManager,
+        snapshot_directory: str,
+        source_paths: Dict[str, str],
+    ) -> None:
+        """Stores tables and matrices of data_manager. An existing snapshot is replaced.
+
+        Args:
+            data_manager (DataManager): manages the data to be stored
+            snapshot_directory (str): directory of snapshot
+            source_paths (Dict[str, str]): maps table name to path of data file the table was read from
+        """
+        # write into temporary directory first, so that an interrupted save leaves no partial snapshot
+        temporary_directory = f"{snapshot_directory}.tmp"
+        shutil.rmtree(temporary_directory, ignore_errors=True)
+        os.makedirs(temporary_directory)
+        manifest = {
+            "format_version": Snapshot.FORMAT_VERSION,
+            "sources": {
+                table: Snapshot.describe_source(path)
+                for table, path in source_paths.items()
+            },
+            "tables": {},
+            "typed_tables": {},
+            "matrices": {},
+        }
+        for table in Snapshot.TABLES:
+            table_data: pd.DataFrame = getattr(data_manager, table)
+            manifest["tables"][table] = [
+                {
+                    "name": column,
+                    "kind": Snapshot.__save_array(
+                        temporary_directory,
+                        f"{table}.{column}",
+                        table_data[column].to_numpy(),
+                    ),
+                }
+                for column in table_data.columns
+            ]
+        for table_name, array_names in Snapshot.TYPED_TABLES.items():
+            typed_table: Union[MovieTable, UserTable] = getattr(
+                data_manager, table_name
+            )
+            manifest["typed_tables"][table_name] = {
+                array_name: Snapshot.__save_array(
+                    temporary_directory,
+                    f"{table_name}.{array_name}",
+                    getattr(typed_table, array_name),
+                )
+                for array_name in array_names
+            }
+        for matrix_name in Snapshot.MATRICES:
+            movie_matrix: MovieMatrix = getattr(data_manager, matrix_name)
+            manifest["matrices"][matrix_name] = {
+                "shape": list(movie_matrix.matrix.shape),
+                "arrays": {
+                    array_name: Snapshot.__save_array(
+                        temporary_directory, f"{matrix_name}.{array_name}", array
+                    )
+                    for array_name, array in [
+                        ("indptr", movie_matrix.matrix.indptr),
+                        ("indices", movie_matrix.matrix.indices),
+                        ("data", movie_matrix.matrix.data),
+                        ("row_ids", movie_matrix.row_ids),
+                        ("movie_ids", movie_matrix.movie_ids),
+                    ]
+                },
+            }
+        with open(join(temporary_directory, "manifest.json"), "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        shutil.rmtree(snapshot_directory, ignore_errors=True)
+        os.replace(temporary_directory, snapshot_directory)
+
+    @staticmethod
+    def __map_arrays(
+        snapshot_directory: str, prefix: str, kinds: Dict[str, str]
+    ) -> Dict[str, Dict[str, np.ndarray]]:
+        """Memory-maps the files of several arrays stored in snapshot.
+
+        Args:
+            snapshot_directory (str): directory of snapshot
+            prefix (str): name of table or matrix the arrays belong to, e.g. "purchases_of_movies"
+            kinds (Dict[str, str]): kind of every array by name, as described in manifest
+
+        Returns:
+            Dict[str, Dict[str, np.ndarray]]: memory-mapped files of every array by name, e.g. "indptr"
+        """
+        return {
+            array_name: Snapshot.__map_array(
+                snapshot_directory, f"{prefix}.{array_name}", kind
+            )
+            for array_name, kind in kinds.items()
+        }
+
+    @staticmethod
+    @Instrumentation.instrument("snapshot.load_table")
+    def load_table(columns: Dict[str, Dict[str, np.ndarray]]) -> pd.DataFrame:
+        """Creates data frame from memory-mapped columns of snapshot, strings are decoded.
+
+        Args:
+            columns (Dict[str, Dict[str, np.ndarray]]): memory-mapped files of every column by name
+
+        Returns:
+            pd.DataFrame: table stored in snapshot
+        """
+        return pd.DataFrame(
+            {name: Snapshot.__decode_array(files) for name, files in columns.items()}
+        )
+
+    @staticmethod
+    @Instrumentation.instrument("snapshot.load_typed_table")
+    def load_typed_table(
+        table_class: Callable[..., Union[MovieTable, UserTable]],
+        arrays: Dict[str, Dict[str, np.ndarray]],
+    ) -> Union[MovieTable, UserTable]:
+        """Creates typed table from memory-mapped arrays of snapshot.
+
+        Args:
+            table_class (Callable[..., Union[MovieTable, UserTable]]): MovieTable or UserTable
+            arrays (Dict[str, Dict[str, np.ndarray]]): memory-mapped files of every array by name, e.g. "user_ids"
+
+        Returns:
+            Union[MovieTable, UserTable]: table stored in snapshot
+        """
+        return table_class(
+            **{name: Snapshot.__decode_array(files) for name, files in arrays.items()}
+        )
+
+    @staticmethod
+    @Instrumentation.instrument("snapshot.load_matrix")
+    def load_matrix(
+        arrays: Dict[str, Dict[str, np.ndarray]], description: Dict
+    ) -> MovieMatrix:
+        """Creates MovieMatrix from memory-mapped arrays of snapshot.
+
+        Args:
+            arrays (Dict[str, Dict[str, np.ndarray]]): memory-mapped files of every array of matrix by name, e.g. "indptr"
+            description (Dict): description of matrix in manifest
+
+        Returns:
+            MovieMatrix: matrix stored in snapshot
+        """
+        arrays = {
+            name: Snapshot.__decode_array(files) for name, files in arrays.items()
+        }
+        return MovieMatrix(
+            sparse.csc_matrix(
+                (arrays["data"], arrays["indices"], arrays["indptr"]),
+                shape=tuple(description["shape"]),
+            ),
+            arrays["row_ids"],
+            arrays["movie_ids"],
+        )
+
+    @staticmethod
+    @Instrumentation.instrument("snapshot.load")
+    def load(snapshot_directory: str) -> DataManager:
+        """Creates DataManager from snapshot without parsing data files or rebuilding tables and matrices.
+
+        All files are memory-mapped at once, so that a later save replacing the snapshot cannot mix old and new arrays, mappings stay readable after their files are removed. Data frames, typed tables and matrices are only created from the mappings on first access.
+
+        Args:
+            snapshot_directory (str): directory of snapshot
+
+        Returns:
+            DataManager: manages the data stored in snapshot
+        """
+        with open(join(snapshot_directory, "manifest.json")) as manifest_file:
+            manifest = json.load(manifest_file)
+        tables = {
+            table: partial(
+                Snapshot.load_table,
+                Snapshot.__map_arrays(
+                    snapshot_directory,
+                    table,
+                    {column["name"]: column["kind"] for column in columns},
+                ),
+            )
+            for table, columns in manifest["tables"].items()
+        }
+        typed_tables = {
+            table_name: partial(
+                Snapshot.load_typed_table,
+                MovieTable if table_name == "movie_table" else UserTable,
+                Snapshot.__map_arrays(snapshot_directory, table_name, kinds),
+            )
+            for table_name, kinds in manifest["typed_tables"].items()
+        }
+        matrices = {
+            matrix_name: partial(
+                Snapshot.load_matrix,
+                Snapshot.__map_arrays(
+                    snapshot_directory, matrix_name, description["arrays"]
+                ),
+                description,
+            )
+            for matrix_name, description in manifest["matrices"].items()
+        }
+        return DataManager(
+            tables["user_data"],
+            tables["movie_data"],
+            tables["session_data"],
+            purchases_of_movies=matrices["purchases_of_movies"],
+            genres_of_movies=matrices["genres_of_movies"],
+            movie_table=typed_tables["movie_table"],
+            user_table=typed_tables["user_table"],
+        )
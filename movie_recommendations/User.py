@@ -1,7 +1,11 @@
+# imports
 from typing import List
 
+# import movie recommendations modules
+from movie_recommendations.UserBase import UserBase
 
-class User:
+
+class User(UserBase):
     """Stores user characteristics.
 
     Attributes:
@@ -11,6 +15,8 @@ class User:
         purchased (List[int]): movies purchased by user
     """
 
+    __slots__ = ("identifier", "name", "viewed", "purchased")
+
     def __init__(
         self, identifier: int, name: str, viewed: List[int], purchased: List[int]
     ) -> None:
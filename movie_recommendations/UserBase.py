@@ -0,0 +1,22 @@
+# imports
+from typing import List
+
+
+class UserBase:
+    """User characteristics shared by User, which stores them, and UserView, which reads them from a UserTable.
+
+    The base declares no slots, so that neither subclass carries the unused slots of the other.
+
+    Attributes:
+        identifier (int): unique identifier
+        name (str): user name
+        viewed (List[int]): movies viewed by user
+        purchased (List[int]): movies purchased by user
+    """
+
+    __slots__ = ()
+
+    identifier: int
+    name: str
+    viewed: List[int]
+    purchased: List[int]
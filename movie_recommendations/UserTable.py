@@ -0,0 +1,307 @@
+# imports
+from itertools import chain
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+# import movie recommendations modules
+from movie_recommendations.IdentifierIndex import IdentifierIndex
+from movie_recommendations.MovieTable import decode_string, encode_strings
+from movie_recommendations.UserBase import UserBase
+
+
+class UserTable:
+    """Stores the characteristics of all users column by column in typed arrays.
+
+    Names are stored as concatenated UTF-8 bytes with offsets, viewed and purchased movies in compressed sparse row layout, so that the table holds no Python object per user. Movies added by add_viewed and add_purchased are kept separately per user. Users are handed out as UserView instances, which read their attributes from the table.
+
+    Attributes:
+        user_ids (np.ndarray): identifier of every row
+        name_data (np.ndarray): UTF-8 bytes of all names with dtype uint8
+        name_offsets (np.ndarray): name of row i is name_data[name_offsets[i]:name_offsets[i + 1]]
+        viewed_offsets (np.ndarray): movies viewed by row i are viewed_movie_ids[viewed_offsets[i]:viewed_offsets[i + 1]]
+        viewed_movie_ids (np.ndarray): identifiers of viewed movies
+        purchased_offsets (np.ndarray): movies purchased by row i are purchased_movie_ids[purchased_offsets[i]:purchased_offsets[i + 1]]
+        purchased_movie_ids (np.ndarray): identifiers of purchased movies
+    """
+
+    def __init__(
+        self,
+        user_ids: np.ndarray,
+        name_data: np.ndarray,
+        name_offsets: np.ndarray,
+        viewed_offsets: np.ndarray,
+        viewed_movie_ids: np.ndarray,
+        purchased_offsets: np.ndarray,
+        purchased_movie_ids: np.ndarray,
+    ) -> None:
+        self.user_ids = user_ids
+        self.name_data = name_data
+        self.name_offsets = name_offsets
+        self.viewed_offsets = viewed_offsets
+        self.viewed_movie_ids = viewed_movie_ids
+        self.purchased_offsets = purchased_offsets
+        self.purchased_movie_ids = purchased_movie_ids
+        self.__rows = IdentifierIndex(user_ids)
+        # movies added after creation per row
+        self.__added_viewed: Dict[int, List[int]] = {}
+        self.__added_purchased: Dict[int, List[int]] = {}
+
+    @staticmethod
+    def parse_movie_lists(
+        entries: Sequence[str], chunk_size=262144
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Parses entries like "1;5;8" into offsets and movie identifiers in compressed sparse row layout.
+
+        Entries are joined and parsed chunk by chunk in C by numpy instead of being split into lists of strings, so that memory beyond the result is bounded by the size of a chunk.
+
+        Args:
+            entries (Sequence[str]): one entry per user
+            chunk_size (int, optional): number of entries parsed at once. Defaults to 262144.
+
+        Raises:
+            ValueError: if an entry is not a list of integers separated by ";"
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: offsets of every entry and movie identifiers of all entries with dtype int32 if they fit, else int64
+        """
+        offsets = np.zeros(len(entries) + 1, dtype=np.int64)
+        chunks = []
+        for start in range(0, len(entries), chunk_size):
+            chunk = entries[start : start + chunk_size]
+            text = ";".join(chunk)
+            data = text.encode("utf-8")
+            # identifiers are ASCII, so positions of characters equal positions of bytes
+            movie_ids = np.fromstring(text, dtype=np.int64, sep=";")
+            separators = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == 59)
+            if len(data) != len(text) or len(movie_ids) != len(separators) + 1:
+                raise ValueError(
+                    f"Movie lists of entries {start} to {start + len(chunk) - 1} are not integers separated by ';'."
+                )
+            # an entry starts after the separators of all entries before it
+            entry_starts = np.cumsum(
+                np.fromiter(map(len, chunk), dtype=np.int64, count=len(chunk)) + 1
+            )
+            offsets[start + 1 : start + len(chunk) + 1] = offsets[start] + np.append(
+                np.searchsorted(separators, entry_starts[:-1]), len(movie_ids)
+            )
+            # identifiers usually fit into 32 bits, which halves memory
+            if (
+                np.iinfo(np.int32).min <= movie_ids.min()
+                and movie_ids.max() <= np.iinfo(np.int32).max
+            ):
+                movie_ids = movie_ids.astype(np.int32)
+            chunks.append(movie_ids)
+        movie_ids = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int32)
+        return offsets, movie_ids
+
+    @classmethod
+    def from_user_data(cls, user_data: pd.DataFrame) -> "UserTable":
+        """Creates table from user data.
+
+        Args:
+            user_data (pd.DataFrame): user data with columns "user_id", "user_name", "viewed", "purchased"
+
+        Returns:
+            UserTable: characteristics of all users of user_data
+        """
+        name_data, name_offsets = encode_strings(user_data["user_name"].tolist())
+        viewed_offsets, viewed_movie_ids = UserTable.parse_movie_lists(
+            user_data["viewed"].tolist()
+        )
+        purchased_offsets, purchased_movie_ids = UserTable.parse_movie_lists(
+            user_data["purchased"].tolist()
+        )
+        return cls(
+            user_data["user_id"].to_numpy(),
+            name_data,
+            name_offsets,
+            viewed_offsets,
+            viewed_movie_ids,
+            purchased_offsets,
+            purchased_movie_ids,
+        )
+
+    def __len__(self) -> int:
+        """Returns number of users."""
+        return len(self.user_ids)
+
+    def get_row(self, user_id: int) -> int:
+        """Finds row of a user.
+
+        Args:
+            user_id (int): identifier of user
+
+        Raises:
+            KeyError: if there is no user with user_id
+
+        Returns:
+            int: row of user
+        """
+        row = self.__rows.get(user_id)
+        if row < 0:
+            raise KeyError(f"User id {user_id} does not exist.")
+        return row
+
+    def get_name(self, row: int) -> str:
+        """Decodes name of a row.
+
+        Args:
+            row (int): row of user
+
+        Returns:
+            str: name of user
+        """
+        return decode_string(self.name_data, self.name_offsets, row)
+
+    def get_viewed(self, row: int) -> List[int]:
+        """Collects movies viewed by a row, including added ones.
+
+        Args:
+            row (int): row of user
+
+        Returns:
+            List[int]: identifiers of viewed movies
+        """
+        return self.viewed_movie_ids[
+            self.viewed_offsets[row] : self.viewed_offsets[row + 1]
+        ].tolist() + self.__added_viewed.get(row, [])
+
+    def get_purchased(self, row: int) -> List[int]:
+        """Collects movies purchased by a row, including added ones.
+
+        Args:
+            row (int): row of user
+
+        Returns:
+            List[int]: identifiers of purchased movies
+        """
+        return self.purchased_movie_ids[
+            self.purchased_offsets[row] : self.purchased_offsets[row + 1]
+        ].tolist() + self.__added_purchased.get(row, [])
+
+    def add_viewed(self, row: int, movie_id: int) -> None:
+        """Adds a viewed movie to a row.
+
+        Args:
+            row (int): row of user
+            movie_id (int): identifier of viewed movie
+        """
+        self.__added_viewed.setdefault(row, []).append(movie_id)
+
+    def add_purchased(self, row: int, movie_id: int) -> None:
+        """Adds a purchased movie to a row.
+
+        Args:
+            row (int): row of user
+            movie_id (int): identifier of purchased movie
+        """
+        self.__added_purchased.setdefault(row, []).append(movie_id)
+
+    def __get_pairs(
+        self,
+        offsets: np.ndarray,
+        movie_ids: np.ndarray,
+        added_movie_ids: Dict[int, List[int]],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Pairs every movie of a compressed sparse row column with its user, added movies follow all other movies.
+
+        Args:
+            offsets (np.ndarray): offsets of every row
+            movie_ids (np.ndarray): movie identifiers of all rows
+            added_movie_ids (Dict[int, List[int]]): movies added after creation per row
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: user id and movie id of every pair
+        """
+        user_ids = np.repeat(self.user_ids, np.diff(offsets))
+        if added_movie_ids:
+            added_rows = list(added_movie_ids)
+            user_ids = np.concatenate(
+                [
+                    user_ids,
+                    np.repeat(
+                        self.user_ids[added_rows],
+                        [len(added_movie_ids[row]) for row in added_rows],
+                    ),
+                ]
+            )
+            movie_ids = np.concatenate(
+                [
+                    movie_ids,
+                    np.fromiter(
+                        chain.from_iterable(added_movie_ids.values()),
+                        dtype=np.int64,
+                    ),
+                ]
+            )
+        return user_ids, movie_ids
+
+    def get_views(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Collects all views, added views follow all other views.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: user id and movie id of every view
+        """
+        return self.__get_pairs(
+            self.viewed_offsets, self.viewed_movie_ids, self.__added_viewed
+        )
+
+    def get_purchases(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Collects all purchases, added purchases follow all other purchases.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: user id and movie id of every purchase
+        """
+        return self.__get_pairs(
+            self.purchased_offsets, self.purchased_movie_ids, self.__added_purchased
+        )
+
+    def get_user(self, user_id: int) -> "UserView":
+        """Creates view of a user.
+
+        Args:
+            user_id (int): identifier of user
+
+        Raises:
+            KeyError: if there is no user with user_id
+
+        Returns:
+            UserView: user reading its attributes from the table
+        """
+        return UserView(self, self.get_row(user_id))
+
+
+class UserView(UserBase):
+    """User whose attributes are read from a row of a UserTable, so that only a reference to the table and the row are stored per instance.
+
+    Attributes:
+        table (UserTable): table containing the user
+        row (int): row of user in table
+    """
+
+    __slots__ = ("table", "row")
+
+    def __init__(self, table: UserTable, row: int) -> None:
+        self.table = table
+        self.row = row
+
+    @property
+    def identifier(self) -> int:
+        """Unique identifier."""
+        return self.table.user_ids[self.row]
+
+    @property
+    def name(self) -> str:
+        """User name."""
+        return self.table.get_name(self.row)
+
+    @property
+    def viewed(self) -> List[int]:
+        """Movies viewed by user."""
+        return self.table.get_viewed(self.row)
+
+    @property
+    def purchased(self) -> List[int]:
+        """Movies purchased by user."""
+        return self.table.get_purchased(self.row)
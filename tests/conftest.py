@@ -0,0 +1,15 @@
+# imports
+import pytest
+
+# import movie recommendations modules
+from movie_recommendations.DataGenerator import DataGenerator
+
+
+@pytest.fixture(scope="session")
+def data_directory(tmp_path_factory):
+    """Directory of small synthetic data files, generated once per test session."""
+    data_directory = str(tmp_path_factory.mktemp("data"))
+    DataGenerator(
+        n_users=3000, n_movies=400, n_sessions=50, popularity_exponent=0.8
+    ).generate(data_directory)
+    return data_directory
@@ -0,0 +1,55 @@
+# imports
+import os
+import numpy as np
+import pytest
+
+# import movie recommendations modules
+from movie_recommendations.CoPurchaseCounts import CoPurchaseCounts
+from movie_recommendations.DataLoader import DataLoader
+
+
+def assert_counts_equal(counts, expected):
+    np.testing.assert_array_equal(counts.movie_ids, expected.movie_ids)
+    assert counts.n_rows == expected.n_rows
+    assert (counts.co_counts != expected.co_counts).nnz == 0
+
+
+@pytest.fixture(scope="module")
+def expected(data_directory):
+    return CoPurchaseCounts.from_movie_matrix(
+        DataLoader.load_data_manager(data_directory).purchases_of_movies
+    )
+
+
+@pytest.mark.parametrize("n_shards, n_workers", [(1, 1), (3, 1), (4, 2)])
+def test_sharded_counts_equal_single_process_counts(
+    data_directory, expected, n_shards, n_workers
+):
+    user_path = DataLoader.get_source_paths(data_directory)["user_data"]
+    assert_counts_equal(
+        CoPurchaseCounts.build_sharded(user_path, n_shards, n_workers), expected
+    )
+
+
+def test_reused_shards_equal_single_process_counts(data_directory, expected, tmp_path):
+    user_path = DataLoader.get_source_paths(data_directory)["user_data"]
+    shard_directory = str(tmp_path)
+    # shard counted before, e.g. by another machine
+    shard_path = CoPurchaseCounts.count_shard(user_path, 1, 3, shard_directory)
+    modification_time = os.stat(shard_path).st_mtime_ns
+    assert_counts_equal(
+        CoPurchaseCounts.build_sharded(user_path, 3, shard_directory=shard_directory),
+        expected,
+    )
+    # all shards are valid now and only merged
+    assert_counts_equal(
+        CoPurchaseCounts.build_sharded(user_path, 3, shard_directory=shard_directory),
+        expected,
+    )
+    assert os.stat(shard_path).st_mtime_ns == modification_time
+
+
+def test_saved_counts_equal_loaded_counts(expected, tmp_path):
+    path = str(tmp_path / "co_purchases.npz")
+    expected.save(path)
+    assert_counts_equal(CoPurchaseCounts.load(path), expected)
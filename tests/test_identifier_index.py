@@ -0,0 +1,62 @@
+# imports
+from os.path import dirname, join
+import numpy as np
+import pytest
+
+# import movie recommendations modules
+from movie_recommendations.DataLoader import DataLoader
+from movie_recommendations.IdentifierIndex import IdentifierIndex
+
+DATA_DIRECTORY = join(dirname(dirname(__file__)), "data")
+
+
+@pytest.mark.parametrize(
+    "identifiers",
+    [np.arange(1, 6), np.array([1, 5, 10**9])],
+    ids=["dense", "sorted"],
+)
+def test_get_finds_rows_of_integer_identifiers(identifiers):
+    index = IdentifierIndex(identifiers)
+    for row, identifier in enumerate(identifiers.tolist()):
+        assert index.get(identifier) == row
+        assert index.get(np.int32(identifier)) == row
+
+
+@pytest.mark.parametrize(
+    "identifiers",
+    [np.arange(1, 6), np.array([1, 5, 10**9])],
+    ids=["dense", "sorted"],
+)
+@pytest.mark.parametrize("identifier", [3.5, 1.0, "3", None, (1,)])
+def test_get_does_not_find_non_integer_identifiers(identifiers, identifier):
+    assert IdentifierIndex(identifiers).get(identifier) == -1
+
+
+@pytest.mark.parametrize(
+    "identifiers",
+    [np.arange(1, 6), np.array([1, 5, 10**9])],
+    ids=["dense", "sorted"],
+)
+@pytest.mark.parametrize("identifier", [0, -1, 6, 10**9 + 1, 2**70, -(2**70)])
+def test_get_does_not_find_out_of_range_identifiers(identifiers, identifier):
+    assert IdentifierIndex(identifiers).get(identifier) == -1
+
+
+def test_get_returns_last_row_of_duplicated_identifier():
+    assert IdentifierIndex(np.array([3, 1, 3])).get(3) == 2
+    assert IdentifierIndex(np.array([10**9, 1, 10**9])).get(10**9) == 2
+
+
+def test_get_finds_string_identifiers():
+    index = IdentifierIndex(np.array(["b", "a", "c"], dtype=object))
+    assert index.get("a") == 1
+    assert index.get("d") == -1
+
+
+@pytest.mark.parametrize("identifier", [3.5, "3", 10**9])
+def test_data_manager_raises_key_error_for_unknown_identifiers(identifier):
+    data_manager = DataLoader.load_data_manager(DATA_DIRECTORY)
+    with pytest.raises(KeyError):
+        data_manager.get_movie_by_movie_id(identifier)
+    with pytest.raises(KeyError):
+        data_manager.get_user_by_user_id(identifier)
@@ -0,0 +1,70 @@
+# imports
+import numpy as np
+import pytest
+
+# import movie recommendations modules
+from movie_recommendations.DataGenerator import DataGenerator
+from movie_recommendations.DataLoader import DataLoader
+from movie_recommendations.SimilarMovieRecommender import SimilarMovieRecommender
+
+# threshold at which most movies of random purchases have similar movies, like benchmarks/run_benchmarks.py
+CORRELATION_THRESHOLD = 0.05
+
+
+@pytest.fixture(scope="module")
+def data_manager(tmp_path_factory):
+    data_directory = str(tmp_path_factory.mktemp("minhash_data"))
+    DataGenerator(n_users=20000, n_movies=2000, n_sessions=10).generate(data_directory)
+    return DataLoader.load_data_manager(data_directory)
+
+
+@pytest.fixture(scope="module")
+def movie_ids(data_manager):
+    return np.random.default_rng(0).choice(
+        data_manager.movie_table.movie_ids, 100, replace=False
+    )
+
+
+@pytest.mark.parametrize("based_on, min_recall", [("purchases", 0.8), ("genres", 0.95)])
+def test_default_parameters_find_exact_similar_movies(
+    data_manager, movie_ids, based_on, min_recall
+):
+    exact = SimilarMovieRecommender(
+        data_manager, CORRELATION_THRESHOLD
+    ).get_similar_movie_ids_batch(movie_ids, 10, based_on)
+    approximate = SimilarMovieRecommender(
+        data_manager, CORRELATION_THRESHOLD, engine="minhash"
+    ).get_similar_movie_ids_batch(movie_ids, 10, based_on)
+    recalls = [
+        len(set(approximate_ids) & set(exact_ids)) / len(exact_ids)
+        for approximate_ids, exact_ids in zip(approximate, exact)
+        if exact_ids
+    ]
+    assert len(recalls) >= len(movie_ids) // 2
+    assert np.mean(recalls) >= min_recall
+
+
+@pytest.mark.parametrize(
+    "based_on, max_candidate_share", [("purchases", 0.05), ("genres", 0.1)]
+)
+def test_default_parameters_prune_candidates(
+    data_manager, movie_ids, based_on, max_candidate_share
+):
+    similar_movie_recommender = SimilarMovieRecommender(
+        data_manager, CORRELATION_THRESHOLD, engine="minhash"
+    )
+    similar_movie_recommender.build_indexes()
+    minhash_index = similar_movie_recommender.minhash_indexes[based_on]
+    movie_matrix = (
+        data_manager.purchases_of_movies
+        if based_on == "purchases"
+        else data_manager.genres_of_movies
+    )
+    candidate_counts = [
+        len(minhash_index.get_candidates(movie_matrix.movie_index[movie_id]))
+        for movie_id in movie_ids.tolist()
+        if movie_id in movie_matrix.movie_index
+    ]
+    assert np.mean(candidate_counts) <= max_candidate_share * len(
+        movie_matrix.movie_ids
+    )
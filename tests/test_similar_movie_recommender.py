@@ -0,0 +1,172 @@
+# imports
+import numpy as np
+import pytest
+
+# import movie recommendations modules
+from movie_recommendations.CoPurchaseCounts import CoPurchaseCounts
+from movie_recommendations.DataLoader import DataLoader
+from movie_recommendations.SimilarMovieRecommender import SimilarMovieRecommender
+
+# on random purchases few movies correlate above 0.05, negative thresholds include movies never bought together
+THRESHOLDS = [0.05, 0.0, -0.2]
+
+
+@pytest.fixture(scope="module")
+def data_manager(data_directory):
+    return DataLoader.load_data_manager(data_directory)
+
+
+@pytest.fixture(scope="module")
+def movie_ids(data_manager):
+    return (
+        np.random.default_rng(0)
+        .choice(data_manager.movie_table.movie_ids, 40, replace=False)
+        .tolist()
+    )
+
+
+def get_similar_movie_ids(
+    similar_movie_recommender, data_manager, movie_id, n, based_on
+):
+    return [
+        movie.identifier
+        for movie in similar_movie_recommender.get_similar_movies(
+            data_manager.get_movie_by_movie_id(movie_id), n, based_on
+        )
+    ]
+
+
+@pytest.mark.parametrize("correlation_threshold", THRESHOLDS)
+@pytest.mark.parametrize("based_on", ["purchases", "genres"])
+def test_batch_and_neighbor_index_equal_single_queries(
+    data_manager, movie_ids, based_on, correlation_threshold
+):
+    similar_movie_recommender = SimilarMovieRecommender(
+        data_manager, correlation_threshold
+    )
+    single = [
+        get_similar_movie_ids(
+            similar_movie_recommender, data_manager, movie_id, 5, based_on
+        )
+        for movie_id in movie_ids
+    ]
+    batch = similar_movie_recommender.get_similar_movie_ids_batch(
+        movie_ids, 5, based_on
+    )
+    indexed_movie_recommender = SimilarMovieRecommender(
+        data_manager, correlation_threshold
+    )
+    indexed_movie_recommender.build_neighbor_indexes(n_neighbors=5)
+    indexed = [
+        get_similar_movie_ids(
+            indexed_movie_recommender, data_manager, movie_id, 5, based_on
+        )
+        for movie_id in movie_ids
+    ]
+    indexed_batch = indexed_movie_recommender.get_similar_movie_ids_batch(
+        movie_ids, 5, based_on
+    )
+    assert any(single)
+    assert batch == single
+    assert indexed == single
+    assert indexed_batch == single
+
+
+@pytest.mark.parametrize("correlation_threshold", THRESHOLDS)
+def test_co_purchase_counts_equal_purchase_matrix(
+    data_manager, movie_ids, correlation_threshold
+):
+    expected = SimilarMovieRecommender(
+        data_manager, correlation_threshold
+    ).get_similar_movie_ids_batch(movie_ids, 5, "purchases")
+    similar_movie_recommender = SimilarMovieRecommender(
+        data_manager,
+        correlation_threshold,
+        co_purchase_counts=CoPurchaseCounts.from_movie_matrix(
+            data_manager.purchases_of_movies
+        ),
+    )
+    assert (
+        similar_movie_recommender.get_similar_movie_ids_batch(movie_ids, 5, "purchases")
+        == expected
+    )
+    assert [
+        get_similar_movie_ids(
+            similar_movie_recommender, data_manager, movie_id, 5, "purchases"
+        )
+        for movie_id in movie_ids
+    ] == expected
+
+
+@pytest.mark.parametrize("engine", ["exact", "minhash"])
+def test_added_purchases_equal_fresh_recommender(data_directory, engine):
+    data_manager = DataLoader.load_data_manager(data_directory)
+    random = np.random.default_rng(0)
+    user_ids = data_manager.user_table.user_ids
+    # movies without purchases are included, so that added purchases also add movies to the purchase matrix
+    movie_ids = data_manager.movie_table.movie_ids
+    queried_movie_ids = random.choice(movie_ids, 40, replace=False).tolist()
+    similar_movie_recommenders = {
+        correlation_threshold: SimilarMovieRecommender(
+            data_manager, correlation_threshold, engine=engine, cache_size=1024
+        )
+        for correlation_threshold in THRESHOLDS
+    }
+    similar_movie_recommenders[THRESHOLDS[0]].build_neighbor_indexes(n_neighbors=5)
+    # results before the events are cached
+    results_before = {
+        correlation_threshold: similar_movie_recommender.get_similar_movie_ids_batch(
+            queried_movie_ids, 3, "purchases"
+        )
+        for correlation_threshold, similar_movie_recommender in similar_movie_recommenders.items()
+    }
+    events = []
+    # query between events, so that results and indexes of earlier purchases are reused
+    for _ in range(20):
+        for _ in range(int(random.integers(1, 20))):
+            user_id, movie_id = int(random.choice(user_ids)), int(
+                random.choice(movie_ids)
+            )
+            data_manager.add_purchase(user_id, movie_id)
+            events.append((user_id, movie_id))
+        queries = random.choice(queried_movie_ids, 10).tolist()
+        for similar_movie_recommender in similar_movie_recommenders.values():
+            for movie_id in queries:
+                get_similar_movie_ids(
+                    similar_movie_recommender, data_manager, movie_id, 3, "purchases"
+                )
+            similar_movie_recommender.get_similar_movie_ids_batch(
+                queries, 3, "purchases"
+            )
+    n_changed = 0
+    fresh_data_manager = DataLoader.load_data_manager(data_directory)
+    for user_id, movie_id in events:
+        fresh_data_manager.add_purchase(user_id, movie_id)
+    for (
+        correlation_threshold,
+        similar_movie_recommender,
+    ) in similar_movie_recommenders.items():
+        fresh_movie_recommender = SimilarMovieRecommender(
+            fresh_data_manager, correlation_threshold, engine=engine
+        )
+        expected = fresh_movie_recommender.get_similar_movie_ids_batch(
+            queried_movie_ids, 3, "purchases"
+        )
+        assert (
+            similar_movie_recommender.get_similar_movie_ids_batch(
+                queried_movie_ids, 3, "purchases"
+            )
+            == expected
+        )
+        assert [
+            get_similar_movie_ids(
+                similar_movie_recommender, data_manager, movie_id, 3, "purchases"
+            )
+            for movie_id in queried_movie_ids
+        ] == expected
+        n_changed += sum(
+            before != after
+            for before, after in zip(results_before[correlation_threshold], expected)
+        )
+    # added purchases changed results, which would otherwise be served from the cache
+    assert n_changed > 0
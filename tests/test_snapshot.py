@@ -0,0 +1,110 @@
+# imports
+import shutil
+from os.path import join
+import numpy as np
+import pandas as pd
+import pytest
+
+# import movie recommendations modules
+from movie_recommendations.DataLoader import DataLoader
+from movie_recommendations.PopularMovieRecommender import PopularMovieRecommender
+from movie_recommendations.SimilarMovieRecommender import SimilarMovieRecommender
+from movie_recommendations.Snapshot import Snapshot
+
+
+@pytest.fixture(scope="module")
+def data_managers(data_directory, tmp_path_factory):
+    """DataManager parsed from the data files and DataManager loaded from its snapshot."""
+    snapshot_directory = join(str(tmp_path_factory.mktemp("snapshot")), "snapshot")
+    csv_data_manager = DataLoader.load_data_manager(data_directory, snapshot_directory)
+    assert Snapshot.is_valid(
+        snapshot_directory, DataLoader.get_source_paths(data_directory)
+    )
+    return csv_data_manager, DataLoader.load_data_manager(
+        data_directory, snapshot_directory
+    )
+
+
+@pytest.mark.parametrize("table", Snapshot.TABLES)
+def test_snapshot_tables_equal_parsed_tables(data_managers, table):
+    csv_data_manager, snapshot_data_manager = data_managers
+    pd.testing.assert_frame_equal(
+        getattr(snapshot_data_manager, table),
+        getattr(csv_data_manager, table),
+        check_dtype=False,
+    )
+
+
+@pytest.mark.parametrize("table", list(Snapshot.TYPED_TABLES))
+def test_snapshot_typed_tables_equal_parsed_typed_tables(data_managers, table):
+    csv_data_manager, snapshot_data_manager = data_managers
+    for array_name in Snapshot.TYPED_TABLES[table]:
+        array = getattr(getattr(snapshot_data_manager, table), array_name)
+        np.testing.assert_array_equal(
+            array, getattr(getattr(csv_data_manager, table), array_name)
+        )
+        # arrays without strings are read from the snapshot files instead of copied
+        if array.dtype != object:
+            assert isinstance(array, np.memmap)
+
+
+@pytest.mark.parametrize("matrix", Snapshot.MATRICES)
+def test_snapshot_matrices_equal_built_matrices(data_managers, matrix):
+    csv_data_manager, snapshot_data_manager = data_managers
+    snapshot_matrix = getattr(snapshot_data_manager, matrix)
+    csv_matrix = getattr(csv_data_manager, matrix)
+    np.testing.assert_array_equal(snapshot_matrix.row_ids, csv_matrix.row_ids)
+    np.testing.assert_array_equal(snapshot_matrix.movie_ids, csv_matrix.movie_ids)
+    assert (snapshot_matrix.matrix != csv_matrix.matrix).nnz == 0
+
+
+def test_snapshot_movies_users_and_recommendations_equal_parsed_data(data_managers):
+    csv_data_manager, snapshot_data_manager = data_managers
+    for movie_id in csv_data_manager.movie_table.movie_ids.tolist():
+        assert str(snapshot_data_manager.get_movie_by_movie_id(movie_id)) == str(
+            csv_data_manager.get_movie_by_movie_id(movie_id)
+        )
+    for user_id in csv_data_manager.user_table.user_ids[:100].tolist():
+        snapshot_user = snapshot_data_manager.get_user_by_user_id(user_id)
+        csv_user = csv_data_manager.get_user_by_user_id(user_id)
+        assert snapshot_user.name == csv_user.name
+        assert list(snapshot_user.viewed) == list(csv_user.viewed)
+        assert list(snapshot_user.purchased) == list(csv_user.purchased)
+    assert [
+        movie.identifier
+        for movie in PopularMovieRecommender(snapshot_data_manager).get_popular_movies(
+            10
+        )
+    ] == [
+        movie.identifier
+        for movie in PopularMovieRecommender(csv_data_manager).get_popular_movies(10)
+    ]
+    movie_ids = csv_data_manager.movie_table.movie_ids[:50].tolist()
+    for based_on in ["purchases", "genres"]:
+        assert SimilarMovieRecommender(
+            snapshot_data_manager, 0.05
+        ).get_similar_movie_ids_batch(
+            movie_ids, 5, based_on
+        ) == SimilarMovieRecommender(
+            csv_data_manager, 0.05
+        ).get_similar_movie_ids_batch(
+            movie_ids, 5, based_on
+        )
+
+
+def test_snapshot_of_changed_data_is_not_loaded(data_directory, tmp_path):
+    changed_directory = str(tmp_path / "data")
+    shutil.copytree(data_directory, changed_directory)
+    snapshot_directory = str(tmp_path / "snapshot")
+    DataLoader.load_data_manager(changed_directory, snapshot_directory)
+    source_paths = DataLoader.get_source_paths(changed_directory)
+    assert Snapshot.is_valid(snapshot_directory, source_paths)
+    session_data = DataLoader.read_session_data(source_paths["session_data"])
+    # remove last session, so that size and content of the file change
+    with open(source_paths["session_data"]) as session_file:
+        lines = session_file.readlines()
+    with open(source_paths["session_data"], "w") as session_file:
+        session_file.writelines(lines[:-1])
+    assert not Snapshot.is_valid(snapshot_directory, source_paths)
+    data_manager = DataLoader.load_data_manager(changed_directory, snapshot_directory)
+    assert len(data_manager.session_data) == len(session_data) - 1